@@ -0,0 +1,100 @@
+"""
+Transcripción offline de un corpus de audios contra el endpoint /transcribe_batch del microservicio ASR.
+
+Recibe una lista de archivos y/o directorios (se recorren recursivamente), los envía al ASR en
+lotes de --files-per-request archivos y escribe un resultado JSONL por archivo según llegan. Al
+final muestra el rendimiento agregado: segundos de audio transcritos por segundo de reloj.
+
+Uso:
+    python scripts/asr_batch_transcribe.py docs/audio_examples --language en --output resultados.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import requests
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac", ".webm", ".aac", ".opus")
+
+
+def collect_files(paths: list[str], extensions: tuple[str, ...]) -> list[str]:
+    """Expande directorios (recursivamente) y devuelve la lista ordenada de audios a transcribir."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.lower().endswith(extensions))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"[aviso] No existe: {path}", file=sys.stderr)
+    return sorted(files)
+
+
+def transcribe_chunk(url: str, paths: list[str], language: str | None, timeout: float):
+    """Envía un lote de archivos y devuelve (en streaming) las líneas JSONL de la respuesta."""
+    handles = [open(path, "rb") for path in paths]
+    try:
+        files = [("files", (os.path.basename(path), handle)) for path, handle in zip(paths, handles)]
+        data = {"language": language} if language else None
+        with requests.post(url, files=files, data=data, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for raw in response.iter_lines():
+                if raw:
+                    yield json.loads(raw)
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Transcripción offline de un corpus con /transcribe_batch")
+    parser.add_argument("paths", nargs="+", help="Archivos de audio y/o directorios")
+    parser.add_argument("--url", default="http://localhost:8001/transcribe_batch")
+    parser.add_argument("--language", default=None, help="Código ISO del idioma (por defecto autodetección)")
+    parser.add_argument("--files-per-request", type=int, default=16, help="Archivos enviados en cada petición")
+    parser.add_argument("--timeout", type=float, default=600, help="Timeout (s) de cada petición")
+    parser.add_argument("--output", default=None, help="Archivo JSONL de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    files = collect_files(args.paths, AUDIO_EXTENSIONS)
+    if not files:
+        sys.exit("No se encontraron audios que transcribir.")
+    print(f"{len(files)} archivo(s) a transcribir en lotes de {args.files_per_request}", file=sys.stderr)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    audio_seconds, succeeded, failed = 0.0, 0, 0
+    try:
+        for offset in range(0, len(files), args.files_per_request):
+            chunk = files[offset:offset + args.files_per_request]
+            try:
+                for line in transcribe_chunk(args.url, chunk, args.language, args.timeout):
+                    if line["type"] == "summary":
+                        print(f"  lote {offset // args.files_per_request + 1}: {line['succeeded']}/{line['files']} ok, "
+                              f"{line['audio_seconds']} s de audio en {line['wall_seconds']} s (x{line['throughput']})", file=sys.stderr)
+                        continue
+                    line["path"] = chunk[line["index"]]
+                    if line["status"] == "success":
+                        succeeded += 1
+                        audio_seconds += line["duration"]
+                    else:
+                        failed += 1
+                    out.write(json.dumps(line, ensure_ascii=False) + "\n")
+                    out.flush()
+            except requests.RequestException as e:
+                failed += len(chunk)
+                print(f"[error] Lote desde {chunk[0]}: {e}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall_seconds = time.perf_counter() - start
+    print(f"\nArchivos: {succeeded} ok, {failed} con error", file=sys.stderr)
+    print(f"Audio: {audio_seconds:.1f} s en {wall_seconds:.1f} s de reloj -> {audio_seconds / wall_seconds:.2f} s de audio/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Cliente de prueba para el endpoint WebSocket /ws/transcribe del microservicio ASR.
+
+Reproduce los audios de docs/audio_examples como si se estuvieran capturando en directo
+(tramas PCM s16le mono 16 kHz a ritmo real), muestra las hipótesis parciales y mide la
+latencia desde el final del habla (última trama del audio) hasta la hipótesis final.
+
+Uso:
+    python scripts/asr_stream_client.py --url ws://localhost:8001/ws/transcribe --language en
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+
+import websockets
+
+SAMPLE_RATE = 16000
+AUDIO_EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "docs", "audio_examples")
+
+
+def load_pcm(path: str) -> bytes:
+    """Decodifica un archivo de audio a PCM s16le mono 16 kHz usando ffmpeg."""
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+           "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+    return subprocess.run(cmd, capture_output=True, check=True).stdout
+
+
+async def stream_file(url: str, path: str, language: str | None, frame_ms: int, realtime: bool, tail_silence_ms: int) -> dict:
+    """Envía un archivo como stream y devuelve la hipótesis final y la latencia medida en el cliente."""
+    pcm = load_pcm(path)
+    frame_bytes = int(SAMPLE_RATE * frame_ms / 1000) * 2
+    query = f"?sample_rate={SAMPLE_RATE}" + (f"&language={language}" if language else "")
+    final = None
+    async with websockets.connect(url + query, max_size=None) as ws:
+
+        async def receiver():
+            nonlocal final
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg["type"] == "partial":
+                    print(f"  [parcial {msg['audio_seconds']:5.1f} s] {msg['text']}")
+                elif msg["type"] == "final":
+                    final = (time.perf_counter(), msg)
+                    return
+                elif msg["type"] == "no_speech":
+                    print(f"  [sin voz {msg['audio_seconds']:5.1f} s]")
+                    return
+                else:
+                    print(f"  [error] {msg.get('message')}")
+                    return
+
+        recv_task = asyncio.create_task(receiver())
+        # Audio a ritmo real
+        for i in range(0, len(pcm), frame_bytes):
+            await ws.send(pcm[i:i + frame_bytes])
+            if realtime:
+                await asyncio.sleep(frame_ms / 1000)
+        speech_end = time.perf_counter()
+        # Silencio posterior para que el servidor detecte el fin del habla
+        silence = b"\x00" * frame_bytes
+        for _ in range(max(1, tail_silence_ms // frame_ms)):
+            if recv_task.done():
+                break
+            await ws.send(silence)
+            if realtime:
+                await asyncio.sleep(frame_ms / 1000)
+        if not recv_task.done():
+            await ws.send(json.dumps({"event": "end"}))
+        await recv_task
+
+    if final is None:
+        return {"file": os.path.basename(path), "text": None, "client_latency_ms": None, "server_latency_ms": None}
+    received_at, msg = final
+    return {
+        "file": os.path.basename(path),
+        "text": msg["text"],
+        "audio_seconds": msg["audio_seconds"],
+        "client_latency_ms": round((received_at - speech_end) * 1000, 1),
+        "server_latency_ms": msg.get("latency_ms"),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Cliente de streaming para /ws/transcribe")
+    parser.add_argument("--url", default="ws://localhost:8001/ws/transcribe")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--tail-silence-ms", type=int, default=3000)
+    parser.add_argument("--no-realtime", action="store_true", help="Envía las tramas sin esperar (sin ritmo real)")
+    parser.add_argument("files", nargs="*", help="Audios a reproducir (por defecto docs/audio_examples)")
+    args = parser.parse_args()
+
+    files = args.files or sorted(
+        os.path.join(AUDIO_EXAMPLES, f) for f in os.listdir(AUDIO_EXAMPLES) if not f.startswith(".")
+    )
+    for path in files:
+        print(f"Reproduciendo {path}")
+        result = await stream_file(args.url, path, args.language, args.frame_ms, not args.no_realtime, args.tail_silence_ms)
+        print(f"  [final] {result['text']}")
+        print(f"  Latencia fin de habla -> texto final: cliente {result['client_latency_ms']} ms, servidor {result['server_latency_ms']} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
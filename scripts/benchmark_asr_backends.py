@@ -0,0 +1,77 @@
+"""
+Benchmark de factor de tiempo real (RTF) de los backends de ASR sobre los audios de ejemplo.
+
+Carga cada backend con el mismo modelo, transcribe los audios de docs/audio_examples varias veces
+y muestra, para cada uno, el tiempo medio de transcripción y el RTF (tiempo de proceso / duración
+del audio; < 1 es más rápido que tiempo real).
+
+Uso (desde la raíz del repositorio, con las dependencias del microservicio ASR instaladas):
+    PYTHONPATH=services/asr python scripts/benchmark_asr_backends.py --model large-v3-turbo --runs 3
+"""
+import os
+import time
+import argparse
+import statistics
+
+from src.audio.decoder import AudioDecoder, SAMPLE_RATE
+from src.transcribers.factory import build_transcriber, BACKENDS
+
+AUDIO_EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "docs", "audio_examples")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark RTF de los backends de ASR")
+    parser.add_argument("--model", default="large-v3-turbo")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--compute-type", default="int8", help="Cuantización para faster-whisper")
+    parser.add_argument("--cpu-threads", type=int, default=0, help="Hilos de CPU para faster-whisper")
+    parser.add_argument("files", nargs="*", help="Audios a transcribir (por defecto docs/audio_examples)")
+    args = parser.parse_args()
+
+    files = args.files or sorted(
+        os.path.join(AUDIO_EXAMPLES, f) for f in os.listdir(AUDIO_EXAMPLES) if not f.startswith(".")
+    )
+    decoder = AudioDecoder()
+    audios = {}
+    for path in files:
+        with open(path, "rb") as f:
+            audios[os.path.basename(path)] = decoder.decode(f.read())
+
+    print(f"{'backend':<16} {'audio':<28} {'dur (s)':>8} {'media (s)':>10} {'RTF':>7}  texto")
+    summary = {}
+    for backend in args.backends:
+        transcriber = build_transcriber(
+            backend=backend,
+            model_name=args.model,
+            decoder=decoder,
+            backend_options={"COMPUTE_TYPE": args.compute_type, "CPU_THREADS": args.cpu_threads}
+        )
+        # Calentamiento (carga perezosa de kernels/pesos)
+        transcriber.transcribe(next(iter(audios.values())), language=args.language)
+        total_audio, total_time = 0.0, 0.0
+        for name, audio in audios.items():
+            duration = audio.shape[0] / SAMPLE_RATE
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                text = transcriber.transcribe(audio, language=args.language)
+                times.append(time.perf_counter() - start)
+            mean = statistics.mean(times)
+            total_audio += duration * args.runs
+            total_time += sum(times)
+            print(f"{backend:<16} {name:<28} {duration:>8.1f} {mean:>10.2f} {mean / duration:>7.3f}  {text[:60]}")
+        summary[backend] = total_time / total_audio
+        del transcriber
+
+    print("\nRTF global:")
+    for backend, rtf in summary.items():
+        print(f"  {backend:<16} {rtf:.3f}")
+    if len(summary) == 2:
+        slow, fast = summary["openai-whisper"], summary["faster-whisper"]
+        print(f"  Aceleración faster-whisper vs openai-whisper: x{slow / fast:.2f}")
+
+
+if __name__ == "__main__":
+    main()
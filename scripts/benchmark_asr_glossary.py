@@ -0,0 +1,119 @@
+"""
+Benchmark del glosario de procedimientos como prompt inicial de Whisper.
+
+Transcribe los audios de docs/audio_examples con y sin el glosario (initial_prompt) usando un perfil
+de decodificación con fallback de temperatura y compara, para cada audio, la latencia media y el nº de
+re-decodificaciones por fallback. El glosario se construye igual que en el microservicio: términos fijos
+de ASR.GLOSSARY.TERMS (o --terms) más los nombres de procedimiento de la colección de ChromaDB.
+
+Uso (desde la raíz del repositorio, con las dependencias del microservicio ASR instaladas):
+    PYTHONPATH=services/asr python scripts/benchmark_asr_glossary.py --profile balanced --runs 3
+    PYTHONPATH=services/asr python scripts/benchmark_asr_glossary.py --no-chroma --terms ADIRS APU V1
+"""
+import os
+import time
+import argparse
+import statistics
+
+import yaml
+
+from src.audio.decoder import AudioDecoder, SAMPLE_RATE
+from src.transcribers.factory import build_transcriber, BACKENDS
+from src.transcribers.decoding_profiles import DecodingProfiles
+from src.glossary.procedure_glossary import ProcedureGlossary
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+AUDIO_EXAMPLES = os.path.join(ROOT, "docs", "audio_examples")
+CONFIG_PATH = os.path.join(ROOT, "infrastructure", "config.yaml")
+
+
+def build_prompt(args, config: dict) -> str:
+    """Construye el prompt del glosario (términos fijos + procedimientos de ChromaDB)."""
+    glossary_cfg = config["ASR"].get("GLOSSARY", {})
+    glossary = ProcedureGlossary(
+        chroma_url=args.chroma_url or config["VECTOR_DB"]["URL"],
+        collection_name=args.collection or config["VECTOR_DB"]["COLLECTION_NAME"],
+        terms=args.terms if args.terms is not None else glossary_cfg.get("TERMS", []),
+        refresh_seconds=3600,
+        max_prompt_chars=glossary_cfg.get("MAX_PROMPT_CHARS", 600)
+    )
+    glossary.stop()
+    if not args.no_chroma:
+        try:
+            glossary.refresh()
+        except Exception as e:
+            print(f"[aviso] No se pudieron leer los procedimientos de ChromaDB ({e}); solo términos fijos.")
+    return glossary.prompt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del glosario como prompt inicial de Whisper")
+    parser.add_argument("--model", default=None, help="Modelo (por defecto ASR.WHISPER_MODEL_NAME)")
+    parser.add_argument("--backend", default=None, choices=BACKENDS, help="Backend (por defecto ASR.BACKEND)")
+    parser.add_argument("--profile", default="balanced", help="Perfil de decodificación (con fallback de temperatura)")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--terms", nargs="*", default=None, help="Términos fijos (por defecto ASR.GLOSSARY.TERMS)")
+    parser.add_argument("--chroma-url", default=None, help="URL de ChromaDB (por defecto VECTOR_DB.URL)")
+    parser.add_argument("--collection", default=None, help="Colección (por defecto VECTOR_DB.COLLECTION_NAME)")
+    parser.add_argument("--no-chroma", action="store_true", help="No leer procedimientos de ChromaDB")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("files", nargs="*", help="Audios a transcribir (por defecto docs/audio_examples)")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    prompt = build_prompt(args, config)
+    if not prompt:
+        raise SystemExit("El glosario está vacío: indique --terms o una colección con metadato 'procedure'.")
+    print(f"Prompt ({len(prompt)} caracteres): {prompt}\n")
+
+    profiles_cfg = config["ASR"].get("DECODING_PROFILES", {})
+    profile_name, options = DecodingProfiles(profiles_cfg.get("PROFILES"), profiles_cfg.get("DEFAULT", "baseline")).resolve(args.profile)
+    backend = args.backend or config["ASR"].get("BACKEND", "openai-whisper")
+    decoder = AudioDecoder()
+    transcriber = build_transcriber(
+        backend=backend,
+        model_name=args.model or config["ASR"]["WHISPER_MODEL_NAME"],
+        decoder=decoder,
+        backend_options=config["ASR"].get("FASTER_WHISPER", {})
+    )
+
+    files = args.files or sorted(
+        os.path.join(AUDIO_EXAMPLES, f) for f in os.listdir(AUDIO_EXAMPLES) if not f.startswith(".")
+    )
+    audios = {}
+    for path in files:
+        with open(path, "rb") as f:
+            audios[os.path.basename(path)] = decoder.decode(f.read())
+    # Calentamiento (carga perezosa de kernels/pesos)
+    transcriber.transcribe_detailed(next(iter(audios.values())), language=args.language, **options)
+
+    variants = {"sin glosario": {}, "con glosario": {"initial_prompt": prompt}}
+    totals = {variant: {"time": 0.0, "passes": 0} for variant in variants}
+    print(f"Backend: {backend} | perfil: {profile_name} | ejecuciones: {args.runs}\n")
+    print(f"{'audio':<28} {'variante':<14} {'dur (s)':>8} {'media (s)':>10} {'fallbacks':>10}  texto")
+    for name, audio in audios.items():
+        duration = audio.shape[0] / SAMPLE_RATE
+        for variant, extra in variants.items():
+            times, passes = [], 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = transcriber.transcribe_detailed(audio, language=args.language, **options, **extra)
+                times.append(time.perf_counter() - start)
+                passes += DecodingProfiles.fallback_passes(result["segments"], options["temperature"])
+            mean = statistics.mean(times)
+            totals[variant]["time"] += sum(times)
+            totals[variant]["passes"] += passes
+            print(f"{name:<28} {variant:<14} {duration:>8.1f} {mean:>10.2f} {passes / args.runs:>10.1f}  {result['text'][:60]}")
+
+    print("\nTotales:")
+    for variant, total in totals.items():
+        print(f"  {variant:<14} tiempo {total['time']:.2f} s, fallbacks {total['passes']}")
+    base, primed = totals["sin glosario"], totals["con glosario"]
+    if primed["time"] > 0:
+        print(f"  Aceleración con glosario: x{base['time'] / primed['time']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de la réplica en memoria de la colección (LocalVectorIndex) frente a la búsqueda por HTTP en ChromaDB.
+
+Calcula una vez el embedding de cada consulta y mide, para el mismo embedding, la latencia de la búsqueda
+top-k por HTTP (langchain Chroma -> microservicio ChromaDB) y en el índice local (matmul + argpartition).
+Comprueba además que ambos caminos devuelven los mismos chunks.
+
+Uso (desde la raíz del repositorio, con las dependencias del microservicio RAG instaladas y ChromaDB levantado):
+    PYTHONPATH=services/rag python scripts/benchmark_rag_local_index.py --runs 50
+    PYTHONPATH=services/rag python scripts/benchmark_rag_local_index.py --chroma-url http://localhost:8000 -k 5 "engine fire" "manual landing"
+"""
+import os
+import time
+import argparse
+import statistics
+
+import yaml
+
+from src.embedders.sentence_transformers_embedders import Embedder
+from src.database.chromadb_repository import VectorDBRepository
+from src.database.local_vector_index import LocalVectorIndex
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+CONFIG_PATH = os.path.join(ROOT, "infrastructure", "config.yaml")
+DEFAULT_QUERIES = [
+    "engine fire during takeoff",
+    "manual landing procedure",
+    "cabin depressurization",
+    "APU fire on ground",
+    "dual hydraulic failure",
+]
+
+
+def timed(fn, runs: int) -> tuple[float, float, object]:
+    """Ejecuta fn runs veces y devuelve (mediana en ms, p95 en ms, último resultado)."""
+    times, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))], result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del índice vectorial local frente a ChromaDB por HTTP")
+    parser.add_argument("--chroma-url", default=None, help="URL de ChromaDB (por defecto VECTOR_DB.URL)")
+    parser.add_argument("--collection", default=None, help="Colección (por defecto VECTOR_DB.COLLECTION_NAME)")
+    parser.add_argument("--embedder", default=None, help="Modelo de embeddings (por defecto VECTOR_DB.EMBEDDER_NAME)")
+    parser.add_argument("-k", type=int, default=None, help="Top-k (por defecto RAG.SEARCH_KWARGS.k)")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("queries", nargs="*", help="Consultas (por defecto una lista de procedimientos de ejemplo)")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    top_k = args.k or config["RAG"]["SEARCH_KWARGS"].get("k", 5)
+    collection_name = args.collection or config["VECTOR_DB"]["COLLECTION_NAME"]
+    embedder = Embedder(model_name=args.embedder or config["VECTOR_DB"]["EMBEDDER_NAME"], max_batch_size=1)
+    vector_db = VectorDBRepository(
+        db_path=args.chroma_url or config["VECTOR_DB"]["URL"],
+        collection_name=collection_name,
+        embedding_function=embedder
+    )
+
+    start = time.perf_counter()
+    index = LocalVectorIndex(watcher=vector_db.collection_watcher, refresh_seconds=3600)
+    vector_db.collection_watcher.stop()
+    metrics = index.metrics()
+    print(f"Índice local: {metrics['chunks']} chunks de {metrics['dimension']} dimensiones, métrica '{metrics['space']}', "
+          f"carga en {time.perf_counter() - start:.2f} s | top-k: {top_k} | ejecuciones: {args.runs}\n")
+
+    queries = args.queries or DEFAULT_QUERIES
+    totals = {"http": [], "local": []}
+    print(f"{'consulta':<36} {'HTTP p50':>9} {'HTTP p95':>9} {'local p50':>10} {'local p95':>10} {'x':>7}  mismos chunks")
+    for query in queries:
+        embedding = embedder.embed_query(query)
+        http_p50, http_p95, http_docs = timed(lambda: vector_db.search(query=embedding, top_k=top_k, return_score=True), args.runs)
+        local_p50, local_p95, local_docs = timed(lambda: index.search(embedding, top_k=top_k), args.runs)
+        totals["http"].append(http_p50)
+        totals["local"].append(local_p50)
+        same = [doc.id for doc, _ in http_docs] == [doc.id for doc, _ in local_docs]
+        speedup = http_p50 / local_p50 if local_p50 > 0 else float("inf")
+        print(f"{query[:36]:<36} {http_p50:>8.2f}ms {http_p95:>8.2f}ms {local_p50:>9.3f}ms {local_p95:>9.3f}ms {speedup:>7.1f}  {'sí' if same else 'no'}")
+
+    http_mean, local_mean = statistics.mean(totals["http"]), statistics.mean(totals["local"])
+    print(f"\nMedia de medianas: HTTP {http_mean:.2f} ms, local {local_mean:.3f} ms (aceleración x{http_mean / local_mean:.1f})")
+
+
+if __name__ == "__main__":
+    main()
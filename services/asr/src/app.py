@@ -11,21 +11,194 @@ setup_logger(level)
 logger = logging.getLogger(__name__)
 
 # --- FastAPI Application Setup ---
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 import httpx
+import json
+import time
 import asyncio
+import threading
+from typing import Callable
 
 # --- Imports ---
-from src.transcribers.whisper import ASRWhisper
+from src.transcribers.factory import build_transcriber
+from src.transcribers.model_pool import ModelPool, plan_replicas
+from src.transcribers.adaptive import AdaptiveTranscriber
+from src.transcribers.decoding_profiles import DecodingProfiles
+from src.audio.decoder import AudioDecoder, SAMPLE_RATE
+from src.audio.vad import EnergyVAD
+from src.streaming.session import StreamingSession
+from src.scheduler.batch_scheduler import BatchScheduler
+from src.scheduler.worker_pool import InferencePool, PoolSaturatedError
+from src.cache.transcription_cache import TranscriptionCache
+from src.jobs.job_manager import JobManager
+from src.glossary.procedure_glossary import ProcedureGlossary
+from src.transcribers.confidence import ConfidenceGate, CONFIDENT, UNUSABLE
 from deprecated import deprecated
 
 # --- Initialize Dependencies ---
 try:
     whisper_model = config["ASR"]["WHISPER_MODEL_NAME"]
-    asr_service = ASRWhisper(model_name=whisper_model)
+    decoder_cfg = config["ASR"].get("DECODER", {})
+    audio_decoder = AudioDecoder(
+        max_concurrent_decodes=decoder_cfg.get("MAX_CONCURRENT_DECODES", 4)
+    )
+    # Detector de actividad de voz (opcional)
+    vad_cfg = config["ASR"].get("VAD", {})
+    vad = None
+    if vad_cfg.get("ENABLED", False):
+        vad = EnergyVAD(
+            frame_ms=vad_cfg.get("FRAME_MS", 30),
+            threshold_db=vad_cfg.get("THRESHOLD_DB", -45),
+            noise_margin_db=vad_cfg.get("NOISE_MARGIN_DB", 10),
+            min_speech_ms=vad_cfg.get("MIN_SPEECH_MS", 150),
+            min_silence_ms=vad_cfg.get("MIN_SILENCE_MS", 500),
+            padding_ms=vad_cfg.get("PADDING_MS", 200),
+            max_segment_seconds=vad_cfg.get("MAX_SEGMENT_SECONDS", 30)
+        )
+    asr_backend = config["ASR"].get("BACKEND", "openai-whisper")
+    # Réplicas del modelo (pesos compartidos), dimensionadas por núcleos y presupuesto de memoria
+    model_pool_cfg = config["ASR"].get("MODEL_POOL", {})
+    replicas, threads_per_replica = plan_replicas(
+        replicas=model_pool_cfg.get("REPLICAS", 1),
+        threads_per_replica=model_pool_cfg.get("THREADS_PER_REPLICA", 0),
+        memory_budget_mb=model_pool_cfg.get("MEMORY_BUDGET_MB", 0),
+        replica_memory_mb=model_pool_cfg.get("REPLICA_MEMORY_MB", 0),
+        max_replicas=model_pool_cfg.get("MAX_REPLICAS", 8)
+    )
+    logger.info(f"Pool de modelos: {replicas} réplica(s) con {threads_per_replica} hilo(s) cada una")
+    # Modo de audio largo: tramos contiguos partidos por los silencios, transcritos en paralelo sobre las réplicas
+    long_audio_cfg = config["ASR"].get("LONG_AUDIO", {})
+    long_audio_seconds = long_audio_cfg.get("MIN_SECONDS", 60) if long_audio_cfg.get("ENABLED", False) else None
+    asr_service = build_transcriber(
+        backend=asr_backend,
+        model_name=whisper_model,
+        decoder=audio_decoder,
+        vad=vad,
+        backend_options=config["ASR"].get("FASTER_WHISPER", {}),
+        replicas=replicas,
+        threads_per_replica=threads_per_replica,
+        long_audio_seconds=long_audio_seconds,
+        max_parallel_segments=long_audio_cfg.get("MAX_PARALLEL_SEGMENTS", 0)
+    )
+    # Perfiles de decodificación (fast / balanced / accurate)
+    profiles_cfg = config["ASR"].get("DECODING_PROFILES", {})
+    decoding_profiles = DecodingProfiles(
+        profiles=profiles_cfg.get("PROFILES"),
+        default=profiles_cfg.get("DEFAULT", "baseline")
+    )
+    # Glosario del dominio (procedimientos de ChromaDB) como prompt inicial del decoder (opcional)
+    glossary_cfg = config["ASR"].get("GLOSSARY", {})
+    procedure_glossary = None
+    if glossary_cfg.get("ENABLED", False):
+        procedure_glossary = ProcedureGlossary(
+            chroma_url=config["VECTOR_DB"]["URL"],
+            collection_name=config["VECTOR_DB"]["COLLECTION_NAME"],
+            terms=glossary_cfg.get("TERMS", []),
+            refresh_seconds=glossary_cfg.get("REFRESH_SECONDS", 300),
+            max_prompt_chars=glossary_cfg.get("MAX_PROMPT_CHARS", 600)
+        )
+    # Veredicto de confianza de las transcripciones (los clientes no consultan al RAG si es 'unusable')
+    confidence_cfg = config["ASR"].get("CONFIDENCE", {})
+    confidence_gate = ConfidenceGate(
+        min_avg_logprob=confidence_cfg.get("MIN_AVG_LOGPROB", -1.0),
+        max_no_speech_prob=confidence_cfg.get("MAX_NO_SPEECH_PROB", 0.6),
+        max_compression_ratio=confidence_cfg.get("MAX_COMPRESSION_RATIO", 2.4),
+        unusable_avg_logprob=confidence_cfg.get("UNUSABLE_AVG_LOGPROB", -1.5)
+    )
+    streaming_cfg = config["ASR"].get("STREAMING", {})
+    # Planificador de micro-lotes (opcional)
+    batching_cfg = config["ASR"].get("BATCHING", {})
+    batch_scheduler = None
+    if batching_cfg.get("ENABLED", False) and not asr_service.supports_batching:
+        logger.warning(f"El backend '{asr_backend}' no soporta micro-lotes; se desactiva BATCHING.")
+    elif batching_cfg.get("ENABLED", False):
+        batch_scheduler = BatchScheduler(
+            asr_service,
+            max_batch_size=batching_cfg.get("MAX_BATCH_SIZE", 8),
+            max_wait_ms=batching_cfg.get("MAX_WAIT_MS", 50),
+            max_concurrent_batches=replicas
+        )
+        default_profile, default_options = decoding_profiles.resolve(None)
+        if not BatchScheduler.is_batchable(default_options):
+            logger.warning(
+                f"BATCHING activo, pero el perfil por defecto '{default_profile}' no es agrupable (fallback de temperatura, "
+                f"beam search o marcas por palabra): solo se agrupan las peticiones con un perfil a temperatura 0 (p. ej. 'fast')."
+            )
+    transcriber = batch_scheduler or asr_service
+    # Selección adaptativa entre un modelo rápido y el preciso (WHISPER_MODEL_NAME) según duración y latencia
+    adaptive_cfg = config["ASR"].get("ADAPTIVE", {})
+    adaptive_transcriber = None
+    if adaptive_cfg.get("ENABLED", False):
+        fast_model = adaptive_cfg.get("FAST_MODEL_NAME", "small")
+        fast_service = build_transcriber(
+            backend=asr_backend,
+            model_name=fast_model,
+            decoder=audio_decoder,
+            vad=vad,
+            backend_options=config["ASR"].get("FASTER_WHISPER", {}),
+            replicas=replicas,
+            threads_per_replica=threads_per_replica,
+            long_audio_seconds=long_audio_seconds,
+            max_parallel_segments=long_audio_cfg.get("MAX_PARALLEL_SEGMENTS", 0)
+        )
+        fast_scheduler = None
+        if batch_scheduler is not None:
+            fast_scheduler = BatchScheduler(
+                fast_service,
+                max_batch_size=batching_cfg.get("MAX_BATCH_SIZE", 8),
+                max_wait_ms=batching_cfg.get("MAX_WAIT_MS", 50),
+                max_concurrent_batches=replicas
+            )
+        adaptive_transcriber = AdaptiveTranscriber(
+            fast=fast_scheduler or fast_service,
+            accurate=transcriber,
+            fast_model_name=fast_model,
+            accurate_model_name=whisper_model,
+            decoder=audio_decoder,
+            short_audio_seconds=adaptive_cfg.get("SHORT_AUDIO_SECONDS", 8),
+            min_avg_logprob=adaptive_cfg.get("MIN_AVG_LOGPROB", -0.8),
+            max_no_speech_prob=adaptive_cfg.get("MAX_NO_SPEECH_PROB", 0.6),
+            fast_rtf=adaptive_cfg.get("FAST_RTF", 0.05),
+            accurate_rtf=adaptive_cfg.get("ACCURATE_RTF", 0.3)
+        )
+        transcriber = adaptive_transcriber
+    # Pool acotado de inferencia (fuera del event loop)
+    pool_cfg = config["ASR"].get("WORKER_POOL", {})
+    inference_pool = InferencePool(
+        max_workers=pool_cfg.get("WORKERS", 2),
+        max_queue_size=pool_cfg.get("MAX_QUEUE_SIZE", 16),
+        retry_after_seconds=pool_cfg.get("RETRY_AFTER_SECONDS", 5)
+    )
+    # Caché de transcripciones por contenido (opcional)
+    cache_cfg = config["ASR"].get("CACHE", {})
+    transcription_cache = None
+    if cache_cfg.get("ENABLED", False):
+        transcription_cache = TranscriptionCache(
+            max_entries=cache_cfg.get("MAX_ENTRIES", 256),
+            disk_dir=cache_cfg.get("DISK_DIR"),
+            disk_max_entries=cache_cfg.get("DISK_MAX_ENTRIES", 10000)
+        )
+    # Transcripción por lotes de archivos (POST /transcribe_batch)
+    batch_endpoint_cfg = config["ASR"].get("BATCH_ENDPOINT", {})
+    batch_endpoint_concurrency = batch_endpoint_cfg.get("MAX_CONCURRENCY", 8)
+    # Trabajos de transcripción asíncronos (enviar / consultar / cancelar)
+    jobs_cfg = config["ASR"].get("JOBS", {})
+    job_manager = JobManager(
+        # Mismo camino que /transcribe (caché, perfiles, modelo adaptativo, micro-lotes y pool de inferencia)
+        lambda audio_bytes, language, **options: transcribe_payload(audio_bytes, language, **options),
+        max_workers=jobs_cfg.get("WORKERS", 2),
+        max_queue_size=jobs_cfg.get("MAX_QUEUE_SIZE", 32),
+        retry_after_seconds=pool_cfg.get("RETRY_AFTER_SECONDS", 5),
+        retention_seconds=jobs_cfg.get("RETENTION_SECONDS", 3600)
+    )
+    long_poll_max_seconds = jobs_cfg.get("LONG_POLL_MAX_SECONDS", 30)
+    # Consulta por voz: transcripción + RAG en una sola petición (cliente HTTP reutilizado entre peticiones)
+    voice_query_cfg = config["ASR"].get("VOICE_QUERY", {})
+    voice_query_rag_url = voice_query_cfg.get("RAG_URL", config["RAG"]["WEBHOOK_RAG_URL"])
+    rag_client = httpx.AsyncClient(timeout=config.get("TIMEOUTS", {}).get("RAG", 100))
 except Exception as e:
-    logger.error(f"Error initializing ASRWhisper: {str(e)}", exc_info=True)
+    logger.error(f"Error initializing ASR transcriber: {str(e)}", exc_info=True)
     raise RuntimeError(f"Application initialization failed: {str(e)}")
 
 # --- Instancia de la aplicación FastAPI ---
@@ -70,6 +243,110 @@ async def notify_rag_microservice(transcription: str) -> None:
 
     await asyncio.gather(notify_agentic(), notify_rag())
 
+def overloaded_response(error: PoolSaturatedError) -> JSONResponse:
+    """
+    Construye la respuesta HTTP 503 cuando el pool de inferencia está saturado.
+
+    Args:
+        error (PoolSaturatedError): Error de saturación con los segundos sugeridos para reintentar.
+
+    Returns:
+        JSONResponse: Respuesta con estado 'overloaded' y cabecera Retry-After.
+    """
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+        content={"status": "overloaded", "message": str(error), "retry_after": error.retry_after, "transcription": None}
+    )
+
+def glossary_options() -> dict:
+    """
+    Opciones de decodificación con el glosario del dominio como prompt inicial.
+
+    Returns:
+        dict: {"initial_prompt": ...} si el glosario está activo y tiene términos; {} en otro caso.
+    """
+    if procedure_glossary is None or not procedure_glossary.prompt:
+        return {}
+    return {"initial_prompt": procedure_glossary.prompt}
+
+async def transcribe_payload(
+    audio_bytes: bytes,
+    language: str | None,
+    latency_budget_ms: float | None,
+    profile_name: str,
+    decode_options: dict,
+    on_segment: Callable[[dict], None] | None = None,
+    cancel_event: threading.Event | None = None
+) -> tuple[dict, bool]:
+    """
+    Transcribe un audio (o lo sirve desde la caché) y construye el resultado de /transcribe y /voice_query.
+
+    Args:
+        audio_bytes (bytes): Audio recibido.
+        language (str, opcional): Código ISO del idioma; None para autodetección.
+        latency_budget_ms (float, opcional): Latencia máxima aceptable (ASR.ADAPTIVE).
+        profile_name (str): Perfil de decodificación resuelto.
+        decode_options (dict): Opciones de decodificación del perfil.
+        on_segment (Callable, opcional): Recibe cada segmento de voz transcrito ({"text", "segments", "index", "total"},
+            con los segmentos en el formato de la respuesta), desde el hilo de inferencia (trabajos asíncronos).
+        cancel_event (threading.Event, opcional): Detiene la transcripción entre segmentos de voz (trabajos asíncronos).
+
+    Returns:
+        tuple[dict, bool]: ({"transcription", "language", "duration", "segments", "confidence", "profile", "fallback_passes"},
+            servido desde caché).
+
+    Raises:
+        PoolSaturatedError: Si el pool de inferencia está saturado.
+        TranscriptionCancelledError: Si se activa cancel_event.
+    """
+    decode_options = {**decode_options, **glossary_options()}
+    # Con ASR.ADAPTIVE el modelo se elige antes de consultar la caché: la clave incluye el modelo enrutado
+    # (el audio se decodifica una sola vez y se pasa ya decodificado al transcriptor)
+    audio, model_name, route_options = audio_bytes, whisper_model, {}
+    if adaptive_transcriber is not None:
+        audio = await asyncio.to_thread(audio_decoder.decode, audio_bytes)
+        tier = adaptive_transcriber.route(audio.shape[0] / SAMPLE_RATE, latency_budget_ms)
+        model_name = adaptive_transcriber.model_names[tier]
+        route_options = {"latency_budget_ms": latency_budget_ms, "tier": tier}
+    # Consultar la caché antes de transcribir
+    cache_key = None
+    if transcription_cache is not None:
+        cache_key = TranscriptionCache.make_key(
+            audio_bytes, language, model_name, asr_backend, profile_name, decode_options.get("initial_prompt", "")
+        )
+        cached = transcription_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Transcripción servida desde caché")
+            return cached, True
+    # Transcribir el audio en el pool de inferencia (agrupado en micro-lotes si el perfil lo permite)
+    # Progreso y cancelación por segmento (solo trabajos asíncronos: estas opciones desactivan el micro-lote)
+    job_options = {}
+    if on_segment is not None:
+        job_options["on_segment"] = lambda partial: on_segment({**partial, "segments": ConfidenceGate.segment_metrics(partial["segments"])})
+    if cancel_event is not None:
+        job_options["cancel_event"] = cancel_event
+    result = await inference_pool.run(
+        transcriber.transcribe_detailed, audio, language=language, **route_options, **job_options, **decode_options
+    )
+    fallback_passes = DecodingProfiles.fallback_passes(result["segments"], decode_options["temperature"])
+    logger.info(f"Perfil de decodificación '{profile_name}': {fallback_passes} pasada(s) de fallback")
+    confidence = confidence_gate.evaluate(result)
+    if confidence["verdict"] != CONFIDENT:
+        logger.warning(f"Transcripción con confianza '{confidence['verdict']}': {', '.join(confidence['reasons'])}")
+    payload = {
+        "transcription": result["text"] or "",
+        "language": result.get("language"),
+        "duration": result.get("duration"),
+        "segments": ConfidenceGate.segment_metrics(result["segments"]),
+        "confidence": confidence,
+        "profile": profile_name,
+        "fallback_passes": fallback_passes
+    }
+    if cache_key is not None and payload["transcription"].strip():
+        transcription_cache.put(cache_key, payload)
+    return payload, False
+
 @app.get("/")
 def read_root() -> JSONResponse:
     """
@@ -84,15 +361,24 @@ def read_root() -> JSONResponse:
     )
 
 @app.post("/transcribe")
-async def transcribe_endpoint(file: UploadFile = File(...), language: str | None = Form(default=None)) -> JSONResponse:
+async def transcribe_endpoint(
+    file: UploadFile = File(...),
+    language: str | None = Form(default=None),
+    latency_budget_ms: float | None = Form(default=None),
+    profile: str | None = Form(default=None)
+) -> JSONResponse:
     """
     Endpoint para transcribir audio a texto.
 
     Args:
         file (UploadFile): Archivo de audio recibido vía formulario multipart.
+        language (str, opcional): Código ISO del idioma; None para autodetección.
+        latency_budget_ms (float, opcional): Latencia máxima aceptable; con ASR.ADAPTIVE activo puede forzar el modelo rápido.
+        profile (str, opcional): Perfil de decodificación (ASR.DECODING_PROFILES); None para el perfil por defecto.
 
     Returns:
-        JSONResponse: Respuesta con la transcripción o el error correspondiente.
+        JSONResponse: Respuesta con la transcripción, las métricas de cada segmento, el veredicto de confianza,
+            el perfil usado y las pasadas de fallback, o el error correspondiente.
     """
     try:
         # Leer el archivo de audio
@@ -103,9 +389,16 @@ async def transcribe_endpoint(file: UploadFile = File(...), language: str | None
                 status_code=400,
                 content={"status": "validation_error", "message": "Audio file is empty or missing", "transcription": None}
             )
-        # Transcribir el audio
-        transcription = asr_service.transcribe(audio_bytes, language=language)
-        if not transcription or not transcription.strip():
+        try:
+            profile_name, decode_options = decoding_profiles.resolve(profile)
+        except ValueError as e:
+            logger.warning(f"Perfil de decodificación no válido: {profile}")
+            return JSONResponse(
+                status_code=400,
+                content={"status": "validation_error", "message": str(e), "transcription": None}
+            )
+        payload, cached = await transcribe_payload(audio_bytes, language, latency_budget_ms, profile_name, decode_options)
+        if not payload["transcription"].strip():
             logger.warning("Transcripción vacía")
             return JSONResponse(
                 status_code=400,
@@ -116,8 +409,10 @@ async def transcribe_endpoint(file: UploadFile = File(...), language: str | None
 
         return JSONResponse(
             status_code=200,
-            content={"status": "success", "transcription": transcription}
+            content={"status": "success", **payload, "cached": cached}
         )
+    except PoolSaturatedError as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error en transcribe_endpoint: {str(e)}", exc_info=True)
         return JSONResponse(
@@ -125,6 +420,414 @@ async def transcribe_endpoint(file: UploadFile = File(...), language: str | None
             content={"status": "processing_error", "message": f"Error processing audio: {str(e)}", "transcription": None}
         )
 
+@app.post("/transcribe_batch")
+async def transcribe_batch_endpoint(
+    files: list[UploadFile] = File(...),
+    language: str | None = Form(default=None),
+    profile: str | None = Form(default=None)
+) -> StreamingResponse | JSONResponse:
+    """
+    Endpoint para transcribir varios archivos de audio en una sola petición.
+
+    Cada archivo sigue el mismo camino que /transcribe (caché, perfil de decodificación, selección adaptativa
+    de modelo, micro-lotes y pool de inferencia), con hasta BATCH_ENDPOINT.MAX_CONCURRENCY archivos a la vez.
+    Los resultados se devuelven en streaming en formato JSONL según van terminando (una línea por archivo) y
+    la última línea resume el rendimiento:
+        - {"type": "result", "index", "file", "status": "success", "text", "language", "duration", "segments",
+           "confidence", "profile", "fallback_passes", "cached", "elapsed_ms"}
+        - {"type": "result", "index", "file", "status": "processing_error", "message"}
+        - {"type": "summary", "files", "succeeded", "failed", "audio_seconds", "wall_seconds", "throughput"}
+    donde throughput son segundos de audio transcritos por segundo de reloj.
+
+    Args:
+        files (list[UploadFile]): Archivos de audio recibidos vía formulario multipart.
+        language (str, opcional): Código ISO del idioma común a todos los archivos; None para autodetección.
+        profile (str, opcional): Perfil de decodificación (ASR.DECODING_PROFILES); None para el perfil por defecto.
+
+    Returns:
+        StreamingResponse | JSONResponse: Resultados en JSONL (application/x-ndjson) o 400 si el perfil no existe.
+    """
+    start = time.perf_counter()
+    try:
+        profile_name, decode_options = decoding_profiles.resolve(profile)
+    except ValueError as e:
+        logger.warning(f"Perfil de decodificación no válido: {profile}")
+        return JSONResponse(status_code=400, content={"status": "validation_error", "message": str(e)})
+    semaphore = asyncio.Semaphore(batch_endpoint_concurrency)
+    logger.info(f"Transcripción por lotes de {len(files)} archivo(s)")
+    # Se leen antes de responder: los archivos del formulario se cierran al salir del endpoint
+    uploads = [(upload.filename, await upload.read()) for upload in files]
+
+    async def transcribe_file(index: int, filename: str, audio_bytes: bytes) -> dict:
+        async with semaphore:
+            file_start = time.perf_counter()
+            try:
+                if not audio_bytes:
+                    raise ValueError("Audio file is empty or missing")
+                payload, cached = await transcribe_payload(audio_bytes, language, None, profile_name, decode_options)
+                return {
+                    "type": "result",
+                    "index": index,
+                    "file": filename,
+                    "status": "success",
+                    "text": payload["transcription"],
+                    "language": payload.get("language"),
+                    "duration": payload.get("duration") or 0.0,
+                    "segments": payload["segments"],
+                    "confidence": payload["confidence"],
+                    "profile": payload["profile"],
+                    "fallback_passes": payload["fallback_passes"],
+                    "cached": cached,
+                    "elapsed_ms": round((time.perf_counter() - file_start) * 1000, 1)
+                }
+            except Exception as e:
+                logger.error(f"Error transcribiendo '{filename}' en el lote: {str(e)}", exc_info=True)
+                return {"type": "result", "index": index, "file": filename, "status": "processing_error", "message": f"Error processing audio: {str(e)}"}
+
+    async def stream_results():
+        tasks = [asyncio.create_task(transcribe_file(index, filename, audio_bytes)) for index, (filename, audio_bytes) in enumerate(uploads)]
+        audio_seconds, succeeded = 0.0, 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                line = await task
+                if line["status"] == "success":
+                    succeeded += 1
+                    audio_seconds += line["duration"]
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+        wall_seconds = time.perf_counter() - start
+        summary = {
+            "type": "summary",
+            "files": len(files),
+            "succeeded": succeeded,
+            "failed": len(files) - succeeded,
+            "audio_seconds": round(audio_seconds, 2),
+            "wall_seconds": round(wall_seconds, 2),
+            "throughput": round(audio_seconds / wall_seconds, 2) if wall_seconds > 0 else None
+        }
+        logger.info(f"Lote completado: {summary}")
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/voice_query")
+async def voice_query_endpoint(
+    file: UploadFile = File(...),
+    language: str | None = Form(default=None),
+    latency_budget_ms: float | None = Form(default=None),
+    profile: str | None = Form(default=None)
+) -> StreamingResponse | JSONResponse:
+    """
+    Endpoint de consulta por voz: transcribe el audio y consulta al RAG en el servidor, sin que el cliente
+    tenga que recibir la transcripción y reenviarla.
+
+    La respuesta es JSONL en streaming: primero la transcripción (en cuanto existe), después la respuesta
+    del RAG y por último un resumen con los tiempos de cada etapa. Si la transcripción es 'unusable' (o vacía)
+    no se consulta al RAG. Los errores de la transcripción se devuelven como en /transcribe (400, 500, 503).
+
+    Args:
+        file (UploadFile): Archivo de audio recibido vía formulario multipart.
+        language (str, opcional): Código ISO del idioma; None para autodetección.
+        latency_budget_ms (float, opcional): Latencia máxima aceptable de la transcripción (ASR.ADAPTIVE).
+        profile (str, opcional): Perfil de decodificación (ASR.DECODING_PROFILES); None para el perfil por defecto.
+
+    Returns:
+        StreamingResponse | JSONResponse: Líneas JSON {"type": "transcription" | "answer" | "summary", ...} o el error de la transcripción.
+    """
+    start = time.perf_counter()
+    try:
+        audio_bytes = await file.read()
+        if not audio_bytes:
+            logger.warning("Archivo de audio vacío o no recibido")
+            return JSONResponse(
+                status_code=400,
+                content={"status": "validation_error", "message": "Audio file is empty or missing", "transcription": None}
+            )
+        try:
+            profile_name, decode_options = decoding_profiles.resolve(profile)
+        except ValueError as e:
+            logger.warning(f"Perfil de decodificación no válido: {profile}")
+            return JSONResponse(
+                status_code=400,
+                content={"status": "validation_error", "message": str(e), "transcription": None}
+            )
+        payload, cached = await transcribe_payload(audio_bytes, language, latency_budget_ms, profile_name, decode_options)
+    except PoolSaturatedError as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error en voice_query_endpoint: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={"status": "processing_error", "message": f"Error processing audio: {str(e)}", "transcription": None}
+        )
+    timings = {"transcription_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    async def stream_pipeline():
+        yield json.dumps(
+            {"type": "transcription", "status": "success", **payload, "cached": cached, "elapsed_ms": timings["transcription_ms"]},
+            ensure_ascii=False
+        ) + "\n"
+        transcription = payload["transcription"].strip()
+        if not transcription or payload["confidence"]["verdict"] == UNUSABLE:
+            logger.warning("Consulta por voz sin transcripción utilizable; no se consulta al RAG")
+            answer = {"status": "skipped", "message": "Transcription is not usable, please repeat the request", "response": None}
+        else:
+            rag_start = time.perf_counter()
+            try:
+                logger.info(f"Consultando al RAG con la transcripción: {transcription[:100]}")
+                response = await rag_client.post(voice_query_rag_url, json={"transcription": transcription})
+                rag_json = response.json()
+                answer = {
+                    "status": rag_json.get("status", "unknown_error"),
+                    "status_code": response.status_code,
+                    "message": rag_json.get("message"),
+                    "response": rag_json.get("response")
+                }
+            except httpx.TimeoutException:
+                logger.error("Timeout consultando al RAG")
+                answer = {"status": "timeout", "message": "Request to RAG timed out", "response": None}
+            except Exception as e:
+                logger.error(f"Error consultando al RAG: {str(e)}", exc_info=True)
+                answer = {"status": "processing_error", "message": f"RAG request failed: {str(e)}", "response": None}
+            timings["rag_ms"] = round((time.perf_counter() - rag_start) * 1000, 1)
+        yield json.dumps({"type": "answer", **answer, "elapsed_ms": timings.get("rag_ms")}, ensure_ascii=False) + "\n"
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"Consulta por voz completada: {timings}")
+        yield json.dumps({"type": "summary", "timings": timings}) + "\n"
+
+    return StreamingResponse(stream_pipeline(), media_type="application/x-ndjson")
+
+@app.websocket("/ws/transcribe")
+async def transcribe_stream_endpoint(
+    websocket: WebSocket,
+    language: str | None = None,
+    sample_rate: int = 16000,
+    profile: str | None = None
+) -> None:
+    """
+    Endpoint WebSocket para transcripción en streaming.
+
+    El cliente envía tramas binarias PCM s16le mono (a `sample_rate` Hz) según se capturan y, opcionalmente,
+    el mensaje de texto {"event": "end"} para cerrar la locución. El servidor responde con mensajes JSON:
+        - {"type": "partial", "text": ..., "audio_seconds": ...}: hipótesis sobre la ventana deslizante.
+        - {"type": "final", "text": ..., "audio_seconds": ..., "latency_ms": ...}: hipótesis final al detectar fin de habla.
+        - {"type": "no_speech", "audio_seconds": ...}: la locución terminó sin voz transcribible (no se emite "final").
+        - {"type": "error", "message": ...}: error de procesamiento (también perfil no válido, y se cierra la conexión).
+
+    La hipótesis final usa el perfil de decodificación y el prompt del glosario igual que /transcribe.
+
+    Args:
+        websocket (WebSocket): Conexión WebSocket con el cliente.
+        language (str, opcional): Código ISO del idioma (query param); None para autodetección.
+        sample_rate (int): Frecuencia de muestreo de las tramas PCM (query param).
+        profile (str, opcional): Perfil de decodificación (query param, ASR.DECODING_PROFILES); None para el perfil por defecto.
+
+    Returns:
+        None
+    """
+    await websocket.accept()
+    try:
+        profile_name, decode_options = decoding_profiles.resolve(profile)
+    except ValueError as e:
+        logger.warning(f"Perfil de decodificación no válido en streaming: {profile}")
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=1008)
+        return
+    session = StreamingSession(
+        transcriber,
+        language=language,
+        sample_rate=sample_rate,
+        window_seconds=streaming_cfg.get("WINDOW_SECONDS", 10),
+        partial_interval_seconds=streaming_cfg.get("PARTIAL_INTERVAL_SECONDS", 1.0),
+        end_silence_ms=streaming_cfg.get("END_SILENCE_MS", 700),
+        energy_threshold_db=streaming_cfg.get("ENERGY_THRESHOLD_DB", -45),
+        max_utterance_seconds=streaming_cfg.get("MAX_UTTERANCE_SECONDS", 30),
+        decode_options={**decode_options, **glossary_options()}
+    )
+    logger.info(f"Sesión de streaming abierta (language={language}, sample_rate={sample_rate}, perfil '{profile_name}')")
+    partial_task: asyncio.Task | None = None
+
+    async def send_partial(window, audio_seconds: float) -> None:
+        try:
+            text = await inference_pool.run(session.transcribe_partial, window)
+        except PoolSaturatedError:
+            # Las hipótesis parciales son prescindibles: si el pool está lleno se omiten
+            return
+        if text:
+            await websocket.send_json({"type": "partial", "text": text, "audio_seconds": round(audio_seconds, 2)})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                session.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except Exception:
+                    event = None
+                if event == "end":
+                    session.force_end()
+
+            if session.end_of_speech():
+                # La hipótesis final tiene prioridad: se espera a la parcial en curso para no solapar el modelo
+                if partial_task is not None and not partial_task.done():
+                    await partial_task
+                speech_end_time = session.speech_end_time
+                audio_seconds = session.duration
+                audio = session.take_utterance()
+                text = ""
+                if audio is not None:
+                    try:
+                        text = await inference_pool.run(session.transcribe_final, audio)
+                    except PoolSaturatedError as e:
+                        await websocket.send_json({"type": "overloaded", "message": str(e), "retry_after": e.retry_after})
+                        continue
+                if not text:
+                    # Locución solo de silencio (o sin texto tras el VAD): no se emite una hipótesis final vacía
+                    logger.info(f"Locución sin voz en streaming ({audio_seconds:.1f} s de audio)")
+                    await websocket.send_json({"type": "no_speech", "audio_seconds": round(audio_seconds, 2)})
+                    continue
+                latency_ms = (time.perf_counter() - speech_end_time) * 1000 if speech_end_time else None
+                logger.info(f"Hipótesis final en streaming ({audio_seconds:.1f} s de audio, latencia {latency_ms or 0:.0f} ms): {text}")
+                await websocket.send_json({
+                    "type": "final",
+                    "text": text,
+                    "audio_seconds": round(audio_seconds, 2),
+                    "latency_ms": round(latency_ms, 1) if latency_ms is not None else None
+                })
+            elif session.partial_due() and (partial_task is None or partial_task.done()):
+                partial_task = asyncio.create_task(send_partial(session.take_partial_window(), session.duration))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error en transcribe_stream_endpoint: {str(e)}", exc_info=True)
+        try:
+            await websocket.send_json({"type": "error", "message": f"Error processing audio stream: {str(e)}"})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        if partial_task is not None and not partial_task.done():
+            partial_task.cancel()
+        logger.info("Sesión de streaming cerrada")
+
+@app.post("/jobs")
+async def submit_job_endpoint(
+    file: UploadFile = File(...),
+    language: str | None = Form(default=None),
+    latency_budget_ms: float | None = Form(default=None),
+    profile: str | None = Form(default=None)
+) -> JSONResponse:
+    """
+    Endpoint para enviar un trabajo de transcripción asíncrono.
+
+    Devuelve inmediatamente el identificador del trabajo; el estado y el resultado (el mismo que el de
+    /transcribe) se consultan con GET /jobs/{job_id} y el trabajo se puede cancelar con DELETE /jobs/{job_id}.
+
+    Args:
+        file (UploadFile): Archivo de audio recibido vía formulario multipart.
+        language (str, opcional): Código ISO del idioma; None para autodetección.
+        latency_budget_ms (float, opcional): Latencia máxima aceptable (ASR.ADAPTIVE).
+        profile (str, opcional): Perfil de decodificación (ASR.DECODING_PROFILES); None para el perfil por defecto.
+
+    Returns:
+        JSONResponse: 202 con el trabajo creado, 400 si el audio está vacío o el perfil no existe, o 503 si la cola está llena.
+    """
+    try:
+        audio_bytes = await file.read()
+        if not audio_bytes:
+            logger.warning("Archivo de audio vacío o no recibido")
+            return JSONResponse(
+                status_code=400,
+                content={"status": "validation_error", "message": "Audio file is empty or missing", "job": None}
+            )
+        try:
+            profile_name, decode_options = decoding_profiles.resolve(profile)
+        except ValueError as e:
+            logger.warning(f"Perfil de decodificación no válido: {profile}")
+            return JSONResponse(
+                status_code=400,
+                content={"status": "validation_error", "message": str(e), "job": None}
+            )
+        job = job_manager.submit(
+            audio_bytes,
+            language=language,
+            latency_budget_ms=latency_budget_ms,
+            profile_name=profile_name,
+            decode_options=decode_options
+        )
+        return JSONResponse(
+            status_code=202,
+            content={"status": "accepted", "job_id": job.id, "job": job.snapshot()}
+        )
+    except PoolSaturatedError as e:
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": str(e.retry_after)},
+            content={"status": "overloaded", "message": str(e), "retry_after": e.retry_after, "job": None}
+        )
+    except Exception as e:
+        logger.error(f"Error en submit_job_endpoint: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={"status": "processing_error", "message": f"Error submitting job: {str(e)}", "job": None}
+        )
+
+@app.get("/jobs/{job_id}")
+async def job_status_endpoint(job_id: str, wait: float = 0, since: int = -1) -> JSONResponse:
+    """
+    Endpoint para consultar el estado de un trabajo, con long-polling opcional.
+
+    Con wait > 0 la respuesta se retiene hasta que el trabajo cambia respecto a la versión `since`
+    (nuevo segmento transcrito o cambio de estado), termina o se agota la espera.
+
+    Args:
+        job_id (str): Identificador del trabajo.
+        wait (float): Segundos máximos de espera (long-polling); 0 responde inmediatamente.
+        since (int): Última versión del trabajo vista por el cliente.
+
+    Returns:
+        JSONResponse: Estado del trabajo (state, progress, text, segments...) o 404 si no existe.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"status": "not_found", "message": f"Job '{job_id}' not found", "job": None}
+        )
+    await job.wait_for_change(since, min(max(wait, 0), long_poll_max_seconds))
+    return JSONResponse(
+        status_code=200,
+        content={"status": "success", "job": job.snapshot()}
+    )
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job_endpoint(job_id: str) -> JSONResponse:
+    """
+    Endpoint para cancelar un trabajo en cola o en curso.
+
+    Args:
+        job_id (str): Identificador del trabajo.
+
+    Returns:
+        JSONResponse: Estado del trabajo tras solicitar la cancelación o 404 si no existe.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"status": "not_found", "message": f"Job '{job_id}' not found", "job": None}
+        )
+    return JSONResponse(
+        status_code=200,
+        content={"status": "success", "job": job.snapshot()}
+    )
+
 @app.get("/languages")
 def languages_options() -> JSONResponse:
     """
@@ -144,4 +847,31 @@ def languages_options() -> JSONResponse:
         return JSONResponse(
             status_code=500,
             content={"status": "error", "message": f"Error retrieving languages: {str(e)}", "languages": []}
-        )
\ No newline at end of file
+        )
+
+@app.get("/metrics")
+def metrics() -> JSONResponse:
+    """
+    Endpoint de métricas del servicio ASR (pool de inferencia, réplicas del modelo, selección de modelo y caché).
+
+    Returns:
+        JSONResponse: Respuesta con las métricas actuales.
+    """
+    try:
+        return JSONResponse(
+            status_code=200,
+            content={"status": "success", "metrics": {
+                "inference_pool": inference_pool.metrics(),
+                "model_pool": asr_service.metrics() if isinstance(asr_service, ModelPool) else None,
+                "model_router": adaptive_transcriber.metrics() if adaptive_transcriber is not None else None,
+                "jobs": job_manager.metrics(),
+                "glossary": procedure_glossary.metrics() if procedure_glossary is not None else None,
+                "transcription_cache": transcription_cache.metrics() if transcription_cache is not None else None
+            }}
+        )
+    except Exception as e:
+        logger.error(f"Error en metrics: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={"status": "error", "message": f"Error retrieving metrics: {str(e)}", "metrics": None}
+        )
@@ -0,0 +1,239 @@
+import io
+import wave
+import threading
+import av
+import numpy as np
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Frecuencia de muestreo que espera Whisper
+SAMPLE_RATE = 16000
+
+
+def antialias_kernel(orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Filtro anti-aliasing (sinc enventanado, 101 coeficientes) con corte en la frecuencia de Nyquist de destino.
+    """
+    cutoff = target_sr / orig_sr
+    taps = np.arange(-50, 51, dtype=np.float32)
+    kernel = cutoff * np.sinc(cutoff * taps) * np.hamming(taps.size).astype(np.float32)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+class StreamingResampler:
+    """
+    Remuestreador para audio que llega por tramas (WebSocket).
+
+    Remuestrear cada trama por separado introduce artefactos en cada frontera (el filtro ve ceros fuera
+    de la trama y la interpolación se reinicia). Aquí el filtro paso bajo conserva entre llamadas las
+    últimas muestras de entrada y la interpolación lineal conserva su posición fraccionaria, de modo que
+    el resultado es el mismo que remuestrear el flujo contiguo (con un retardo fijo de 50 muestras de
+    entrada introducido por el filtro).
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int = SAMPLE_RATE) -> None:
+        """
+        Inicializa el remuestreador.
+
+        Args:
+            orig_sr (int): Frecuencia de muestreo de las tramas de entrada.
+            target_sr (int): Frecuencia de muestreo de salida.
+
+        Returns:
+            None
+        """
+        self.orig_sr = int(orig_sr)
+        self.target_sr = int(target_sr)
+        self._step = self.orig_sr / self.target_sr
+        self._kernel = antialias_kernel(self.orig_sr, self.target_sr) if self.orig_sr > self.target_sr else None
+        # Últimas muestras de entrada necesarias para filtrar la siguiente trama
+        self._history = np.zeros(self._kernel.size - 1 if self._kernel is not None else 0, dtype=np.float32)
+        # Muestras filtradas pendientes de interpolar y su índice absoluto en el flujo
+        self._pending = np.zeros(0, dtype=np.float64)
+        self._pending_start = 0
+        # Posición absoluta (en muestras de entrada) de la siguiente muestra de salida
+        self._next_position = 0.0
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Remuestrea una trama continuando el estado de las anteriores.
+
+        Args:
+            frame (np.ndarray): Trama mono float32 a la frecuencia de entrada.
+
+        Returns:
+            np.ndarray: Muestras de salida disponibles (float32).
+        """
+        if self.orig_sr == self.target_sr or frame.size == 0:
+            return np.ascontiguousarray(frame, dtype=np.float32)
+        if self._kernel is not None:
+            extended = np.concatenate([self._history, frame.astype(np.float32)])
+            filtered = np.convolve(extended, self._kernel, mode="valid")
+            self._history = extended[-(self._kernel.size - 1):]
+        else:
+            filtered = frame
+        self._pending = np.concatenate([self._pending, filtered.astype(np.float64)])
+        # Solo se interpolan posiciones con la muestra siguiente ya disponible
+        last_position = self._pending_start + self._pending.size - 1
+        n_out = int(np.floor((last_position - self._next_position) / self._step)) + 1 if last_position >= self._next_position else 0
+        if n_out <= 0:
+            return np.zeros(0, dtype=np.float32)
+        positions = self._next_position + np.arange(n_out, dtype=np.float64) * self._step
+        local = np.arange(self._pending_start, self._pending_start + self._pending.size, dtype=np.float64)
+        resampled = np.interp(positions, local, self._pending)
+        self._next_position = positions[-1] + self._step
+        # Descarta las muestras que ya no intervienen en la interpolación
+        keep_from = min(max(0, int(np.floor(self._next_position)) - self._pending_start), self._pending.size)
+        self._pending = self._pending[keep_from:]
+        self._pending_start += keep_from
+        return resampled.astype(np.float32)
+
+
+class AudioDecoder:
+    """
+    Decodificador de audio en memoria para Whisper.
+
+    Convierte los bytes recibidos en un buffer NumPy float32 mono a 16 kHz sin pasar por disco:
+    los WAV PCM se decodifican directamente en Python y el resto de formatos (m4a, mp3, ogg...) se
+    decodifican en el propio proceso con libav (PyAV) sobre un buffer en memoria.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, max_concurrent_decodes: int = 4) -> None:
+        """
+        Inicializa el decodificador.
+
+        Args:
+            sample_rate (int): Frecuencia de muestreo de salida (16 kHz para Whisper).
+            max_concurrent_decodes (int): Nº máximo de decodificaciones con libav simultáneas.
+
+        Returns:
+            None
+        """
+        self.sample_rate = sample_rate
+        # Limita las decodificaciones concurrentes para no saturar la CPU bajo carga
+        self._decode_slots = threading.BoundedSemaphore(max(1, int(max_concurrent_decodes)))
+
+    def decode(self, audio_bytes: bytes) -> np.ndarray:
+        """
+        Decodifica los bytes de audio a un array float32 mono a la frecuencia configurada.
+
+        Args:
+            audio_bytes (bytes): Contenido del archivo de audio (WAV, m4a, mp3...).
+
+        Returns:
+            np.ndarray: Señal de audio normalizada en [-1, 1].
+
+        Raises:
+            ValueError: Si el audio está vacío.
+            RuntimeError: Si no se puede decodificar el audio.
+        """
+        if not audio_bytes:
+            raise ValueError("El audio recibido para decodificar está vacío.")
+        # Camino rápido: WAV PCM sin subprocesos
+        if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+            audio = self._decode_wav(audio_bytes)
+            if audio is not None:
+                logger.debug(f"[AudioDecoder] WAV decodificado en memoria: {audio.shape[0] / self.sample_rate:.2f} s")
+                return audio
+        # Formatos comprimidos: libav en memoria
+        audio = self._decode_av(audio_bytes)
+        logger.debug(f"[AudioDecoder] Audio decodificado con libav: {audio.shape[0] / self.sample_rate:.2f} s")
+        return audio
+
+    def _decode_wav(self, audio_bytes: bytes) -> np.ndarray | None:
+        """
+        Decodifica un WAV PCM entero (8/16/24/32 bits) con la librería estándar.
+
+        Args:
+            audio_bytes (bytes): Contenido del archivo WAV.
+
+        Returns:
+            np.ndarray | None: Audio decodificado o None si el WAV no es PCM entero (se delega en libav).
+        """
+        try:
+            with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+                n_channels = wav.getnchannels()
+                sample_width = wav.getsampwidth()
+                frame_rate = wav.getframerate()
+                frames = wav.readframes(wav.getnframes())
+        except (wave.Error, EOFError) as e:
+            logger.debug(f"[AudioDecoder] WAV no soportado en el camino rápido ({e}), se usa libav.")
+            return None
+
+        if sample_width == 1:
+            # PCM de 8 bits es sin signo
+            audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif sample_width == 2:
+            audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+        elif sample_width == 3:
+            raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+            ints = raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16)
+            ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+            audio = ints.astype(np.float32) / 8388608.0
+        elif sample_width == 4:
+            audio = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+        else:
+            return None
+
+        # Mezcla a mono
+        if n_channels > 1:
+            audio = audio[: len(audio) - len(audio) % n_channels].reshape(-1, n_channels).mean(axis=1)
+        return self.resample(audio, frame_rate)
+
+    def resample(self, audio: np.ndarray, orig_sr: int) -> np.ndarray:
+        """
+        Remuestrea la señal a la frecuencia de salida (filtro paso bajo + interpolación lineal).
+
+        Args:
+            audio (np.ndarray): Señal mono float32.
+            orig_sr (int): Frecuencia de muestreo original.
+
+        Returns:
+            np.ndarray: Señal remuestreada en float32.
+        """
+        if orig_sr == self.sample_rate or audio.size == 0:
+            return np.ascontiguousarray(audio, dtype=np.float32)
+        if orig_sr > self.sample_rate:
+            audio = np.convolve(audio, antialias_kernel(orig_sr, self.sample_rate), mode="same")
+        n_out = int(round(audio.size * self.sample_rate / orig_sr))
+        positions = np.arange(n_out, dtype=np.float64) * (orig_sr / self.sample_rate)
+        resampled = np.interp(positions, np.arange(audio.size, dtype=np.float64), audio)
+        return resampled.astype(np.float32)
+
+    def _decode_av(self, audio_bytes: bytes) -> np.ndarray:
+        """
+        Decodifica el audio con libav (PyAV) leyendo directamente de un buffer en memoria.
+
+        El BytesIO es navegable, así que los contenedores que necesitan saltar a otra posición (m4a con el
+        átomo 'moov' al final, el formato que graba Streamlit) se leen sin escribir nada en disco ni lanzar
+        un proceso por petición. libav remuestrea a mono float32 a la frecuencia configurada.
+
+        Args:
+            audio_bytes (bytes): Contenido del archivo de audio.
+
+        Returns:
+            np.ndarray: Audio decodificado.
+
+        Raises:
+            RuntimeError: Si el audio no contiene una pista de audio o no se puede decodificar.
+        """
+        with self._decode_slots:
+            try:
+                with av.open(io.BytesIO(audio_bytes), mode="r") as container:
+                    stream = next((s for s in container.streams if s.type == "audio"), None)
+                    if stream is None:
+                        raise RuntimeError("el archivo no contiene ninguna pista de audio")
+                    resampler = av.AudioResampler(format="flt", layout="mono", rate=self.sample_rate)
+                    chunks = []
+                    for frame in container.decode(stream):
+                        chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(frame))
+                    # Vacía las muestras pendientes del remuestreador
+                    chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(None))
+            except av.FFmpegError as e:
+                raise RuntimeError(f"Error de libav al decodificar el audio: {e}")
+        if not chunks:
+            raise RuntimeError("Error de libav al decodificar el audio: no se obtuvieron muestras")
+        return np.ascontiguousarray(np.concatenate(chunks), dtype=np.float32)
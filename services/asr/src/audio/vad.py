@@ -0,0 +1,152 @@
+import numpy as np
+
+from src.audio.decoder import SAMPLE_RATE
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class EnergyVAD:
+    """
+    Detector de actividad de voz (VAD) basado en energía.
+
+    Clasifica tramas cortas como voz o no voz comparando su energía con un umbral adaptativo al
+    ruido de fondo del clip. Permite recortar el silencio inicial y final, eliminar pausas largas y
+    partir grabaciones largas por las pausas en segmentos que caben en la ventana de Whisper.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        threshold_db: float = -45.0,
+        noise_margin_db: float = 10.0,
+        min_speech_ms: int = 150,
+        min_silence_ms: int = 500,
+        padding_ms: int = 200,
+        max_segment_seconds: float = 30.0
+    ) -> None:
+        """
+        Inicializa el detector.
+
+        Args:
+            frame_ms (int): Duración de cada trama de análisis.
+            threshold_db (float): Umbral absoluto mínimo (dBFS) para considerar voz.
+            noise_margin_db (float): Margen sobre el ruido de fondo estimado para considerar voz.
+            min_speech_ms (int): Duración mínima de un tramo de voz (los más cortos se descartan como ruido).
+            min_silence_ms (int): Pausa mínima que separa dos tramos de voz (las más cortas se unen).
+            padding_ms (int): Margen que se conserva antes y después de cada tramo de voz.
+            max_segment_seconds (float): Duración máxima de cada segmento devuelto por split().
+
+        Returns:
+            None
+        """
+        self.frame_samples = int(SAMPLE_RATE * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+        self.padding_samples = int(SAMPLE_RATE * padding_ms / 1000)
+        self.max_segment_samples = int(SAMPLE_RATE * max_segment_seconds)
+
+    def detect(self, audio: np.ndarray) -> list[tuple[int, int]]:
+        """
+        Detecta los tramos de voz del audio.
+
+        Args:
+            audio (np.ndarray): Señal float32 mono a 16 kHz.
+
+        Returns:
+            list[tuple[int, int]]: Tramos de voz (muestra inicial, muestra final), con margen incluido.
+        """
+        n_frames = audio.shape[0] // self.frame_samples
+        if n_frames == 0:
+            return []
+        frames = audio[: n_frames * self.frame_samples].reshape(n_frames, self.frame_samples)
+        energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+        # Umbral adaptativo: por encima del ruido de fondo, sin cortar la voz si todo el clip es voz
+        noise_floor = np.percentile(energy_db, 10)
+        threshold = max(self.threshold_db, min(noise_floor + self.noise_margin_db, energy_db.max() - 15))
+        is_speech = energy_db >= threshold
+
+        # Tramos consecutivos de voz (en tramas)
+        edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+        # Une los tramos separados por pausas cortas y descarta los demasiado cortos
+        regions: list[list[int]] = []
+        for start, end in zip(starts, ends):
+            if regions and start - regions[-1][1] < self.min_silence_frames:
+                regions[-1][1] = end
+            else:
+                regions.append([start, end])
+        regions = [r for r in regions if r[1] - r[0] >= self.min_speech_frames]
+
+        return [
+            (max(0, int(start) * self.frame_samples - self.padding_samples),
+             min(audio.shape[0], int(end) * self.frame_samples + self.padding_samples))
+            for start, end in regions
+        ]
+
+    def spans(self, audio: np.ndarray) -> list[tuple[int, int]]:
+        """
+        Parte el audio por las pausas en tramos contiguos del audio original de duración acotada.
+
+        A diferencia de split(), no elimina las pausas interiores: cada tramo empieza en el inicio de un
+        tramo de voz y termina al final de otro, de modo que los tiempos que se obtengan dentro de él
+        se trasladan al audio original sumando su inicio. Se usa para transcribir grabaciones largas en
+        paralelo conservando las marcas de tiempo.
+
+        Args:
+            audio (np.ndarray): Señal float32 mono a 16 kHz.
+
+        Returns:
+            list[tuple[int, int]]: Tramos (muestra inicial, muestra final) de hasta max_segment_seconds.
+        """
+        spans: list[list[int]] = []
+        for start, end in self.detect(audio):
+            # Tramo de voz más largo que el máximo: se trocea
+            for cut in range(start, end, self.max_segment_samples):
+                piece_end = min(end, cut + self.max_segment_samples)
+                if spans and piece_end - spans[-1][0] <= self.max_segment_samples:
+                    spans[-1][1] = piece_end
+                else:
+                    spans.append([cut, piece_end])
+        return [(start, end) for start, end in spans]
+
+    def split(self, audio: np.ndarray) -> list[np.ndarray]:
+        """
+        Recorta el silencio y parte el audio por las pausas en segmentos de voz de duración acotada.
+
+        Los tramos de voz consecutivos se agrupan (con las pausas reducidas al margen) hasta
+        max_segment_seconds; un tramo más largo que el máximo se corta en trozos de esa duración.
+
+        Args:
+            audio (np.ndarray): Señal float32 mono a 16 kHz.
+
+        Returns:
+            list[np.ndarray]: Segmentos con voz (lista vacía si no se detecta voz).
+        """
+        regions = self.detect(audio)
+        segments: list[np.ndarray] = []
+        current: list[np.ndarray] = []
+        current_len = 0
+        for start, end in regions:
+            # Tramo más largo que el máximo: se trocea
+            for cut in range(start, end, self.max_segment_samples):
+                piece = audio[cut: min(end, cut + self.max_segment_samples)]
+                if current and current_len + piece.shape[0] > self.max_segment_samples:
+                    segments.append(np.concatenate(current))
+                    current, current_len = [], 0
+                current.append(piece)
+                current_len += piece.shape[0]
+        if current:
+            segments.append(np.concatenate(current))
+
+        kept = sum(s.shape[0] for s in segments)
+        logger.debug(
+            f"[EnergyVAD] {len(regions)} tramo(s) de voz, {len(segments)} segmento(s); "
+            f"{kept / SAMPLE_RATE:.2f} s de {audio.shape[0] / SAMPLE_RATE:.2f} s conservados"
+        )
+        return segments
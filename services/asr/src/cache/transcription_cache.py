@@ -0,0 +1,193 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionCache:
+    """
+    Caché de transcripciones direccionada por contenido.
+
+    La clave es un hash SHA-256 de los bytes del audio junto con el idioma y el modelo, de modo que
+    el mismo audio reenviado (reruns de Streamlit, reintentos, clips de prueba) no se vuelve a
+    decodificar. Tiene un nivel en memoria con expulsión LRU y un nivel opcional en disco que
+    sobrevive a reinicios del servicio.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None, disk_max_entries: int = 10000) -> None:
+        """
+        Inicializa la caché.
+
+        Args:
+            max_entries (int): Nº máximo de entradas en memoria (LRU).
+            disk_dir (str, opcional): Carpeta del nivel en disco. None para desactivarlo.
+            disk_max_entries (int): Nº máximo de entradas en disco (se eliminan las más antiguas).
+
+        Returns:
+            None
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.disk_dir = disk_dir
+        self.disk_max_entries = max(1, int(disk_max_entries))
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._disk_index: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        if self.disk_dir:
+            self._load_disk_index()
+        logger.info(f"[TranscriptionCache] Iniciada (max_entries={self.max_entries}, disk_dir={self.disk_dir})")
+
+    @staticmethod
+    def make_key(audio_bytes: bytes, language: Optional[str], model_name: str, *extra: Any) -> str:
+        """
+        Calcula la clave de caché de una petición.
+
+        Args:
+            audio_bytes (bytes): Contenido del audio.
+            language (str, opcional): Código ISO del idioma (None para autodetección).
+            model_name (str): Nombre del modelo de transcripción.
+            *extra: Otros parámetros que afectan al resultado.
+
+        Returns:
+            str: Clave hexadecimal.
+        """
+        digest = hashlib.sha256(audio_bytes)
+        digest.update(f"|{language or 'auto'}|{model_name}".encode())
+        for value in extra:
+            digest.update(f"|{value}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Busca una transcripción en memoria y, si no está, en disco (promocionándola a memoria).
+
+        Args:
+            key (str): Clave calculada con make_key().
+
+        Returns:
+            Any | None: Transcripción almacenada o None si no existe.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return self._memory[key]
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._disk_hits += 1
+            self._store_memory(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Guarda una transcripción en memoria y, si está activo, en disco.
+
+        Args:
+            key (str): Clave calculada con make_key().
+            value (Any): Transcripción (serializable a JSON).
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._store_memory(key, value)
+        if self.disk_dir:
+            self._write_disk(key, value)
+
+    def _store_memory(self, key: str, value: Any) -> None:
+        """
+        Inserta en el nivel de memoria expulsando la entrada menos usada si se supera el tamaño.
+        """
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        """
+        Ruta del fichero de una clave en el nivel de disco.
+        """
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _load_disk_index(self) -> None:
+        """
+        Carga el índice de entradas en disco ordenado por antigüedad.
+        """
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            entries = [e for e in os.scandir(self.disk_dir) if e.name.endswith(".json")]
+            for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+                self._disk_index[entry.name[:-len(".json")]] = None
+            logger.info(f"[TranscriptionCache] {len(self._disk_index)} entrada(s) en disco cargadas desde {self.disk_dir}")
+        except Exception as e:
+            logger.error(f"[TranscriptionCache] Error al cargar la caché en disco; se desactiva: {e}", exc_info=True)
+            self.disk_dir = None
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        """
+        Lee una entrada del nivel de disco.
+        """
+        if not self.disk_dir or key not in self._disk_index:
+            return None
+        try:
+            with open(self._disk_path(key), "r") as f:
+                return json.load(f)["value"]
+        except Exception as e:
+            logger.warning(f"[TranscriptionCache] No se pudo leer la entrada {key[:12]} de disco: {e}")
+            with self._lock:
+                self._disk_index.pop(key, None)
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        """
+        Escribe una entrada en disco de forma atómica y aplica el límite de tamaño.
+        """
+        try:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_index[key] = None
+                self._disk_index.move_to_end(key)
+                evicted = []
+                while len(self._disk_index) > self.disk_max_entries:
+                    evicted.append(self._disk_index.popitem(last=False)[0])
+            for old_key in evicted:
+                try:
+                    os.remove(self._disk_path(old_key))
+                except FileNotFoundError:
+                    pass
+        except Exception as e:
+            logger.warning(f"[TranscriptionCache] No se pudo escribir la entrada {key[:12]} en disco: {e}")
+
+    def metrics(self) -> dict:
+        """
+        Devuelve los contadores de la caché.
+
+        Returns:
+            dict: Aciertos (totales y de disco), fallos, tasa de acierto y nº de entradas por nivel.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index),
+            }
@@ -0,0 +1,138 @@
+import time
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+from typing import Optional, Dict, Any
+
+import chromadb
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class ProcedureGlossary:
+    """
+    Glosario del dominio para el prompt inicial de Whisper.
+
+    Reúne términos fijos de aviación (ADIRS, APU, V1...) y los nombres de procedimiento almacenados en la
+    colección de ChromaDB (metadato "procedure" que escribe Chunker.chunk_pymupdf durante la ingesta) y
+    los convierte en un texto que se pasa como initial_prompt. Condicionar el decoder con estos términos
+    evita decodificaciones de baja confianza y, con ello, las re-decodificaciones por fallback de temperatura.
+
+    La lista de procedimientos se refresca periódicamente en un hilo en segundo plano; si ChromaDB no está
+    disponible se conserva el último glosario obtenido (o solo los términos fijos).
+    """
+
+    def __init__(
+        self,
+        chroma_url: str,
+        collection_name: str,
+        terms: Optional[list[str]] = None,
+        refresh_seconds: float = 300,
+        max_prompt_chars: int = 600
+    ) -> None:
+        """
+        Inicializa el glosario y arranca el hilo de refresco.
+
+        Args:
+            chroma_url (str): URL HTTP de ChromaDB (p. ej. http://chromadb:8000).
+            collection_name (str): Colección con los chunks de procedimientos.
+            terms (list[str], opcional): Términos fijos del dominio que se incluyen siempre al principio.
+            refresh_seconds (float): Intervalo de refresco de los nombres de procedimiento.
+            max_prompt_chars (int): Longitud máxima del prompt (Whisper admite ~224 tokens de prompt).
+
+        Returns:
+            None
+        """
+        parsed = urlparse(chroma_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 8000
+        self.collection_name = collection_name
+        self.terms = list(terms or [])
+        self.refresh_seconds = refresh_seconds
+        self.max_prompt_chars = max_prompt_chars
+        self._prompt = self._build_prompt([])
+        self._procedures: list[str] = []
+        self._last_refresh: Optional[float] = None
+        self._refresh_errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="asr-glossary-refresh", daemon=True)
+        self._thread.start()
+        logger.info(f"[ProcedureGlossary] Iniciado (colección='{collection_name}', refresco cada {refresh_seconds} s)")
+
+    @property
+    def prompt(self) -> str:
+        """
+        Devuelve el prompt inicial vigente ("" si no hay términos).
+        """
+        return self._prompt
+
+    def refresh(self) -> None:
+        """
+        Lee los nombres de procedimiento de ChromaDB y reconstruye el prompt.
+
+        Los procedimientos se ordenan por nº de chunks (los más extensos primero) para que, si el prompt
+        se trunca, se conserven los más relevantes.
+
+        Raises:
+            Exception: Si falla la conexión o la lectura de la colección.
+        """
+        client = chromadb.HttpClient(host=self.host, port=self.port)
+        collection = client.get_collection(self.collection_name)
+        metadatas = collection.get(include=["metadatas"]).get("metadatas") or []
+        counts = Counter(
+            meta["procedure"].strip() for meta in metadatas
+            if isinstance(meta, dict) and isinstance(meta.get("procedure"), str) and meta["procedure"].strip()
+        )
+        self._procedures = [name for name, _ in counts.most_common()]
+        self._prompt = self._build_prompt(self._procedures)
+        self._last_refresh = time.time()
+        logger.info(f"[ProcedureGlossary] Glosario actualizado: {len(self._procedures)} procedimiento(s), {len(self._prompt)} caracteres")
+        logger.debug(f"[ProcedureGlossary] Prompt: {self._prompt}")
+
+    def _build_prompt(self, procedures: list[str]) -> str:
+        """
+        Une los términos fijos y los procedimientos en un prompt de longitud acotada.
+        """
+        items: list[str] = []
+        length = 0
+        for item in dict.fromkeys(self.terms + procedures):
+            if length + len(item) + 2 > self.max_prompt_chars:
+                break
+            items.append(item)
+            length += len(item) + 2
+        return f"{', '.join(items)}." if items else ""
+
+    def _loop(self) -> None:
+        """
+        Bucle del hilo de refresco.
+        """
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self._refresh_errors += 1
+                logger.warning(f"[ProcedureGlossary] No se pudo refrescar el glosario desde ChromaDB: {e}")
+            self._stop.wait(self.refresh_seconds)
+
+    def stop(self) -> None:
+        """
+        Detiene el hilo de refresco.
+        """
+        self._stop.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado del glosario.
+
+        Returns:
+            Dict[str, Any]: Nº de términos y procedimientos, longitud del prompt, último refresco y errores.
+        """
+        return {
+            "terms": len(self.terms),
+            "procedures": len(self._procedures),
+            "prompt_chars": len(self._prompt),
+            "last_refresh": self._last_refresh,
+            "refresh_errors": self._refresh_errors,
+        }
@@ -0,0 +1,322 @@
+import time
+import uuid
+import asyncio
+import threading
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from src.scheduler.worker_pool import PoolSaturatedError
+from src.transcribers.base import TranscriptionCancelledError
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Estados de un trabajo de transcripción
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class TranscriptionJob:
+    """
+    Trabajo de transcripción asíncrono: estado, progreso y resultado.
+
+    "version" se incrementa con cada cambio (también con cada segmento de voz transcrito) para que los
+    clientes puedan hacer long-polling a partir de la última versión vista (wait_for_change). Todas las
+    modificaciones se hacen desde el event loop.
+    """
+
+    def __init__(self, audio_bytes: bytes, language: Optional[str] = None, options: Optional[dict] = None) -> None:
+        """
+        Crea el trabajo en estado 'queued'.
+
+        Args:
+            audio_bytes (bytes): Audio a transcribir.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            options (dict, opcional): Argumentos adicionales de la función de transcripción (perfil de decodificación...).
+
+        Returns:
+            None
+        """
+        self.id = uuid.uuid4().hex
+        self.audio_bytes: Optional[bytes] = audio_bytes
+        self.language = language
+        self.options = options or {}
+        self.state = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.cached = False
+        self.error: Optional[str] = None
+        self.version = 0
+        self.task: Optional[asyncio.Task] = None
+        # Solicitud de cancelación que la transcripción comprueba entre segmentos de voz
+        self.cancel_event = threading.Event()
+        # Progreso publicado segmento a segmento mientras el trabajo está en curso
+        self.segments_done = 0
+        self.segments_total: Optional[int] = None
+        self.partial_texts: list[str] = []
+        self.partial_segments: list[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Se activa (y se sustituye por uno nuevo) con cada cambio de versión
+        self._changed = asyncio.Event()
+
+    def update(self, **fields) -> None:
+        """
+        Actualiza atributos del trabajo, incrementa su versión y despierta a los clientes en espera.
+        """
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def add_segment(self, partial: Dict[str, Any]) -> None:
+        """
+        Publica un segmento de voz transcrito. Si el índice vuelve a 0 (repetición con el modelo preciso) el
+        progreso se reinicia; los segmentos que llegan con el trabajo ya terminado (cancelado) se descartan.
+
+        Args:
+            partial (Dict[str, Any]): {"text", "segments", "index", "total"} del segmento de voz.
+        """
+        if self.state != RUNNING:
+            return
+        restart = partial["index"] == 0
+        self.update(
+            segments_done=partial["index"] + 1,
+            segments_total=partial["total"],
+            partial_texts=([] if restart else self.partial_texts) + [partial["text"].strip()],
+            partial_segments=([] if restart else self.partial_segments) + list(partial["segments"])
+        )
+
+    async def wait_for_change(self, since: int, timeout: float) -> None:
+        """
+        Espera hasta que la versión del trabajo supere `since`, el trabajo termine o pase el timeout.
+
+        Args:
+            since (int): Última versión vista por el cliente.
+            timeout (float): Segundos máximos de espera.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.version <= since and self.state not in FINISHED_STATES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Devuelve una vista serializable del trabajo.
+
+        Returns:
+            Dict[str, Any]: Estado, tiempos, progreso (segmentos de voz transcritos / totales), texto y segmentos
+            (parciales mientras el trabajo está en curso) y, al completarse, confianza y perfil.
+        """
+        with self._lock:
+            result = self.result or {}
+            if self.state == COMPLETED:
+                text, segments = result.get("transcription", ""), result.get("segments", [])
+            else:
+                text, segments = " ".join(text for text in self.partial_texts if text), self.partial_segments
+            return {
+                "id": self.id,
+                "state": self.state,
+                "version": self.version,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "language": self.language,
+                "progress": {"segments_done": self.segments_done, "segments_total": self.segments_total},
+                "text": text,
+                "segments": list(segments),
+                "confidence": result.get("confidence"),
+                "profile": result.get("profile"),
+                "fallback_passes": result.get("fallback_passes"),
+                "cached": self.cached,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Gestor de trabajos de transcripción asíncronos (enviar / consultar / cancelar).
+
+    Los trabajos esperan en una cola acotada y se ejecutan como tareas del event loop, con un nº limitado
+    a la vez, sobre la misma función de transcripción que /transcribe (transcribe_payload): caché de
+    transcripciones, perfiles de decodificación, selección adaptativa de modelo, micro-lotes y pool de
+    inferencia con sus límites y métricas. La transcripción avanza segmento de voz a segmento de voz: cada
+    segmento se publica en el trabajo al terminar y cancelar un trabajo en curso detiene la inferencia antes
+    del siguiente segmento (el trabajo conserva su hueco hasta que el hilo de inferencia se libera).
+    """
+
+    def __init__(
+        self,
+        transcribe_fn: Callable[..., Awaitable[tuple[Dict[str, Any], bool]]],
+        max_workers: int = 2,
+        max_queue_size: int = 32,
+        retry_after_seconds: int = 5,
+        retention_seconds: float = 3600
+    ) -> None:
+        """
+        Inicializa el gestor de trabajos.
+
+        Args:
+            transcribe_fn (Callable): Corrutina transcribe_fn(audio_bytes, language, on_segment, cancel_event, **options)
+                -> (resultado, servido desde caché); on_segment se llama desde el hilo de inferencia con cada segmento de voz.
+            max_workers (int): Trabajos ejecutándose a la vez.
+            max_queue_size (int): Trabajos en espera admitidos antes de rechazar nuevos envíos.
+            retry_after_seconds (int): Segundos sugeridos al cliente para reintentar cuando la cola está llena.
+            retention_seconds (float): Tiempo que se conservan los trabajos terminados para su consulta.
+
+        Returns:
+            None
+        """
+        self.transcribe_fn = transcribe_fn
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue_size = max(0, int(max_queue_size))
+        self.retry_after_seconds = retry_after_seconds
+        self.retention_seconds = retention_seconds
+        # Se crea con el primer envío, dentro del event loop de la aplicación
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, TranscriptionJob] = {}
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        logger.info(f"[JobManager] Iniciado (workers={self.max_workers}, cola={self.max_queue_size})")
+
+    def submit(self, audio_bytes: bytes, language: Optional[str] = None, **options) -> TranscriptionJob:
+        """
+        Encola un trabajo de transcripción. Debe llamarse desde el event loop.
+
+        Args:
+            audio_bytes (bytes): Audio a transcribir.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Argumentos adicionales de transcribe_fn (perfil y opciones de decodificación...).
+
+        Returns:
+            TranscriptionJob: Trabajo creado.
+
+        Raises:
+            PoolSaturatedError: Si la cola de trabajos está llena.
+        """
+        with self._lock:
+            self._purge_expired()
+            pending = sum(1 for job in self._jobs.values() if job.state in (QUEUED, RUNNING))
+            if pending >= self.max_workers + self.max_queue_size:
+                self._counters["rejected"] += 1
+                logger.warning(f"[JobManager] Cola de trabajos llena ({pending} pendientes); se rechaza el envío.")
+                raise PoolSaturatedError(self.retry_after_seconds)
+            job = TranscriptionJob(audio_bytes, language=language, options=options)
+            self._jobs[job.id] = job
+            self._counters["submitted"] += 1
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        logger.info(f"[JobManager] Trabajo {job.id} encolado ({len(audio_bytes)} bytes)")
+        return job
+
+    def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        """
+        Devuelve el trabajo con el identificador indicado.
+
+        Args:
+            job_id (str): Identificador del trabajo.
+
+        Returns:
+            TranscriptionJob | None: Trabajo o None si no existe (o ya expiró).
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[TranscriptionJob]:
+        """
+        Cancela un trabajo. Si aún está en cola no llega a ejecutarse; si está en curso la transcripción se
+        detiene al terminar el segmento de voz actual. Debe llamarse desde el event loop.
+
+        Args:
+            job_id (str): Identificador del trabajo.
+
+        Returns:
+            TranscriptionJob | None: Trabajo cancelado o None si no existe.
+        """
+        job = self.get(job_id)
+        if job is None or job.state in FINISHED_STATES:
+            return job
+        job.cancel_event.set()
+        if job.state == QUEUED and job.task is not None:
+            job.task.cancel()
+        self._finish(job, CANCELLED)
+        logger.info(f"[JobManager] Trabajo {job_id} cancelado")
+        return job
+
+    async def _run(self, job: TranscriptionJob) -> None:
+        """
+        Ejecuta un trabajo cuando queda un hueco libre.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._slots:
+                job.update(state=RUNNING, started_at=time.time())
+                result, cached = await self.transcribe_fn(
+                    job.audio_bytes,
+                    job.language,
+                    on_segment=lambda partial: loop.call_soon_threadsafe(job.add_segment, partial),
+                    cancel_event=job.cancel_event,
+                    **job.options
+                )
+            job.update(result=result, cached=cached)
+            self._finish(job, COMPLETED)
+        except (asyncio.CancelledError, TranscriptionCancelledError):
+            # cancel() ya marcó el trabajo como cancelado
+            pass
+        except Exception as e:
+            logger.error(f"[JobManager] Error en el trabajo {job.id}: {e}", exc_info=True)
+            self._finish(job, FAILED, error=str(e))
+
+    def _finish(self, job: TranscriptionJob, state: str, error: Optional[str] = None) -> None:
+        """
+        Marca el trabajo como terminado (una sola vez) y libera el audio.
+        """
+        with self._lock:
+            if job.state in FINISHED_STATES:
+                return
+            self._counters[state] += 1
+        job.update(state=state, finished_at=time.time(), error=error, audio_bytes=None)
+
+    def _purge_expired(self) -> None:
+        """
+        Elimina los trabajos terminados hace más de retention_seconds (llamar con el lock tomado).
+        """
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.state in FINISHED_STATES and job.finished_at and now - job.finished_at > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado de la cola de trabajos.
+
+        Returns:
+            Dict[str, Any]: Trabajos en cola, en curso y contadores acumulados.
+        """
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+            return {
+                "workers": self.max_workers,
+                "queue_capacity": self.max_queue_size,
+                "queued": states.count(QUEUED),
+                "running": states.count(RUNNING),
+                **self._counters,
+            }
@@ -0,0 +1,241 @@
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from src.audio.decoder import SAMPLE_RATE
+from src.transcribers.base import shift_segment
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Duración máxima (segundos) de un clip que cabe en una única ventana de Whisper
+MAX_BATCHABLE_SECONDS = 30
+
+
+class BatchScheduler:
+    """
+    Planificador de micro-lotes para peticiones concurrentes de transcripción.
+
+    Agrupa las peticiones que llegan dentro de una ventana corta de tiempo, rellena sus espectrogramas
+    mel a la ventana de 30 s de Whisper y ejecuta el encoder una única vez por lote. Los segmentos de
+    más de 30 s (VAD desactivado) o las peticiones con opciones de decodificación propias se
+    transcriben de forma individual, y las grabaciones largas (modo de audio largo del transcriptor)
+    se transcriben aparte, por tramos en paralelo y con marcas de tiempo sobre el audio original.
+    """
+
+    def __init__(self, transcriber, max_batch_size: int = 8, max_wait_ms: float = 50, max_concurrent_batches: int = 1) -> None:
+        """
+        Inicializa el planificador y arranca su hilo de trabajo.
+
+        Args:
+            transcriber (BaseTranscriber): Transcriptor con soporte de lotes (supports_batching), p. ej. ASRWhisper.
+            max_batch_size (int): Nº máximo de peticiones por lote.
+            max_wait_ms (float): Tiempo máximo (ms) que espera el primer elemento de un lote a que lleguen más.
+            max_concurrent_batches (int): Lotes que pueden ejecutarse a la vez (nº de réplicas del modelo).
+
+        Returns:
+            None
+        """
+        self.transcriber = transcriber
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._queue: "queue.Queue[tuple[bytes | np.ndarray, Optional[str], Optional[str], Future]]" = queue.Queue()
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        self._decode_pool = ThreadPoolExecutor(max_workers=self.max_batch_size * self.max_concurrent_batches, thread_name_prefix="asr-decode")
+        self._batch_pool = ThreadPoolExecutor(max_workers=self.max_concurrent_batches, thread_name_prefix="asr-batch")
+        self._long_audio_pool = ThreadPoolExecutor(max_workers=self.max_concurrent_batches, thread_name_prefix="asr-batch-long")
+        # Limita los lotes en vuelo: mientras todas las réplicas están ocupadas las peticiones siguen acumulándose en la cola
+        self._batch_slots = threading.BoundedSemaphore(self.max_concurrent_batches)
+        self._thread = threading.Thread(target=self._loop, name="asr-batch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"[BatchScheduler] Iniciado (max_batch_size={self.max_batch_size}, max_wait_ms={max_wait_ms}, max_concurrent_batches={self.max_concurrent_batches})")
+
+    def submit(self, audio_bytes: bytes | np.ndarray, language: Optional[str] = None, initial_prompt: Optional[str] = None) -> Future:
+        """
+        Encola una petición de transcripción.
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en bytes o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            initial_prompt (str, opcional): Prompt inicial del decoder (p. ej. glosario del dominio).
+
+        Returns:
+            Future: Futuro que se resuelve con el resultado detallado (contrato común de BaseTranscriber).
+        """
+        future: Future = Future()
+        self._queue.put((audio_bytes, language, initial_prompt, future))
+        return future
+
+    def transcribe_detailed(self, audio_bytes: bytes | np.ndarray, language: Optional[str] = None, **options) -> dict:
+        """
+        Transcribe de forma bloqueante pasando por el planificador (misma interfaz que BaseTranscriber).
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en bytes o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación; si no son compatibles con el lote (ver is_batchable), la petición no se agrupa.
+
+        Returns:
+            dict: Resultado detallado (text, language, duration, segments).
+        """
+        if not self.is_batchable(options):
+            return self.transcriber.transcribe_detailed(audio_bytes, language=language, **options)
+        return self.submit(audio_bytes, language=language, initial_prompt=options.get("initial_prompt")).result()
+
+    @staticmethod
+    def is_batchable(options: dict) -> bool:
+        """
+        Indica si unas opciones de decodificación equivalen a la decodificación del lote: voraz, una única
+        temperatura 0 (sin fallback) y sin marcas de tiempo por palabra. El resto de opciones (best_of,
+        condition_on_previous_text) no tienen efecto en una única ventana decodificada a temperatura 0. Cualquier
+        otra opción (p. ej. on_segment / cancel_event de los trabajos asíncronos) impide agrupar la petición.
+
+        Args:
+            options (dict): Opciones de decodificación de la petición.
+
+        Returns:
+            bool: True si la petición puede agruparse en un lote.
+        """
+        temperature = options.get("temperature", 0.0)
+        temperatures = temperature if isinstance(temperature, (list, tuple)) else (temperature,)
+        known = {"beam_size", "best_of", "temperature", "condition_on_previous_text", "word_timestamps", "initial_prompt"}
+        return (
+            options.get("beam_size") in (None, 1)
+            and tuple(temperatures) == (0.0,)
+            and not options.get("word_timestamps", False)
+            and set(options) <= known
+        )
+
+    def transcribe(self, audio_bytes: bytes | np.ndarray, language: Optional[str] = None, **options) -> str:
+        """
+        Transcribe de forma bloqueante pasando por el planificador y devuelve solo el texto.
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en bytes o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación; si no son compatibles con el lote, la petición no se agrupa.
+
+        Returns:
+            str: Texto transcrito del audio.
+        """
+        return self.transcribe_detailed(audio_bytes, language=language, **options)["text"]
+
+    def _loop(self) -> None:
+        """
+        Bucle del hilo de trabajo: recoge lotes de la cola y los ejecuta en cuanto hay un hueco libre.
+        """
+        while True:
+            self._batch_slots.acquire()
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._batch_pool.submit(self._run_batch_safe, batch)
+
+    def _run_batch_safe(self, batch: list) -> None:
+        """
+        Ejecuta un lote propagando cualquier error inesperado a sus futuros y libera su hueco al terminar.
+        """
+        try:
+            self._run_batch(batch)
+        except Exception as e:
+            logger.error(f"[BatchScheduler] Error inesperado procesando el lote: {e}", exc_info=True)
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Error en la transcripción por lotes: {e}"))
+        finally:
+            self._batch_slots.release()
+
+    def _run_batch(self, batch: list) -> None:
+        """
+        Decodifica los audios del lote en paralelo, aplica el VAD y transcribe los segmentos agrupados por idioma y prompt.
+
+        Cada petición aporta uno o varios segmentos de voz al lote; el texto de sus segmentos se une al final.
+
+        Args:
+            batch (list): Elementos (audio, idioma, prompt, futuro) recogidos de la cola.
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        decoded = list(self._decode_pool.map(self._safe_decode, [item[0] for item in batch]))
+
+        # Segmentos agrupados por idioma y prompt: (segmento, índice de la petición, desplazamiento en segundos)
+        groups: dict[tuple[Optional[str], Optional[str]], list[tuple[np.ndarray, int, float]]] = {}
+        results: dict[int, dict] = {}
+        for index, ((_, language, prompt, future), audio) in enumerate(zip(batch, decoded)):
+            if isinstance(audio, Exception):
+                future.set_exception(audio)
+                continue
+            if self.transcriber.is_long_audio(audio):
+                # Grabación larga: no ocupa el lote, se transcribe por tramos en paralelo fuera de él
+                self._long_audio_pool.submit(
+                    self._resolve, future, self.transcriber.transcribe_detailed, audio, language=language, initial_prompt=prompt
+                )
+                continue
+            segments = self.transcriber.speech_segments(audio)
+            if any(segment.shape[0] > MAX_BATCHABLE_SECONDS * SAMPLE_RATE for segment in segments):
+                # Segmento largo (sin VAD): Whisper lo recorre por ventanas, se transcribe de forma individual
+                self._resolve(future, self.transcriber.transcribe_detailed, audio, language=language, initial_prompt=prompt)
+                continue
+            results[index] = {"text": "", "language": language, "duration": audio.shape[0] / SAMPLE_RATE, "segments": []}
+            offset = 0.0
+            for segment in segments:
+                groups.setdefault((language, prompt), []).append((segment, index, offset))
+                offset += segment.shape[0] / SAMPLE_RATE
+
+        for (language, prompt), items in groups.items():
+            try:
+                decoded_segments = self.transcriber.transcribe_batch([segment for segment, _, _ in items], language=language, prompt=prompt)
+                for (_, index, offset), seg in zip(items, decoded_segments):
+                    result = results[index]
+                    result["language"] = result["language"] or seg.pop("language", None)
+                    seg.pop("language", None)
+                    shift_segment(seg, offset)
+                    result["segments"].append(seg)
+            except Exception as e:
+                for _, index, _ in items:
+                    future = batch[index][-1]
+                    if not future.done():
+                        future.set_exception(e)
+
+        # Peticiones sin voz (sin segmentos) se resuelven con texto vacío sin pasar por el modelo
+        for index, result in results.items():
+            future = batch[index][-1]
+            if not future.done():
+                result["text"] = " ".join(seg["text"] for seg in result["segments"] if seg["text"])
+                future.set_result(result)
+        logger.debug(f"[BatchScheduler] Lote de {len(batch)} petición(es) procesado en {time.perf_counter() - start:.2f} s")
+
+    def _safe_decode(self, audio_bytes: bytes | np.ndarray) -> np.ndarray | Exception:
+        """
+        Decodifica el audio si aún viene en bytes, capturando la excepción para asignarla solo al futuro afectado.
+        """
+        if isinstance(audio_bytes, np.ndarray):
+            return audio_bytes
+        try:
+            return self.transcriber.decoder.decode(audio_bytes)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def _resolve(future: Future, fn, *args, **kwargs) -> None:
+        """
+        Ejecuta fn y resuelve el futuro con su resultado o su excepción.
+        """
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
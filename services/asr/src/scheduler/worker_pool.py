@@ -0,0 +1,131 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(RuntimeError):
+    """
+    Error lanzado cuando la cola del pool de inferencia está llena y la petición se rechaza.
+    """
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("El servicio ASR está saturado, inténtelo de nuevo más tarde.")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    Pool acotado de hilos para ejecutar la inferencia fuera del event loop de FastAPI.
+
+    Mantiene como máximo `max_workers` tareas en ejecución y `max_queue_size` en espera; si se supera,
+    la petición se rechaza inmediatamente con PoolSaturatedError (en lugar de acumular latencia).
+    Expone métricas de profundidad de cola y tiempo de espera.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue_size: int = 16, retry_after_seconds: int = 5) -> None:
+        """
+        Inicializa el pool de inferencia.
+
+        Args:
+            max_workers (int): Nº de hilos que ejecutan inferencia en paralelo.
+            max_queue_size (int): Nº máximo de peticiones esperando a un hilo libre.
+            retry_after_seconds (int): Segundos sugeridos al cliente para reintentar cuando el pool está lleno.
+
+        Returns:
+            None
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue_size = max(0, int(max_queue_size))
+        self.retry_after_seconds = int(retry_after_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asr-inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+        logger.info(f"[InferencePool] Iniciado con {self.max_workers} hilo(s) y cola máxima de {self.max_queue_size}")
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Ejecuta fn(*args, **kwargs) en el pool y espera su resultado sin bloquear el event loop.
+
+        Args:
+            fn (Callable): Función bloqueante a ejecutar.
+            *args: Argumentos posicionales de fn.
+            **kwargs: Argumentos con nombre de fn.
+
+        Returns:
+            Any: Resultado de fn.
+
+        Raises:
+            PoolSaturatedError: Si la cola está llena.
+            Exception: Cualquier excepción lanzada por fn.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue_size:
+                self._rejected += 1
+                logger.warning(f"[InferencePool] Cola llena ({self._pending} peticiones pendientes); petición rechazada.")
+                raise PoolSaturatedError(self.retry_after_seconds)
+            self._pending += 1
+        enqueued_at = time.perf_counter()
+
+        def task() -> Any:
+            waited = time.perf_counter() - enqueued_at
+            with self._lock:
+                self._running += 1
+                self._wait_total += waited
+                self._wait_last = waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def release(future) -> None:
+            # La plaza se libera cuando termina el hilo, no cuando deja de esperarse: si la petición se
+            # cancela (cliente desconectado, timeout), la inferencia sigue ocupando un hilo hasta acabar.
+            with self._lock:
+                self._pending -= 1
+                if not future.cancelled():
+                    if future.exception() is None:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> dict:
+        """
+        Devuelve las métricas actuales del pool.
+
+        Returns:
+            dict: Hilos, capacidad y profundidad de la cola, tareas en curso/completadas/fallidas/rechazadas
+                y tiempos de espera en cola (ms).
+        """
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            return {
+                "workers": self.max_workers,
+                "queue_capacity": self.max_queue_size,
+                "queue_depth": max(0, self._pending - self._running),
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "wait_ms_avg": round(self._wait_total / started * 1000, 2) if started else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 2),
+                "wait_ms_last": round(self._wait_last * 1000, 2),
+            }
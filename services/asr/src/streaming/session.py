@@ -0,0 +1,206 @@
+import time
+import numpy as np
+from typing import Optional, Dict, Any
+
+from src.audio.decoder import StreamingResampler, SAMPLE_RATE
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class StreamingSession:
+    """
+    Sesión de transcripción en streaming para una conexión WebSocket.
+
+    Acumula las tramas PCM que envía el cliente, detecta el final del habla por energía y
+    transcribe con Whisper una ventana deslizante (hipótesis parciales) y la locución completa
+    al terminar (hipótesis final).
+    """
+
+    def __init__(
+        self,
+        transcriber,
+        language: Optional[str] = None,
+        sample_rate: int = SAMPLE_RATE,
+        window_seconds: float = 10.0,
+        partial_interval_seconds: float = 1.0,
+        end_silence_ms: int = 700,
+        energy_threshold_db: float = -45.0,
+        max_utterance_seconds: float = 30.0,
+        decode_options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Inicializa la sesión de streaming.
+
+        Args:
+            transcriber: Transcriptor con método transcribe(audio, language, **options) (p. ej. ASRWhisper).
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            sample_rate (int): Frecuencia de muestreo de las tramas PCM s16le mono que envía el cliente.
+            window_seconds (float): Duración de la ventana deslizante usada para las hipótesis parciales.
+            partial_interval_seconds (float): Audio nuevo necesario entre dos hipótesis parciales.
+            end_silence_ms (int): Silencio final (ms) que marca el fin del habla.
+            energy_threshold_db (float): Umbral de energía (dBFS) a partir del cual una trama se considera voz.
+            max_utterance_seconds (float): Duración máxima de una locución antes de forzar la hipótesis final.
+            decode_options (dict, opcional): Opciones de decodificación de la hipótesis final (perfil y prompt del
+                glosario, como en /transcribe); las parciales solo reutilizan su initial_prompt.
+
+        Returns:
+            None
+        """
+        self.transcriber = transcriber
+        self.language = language
+        self.input_sample_rate = int(sample_rate)
+        self.window_samples = int(window_seconds * SAMPLE_RATE)
+        self.partial_interval_samples = int(partial_interval_seconds * SAMPLE_RATE)
+        self.end_silence_samples = int(end_silence_ms / 1000 * SAMPLE_RATE)
+        self.energy_threshold_db = energy_threshold_db
+        self.max_utterance_samples = int(max_utterance_seconds * SAMPLE_RATE)
+        self.decode_options = dict(decode_options or {})
+        # Remuestreo continuo entre tramas (sin artefactos en las fronteras)
+        self._resampler = StreamingResampler(self.input_sample_rate, SAMPLE_RATE)
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Reinicia el estado de la locución en curso.
+        """
+        self._chunks: list[np.ndarray] = []
+        self._n_samples = 0
+        self._speech_seen = False
+        self._trailing_silence = 0
+        self._last_partial_at = 0
+        self._forced_end = False
+        self.speech_end_time: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """
+        Duración (segundos) del audio acumulado en la locución en curso.
+        """
+        return self._n_samples / SAMPLE_RATE
+
+    def feed(self, pcm_bytes: bytes) -> None:
+        """
+        Añade una trama PCM s16le mono al buffer y actualiza la detección de fin de habla.
+
+        Args:
+            pcm_bytes (bytes): Trama de audio PCM 16 bits little-endian.
+
+        Returns:
+            None
+        """
+        if not pcm_bytes:
+            return
+        frame = np.frombuffer(pcm_bytes[: len(pcm_bytes) - len(pcm_bytes) % 2], dtype="<i2").astype(np.float32) / 32768.0
+        frame = self._resampler.process(frame)
+        if frame.size == 0:
+            return
+        self._chunks.append(frame)
+        self._n_samples += frame.size
+
+        # Detección de voz por energía de la trama
+        rms = float(np.sqrt(np.mean(frame ** 2)) + 1e-10)
+        if 20 * np.log10(rms) >= self.energy_threshold_db:
+            self._speech_seen = True
+            self._trailing_silence = 0
+            self.speech_end_time = None
+        else:
+            self._trailing_silence += frame.size
+            if self._speech_seen and self.speech_end_time is None:
+                # Momento aproximado en el que el piloto dejó de hablar
+                self.speech_end_time = time.perf_counter()
+
+    def force_end(self) -> None:
+        """
+        Marca la locución como terminada (el cliente indica fin de audio).
+        """
+        self._forced_end = True
+        if self.speech_end_time is None:
+            self.speech_end_time = time.perf_counter()
+
+    def end_of_speech(self) -> bool:
+        """
+        Indica si la locución en curso ha terminado y debe emitirse la hipótesis final.
+
+        Returns:
+            bool: True si hay silencio final suficiente tras la voz, se ha forzado el fin o se supera la duración máxima.
+        """
+        if self._n_samples == 0:
+            return False
+        if self._forced_end or self._n_samples >= self.max_utterance_samples:
+            return True
+        return self._speech_seen and self._trailing_silence >= self.end_silence_samples
+
+    def partial_due(self) -> bool:
+        """
+        Indica si hay suficiente audio nuevo con voz para calcular una nueva hipótesis parcial.
+
+        Returns:
+            bool: True si debe calcularse una hipótesis parcial.
+        """
+        return self._speech_seen and self._n_samples - self._last_partial_at >= self.partial_interval_samples
+
+    def _audio(self) -> np.ndarray:
+        """
+        Concatena las tramas acumuladas en un único buffer contiguo.
+        """
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def take_partial_window(self) -> np.ndarray:
+        """
+        Toma la ventana deslizante más reciente para calcular una hipótesis parcial.
+
+        Debe llamarse desde el mismo hilo que feed(); la transcripción puede ejecutarse después en otro hilo.
+
+        Returns:
+            np.ndarray: Últimos segundos de audio de la locución en curso.
+        """
+        self._last_partial_at = self._n_samples
+        return self._audio()[-self.window_samples:]
+
+    def take_utterance(self) -> Optional[np.ndarray]:
+        """
+        Toma el audio de la locución completa y reinicia la sesión para la siguiente.
+
+        Returns:
+            np.ndarray | None: Audio de la locución o None si no se detectó voz.
+        """
+        audio = self._audio()
+        speech_seen = self._speech_seen
+        self._reset()
+        if not speech_seen or audio.size == 0:
+            return None
+        return audio
+
+    def transcribe_partial(self, window: np.ndarray) -> str:
+        """
+        Transcribe una ventana parcial (decodificación voraz, sin reintentos por temperatura; con el prompt
+        inicial del glosario si lo hay).
+
+        Args:
+            window (np.ndarray): Ventana obtenida con take_partial_window().
+
+        Returns:
+            str: Hipótesis parcial.
+        """
+        prompt_options = {"initial_prompt": self.decode_options["initial_prompt"]} if self.decode_options.get("initial_prompt") else {}
+        return self.transcriber.transcribe(
+            window, language=self.language, temperature=0.0, condition_on_previous_text=False, **prompt_options
+        ).strip()
+
+    def transcribe_final(self, audio: Optional[np.ndarray]) -> str:
+        """
+        Transcribe la locución completa con las opciones de decodificación de la sesión.
+
+        Args:
+            audio (np.ndarray | None): Audio obtenido con take_utterance().
+
+        Returns:
+            str: Hipótesis final (vacía si no se detectó voz).
+        """
+        if audio is None:
+            return ""
+        return self.transcriber.transcribe(audio, language=self.language, **self.decode_options).strip()
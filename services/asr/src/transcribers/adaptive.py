@@ -0,0 +1,230 @@
+import time
+import threading
+import numpy as np
+from typing import Optional, Dict, Any
+
+from src.audio.decoder import AudioDecoder, SAMPLE_RATE
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveTranscriber:
+    """
+    Selección adaptativa entre un modelo rápido y uno preciso.
+
+    Los clips cortos (la mayoría: órdenes de pocas palabras) se transcriben con el modelo rápido y los
+    largos con el preciso. Un presupuesto de latencia por petición puede forzar el modelo rápido cuando
+    el preciso no llegaría a tiempo. Si la confianza del modelo rápido es baja (avg_logprob bajo o
+    no_speech_prob alto en algún segmento) se repite la transcripción con el modelo preciso, siempre que
+    quede presupuesto para ello.
+
+    La latencia esperada de cada modelo se estima con su factor de tiempo real (RTF), que se actualiza
+    con una media móvil exponencial a partir de las transcripciones reales.
+    """
+
+    def __init__(
+        self,
+        fast,
+        accurate,
+        fast_model_name: str,
+        accurate_model_name: str,
+        decoder: AudioDecoder,
+        short_audio_seconds: float = 8.0,
+        min_avg_logprob: float = -0.8,
+        max_no_speech_prob: float = 0.6,
+        fast_rtf: float = 0.05,
+        accurate_rtf: float = 0.3,
+        rtf_smoothing: float = 0.2
+    ) -> None:
+        """
+        Inicializa el selector con los dos transcriptores.
+
+        Args:
+            fast: Transcriptor del modelo rápido (BaseTranscriber, ModelPool o BatchScheduler).
+            accurate: Transcriptor del modelo preciso (misma interfaz).
+            fast_model_name (str): Nombre del modelo rápido (métricas y logs).
+            accurate_model_name (str): Nombre del modelo preciso (métricas y logs).
+            decoder (AudioDecoder): Decodificador compartido; el audio se decodifica una sola vez para ambos modelos.
+            short_audio_seconds (float): Duración máxima (s) de un clip que se envía al modelo rápido.
+            min_avg_logprob (float): avg_logprob mínimo de un segmento para aceptar el resultado del modelo rápido.
+            max_no_speech_prob (float): no_speech_prob máximo de un segmento para aceptar el resultado del modelo rápido.
+            fast_rtf (float): RTF inicial estimado del modelo rápido.
+            accurate_rtf (float): RTF inicial estimado del modelo preciso.
+            rtf_smoothing (float): Peso de cada nueva medida en la media móvil del RTF (0-1).
+
+        Returns:
+            None
+        """
+        self.fast = fast
+        self.accurate = accurate
+        self.model_names = {"fast": fast_model_name, "accurate": accurate_model_name}
+        self.short_audio_seconds = short_audio_seconds
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech_prob = max_no_speech_prob
+        self.rtf_smoothing = rtf_smoothing
+        self.decoder = decoder
+        self._rtf = {"fast": fast_rtf, "accurate": accurate_rtf}
+        self._lock = threading.Lock()
+        self._counters = {"fast": 0, "accurate": 0, "fallbacks": 0, "budget_downgrades": 0, "fallbacks_skipped": 0}
+        logger.info(
+            f"[AdaptiveTranscriber] Rápido='{fast_model_name}', preciso='{accurate_model_name}' "
+            f"(clips <= {short_audio_seconds} s al modelo rápido)"
+        )
+
+    def estimate_ms(self, tier: str, duration: float) -> float:
+        """
+        Estima la latencia (ms) de transcribir un clip con el modelo indicado.
+
+        Args:
+            tier (str): "fast" o "accurate".
+            duration (float): Duración del clip en segundos.
+
+        Returns:
+            float: Latencia estimada en milisegundos.
+        """
+        with self._lock:
+            return duration * self._rtf[tier] * 1000
+
+    def route(self, duration: float, latency_budget_ms: Optional[float] = None) -> str:
+        """
+        Elige el modelo para un clip según su duración y el presupuesto de latencia.
+
+        Args:
+            duration (float): Duración del clip en segundos.
+            latency_budget_ms (float, opcional): Latencia máxima aceptable en ms; None si no hay límite.
+
+        Returns:
+            str: "fast" o "accurate".
+        """
+        if duration <= self.short_audio_seconds:
+            return "fast"
+        if latency_budget_ms is not None and self.estimate_ms("accurate", duration) > latency_budget_ms:
+            with self._lock:
+                self._counters["budget_downgrades"] += 1
+            return "fast"
+        return "accurate"
+
+    def is_confident(self, result: Dict[str, Any]) -> bool:
+        """
+        Indica si el resultado es fiable según avg_logprob y no_speech_prob de sus segmentos.
+
+        Args:
+            result (Dict[str, Any]): Resultado detallado (contrato común de BaseTranscriber).
+
+        Returns:
+            bool: False si algún segmento está por debajo de los umbrales o hay segmentos sin texto.
+        """
+        segments = result.get("segments", [])
+        if segments and not result.get("text", "").strip():
+            return False
+        return all(
+            seg["avg_logprob"] >= self.min_avg_logprob and seg["no_speech_prob"] <= self.max_no_speech_prob
+            for seg in segments
+        )
+
+    def transcribe_detailed(
+        self,
+        audio_bytes: bytes | np.ndarray,
+        language: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None,
+        tier: Optional[str] = None,
+        **options
+    ) -> Dict[str, Any]:
+        """
+        Transcribe el audio con el modelo elegido y, si hace falta, repite con el modelo preciso.
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en bytes o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            latency_budget_ms (float, opcional): Presupuesto de latencia de la petición en ms.
+            tier (str, opcional): Modelo ya elegido con route() ("fast" o "accurate"); None para elegirlo aquí.
+            **options: Opciones de decodificación del backend (y on_segment / cancel_event de BaseTranscriber;
+                si se repite con el modelo preciso, on_segment vuelve a recibir los segmentos desde el índice 0).
+
+        Returns:
+            Dict[str, Any]: Resultado detallado con, además, "model" (modelo que produjo el texto) y "fallback".
+
+        Raises:
+            ValueError: Si el audio está vacío.
+            RuntimeError: Si ocurre un error durante la transcripción.
+        """
+        if audio_bytes is None or len(audio_bytes) == 0:
+            logger.warning("[AdaptiveTranscriber] El audio recibido está vacío.")
+            raise ValueError("El audio recibido para transcripción está vacío.")
+        start = time.perf_counter()
+        audio = audio_bytes if isinstance(audio_bytes, np.ndarray) else self.decoder.decode(audio_bytes)
+        duration = audio.shape[0] / SAMPLE_RATE
+        tier = tier or self.route(duration, latency_budget_ms)
+        result = self._run(tier, audio, duration, language, **options)
+        result["fallback"] = False
+
+        if tier == "fast" and not self.is_confident(result):
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if latency_budget_ms is not None and elapsed_ms + self.estimate_ms("accurate", duration) > latency_budget_ms:
+                logger.info("[AdaptiveTranscriber] Confianza baja del modelo rápido, pero no queda presupuesto para repetir.")
+                with self._lock:
+                    self._counters["fallbacks_skipped"] += 1
+            else:
+                logger.info("[AdaptiveTranscriber] Confianza baja del modelo rápido; se repite con el modelo preciso.")
+                with self._lock:
+                    self._counters["fallbacks"] += 1
+                result = self._run("accurate", audio, duration, language, **options)
+                result["fallback"] = True
+        return result
+
+    def transcribe(
+        self,
+        audio_bytes: bytes | np.ndarray,
+        language: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None,
+        **options
+    ) -> str:
+        """
+        Transcribe el audio con selección adaptativa del modelo y devuelve solo el texto.
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en bytes o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            latency_budget_ms (float, opcional): Presupuesto de latencia de la petición en ms.
+            **options: Opciones de decodificación del backend.
+
+        Returns:
+            str: Texto transcrito del audio.
+        """
+        return self.transcribe_detailed(audio_bytes, language=language, latency_budget_ms=latency_budget_ms, **options)["text"]
+
+    def _run(self, tier: str, audio: np.ndarray, duration: float, language: Optional[str], **options) -> Dict[str, Any]:
+        """
+        Transcribe con el modelo indicado y actualiza su RTF estimado.
+        """
+        transcriber = self.fast if tier == "fast" else self.accurate
+        start = time.perf_counter()
+        result = transcriber.transcribe_detailed(audio, language=language, **options)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._counters[tier] += 1
+            if duration > 0 and result.get("segments"):
+                self._rtf[tier] += self.rtf_smoothing * (elapsed / duration - self._rtf[tier])
+        logger.debug(f"[AdaptiveTranscriber] Modelo {self.model_names[tier]} ({duration:.1f} s de audio) en {elapsed:.2f} s")
+        result["model"] = self.model_names[tier]
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores de enrutado y los RTF estimados de cada modelo.
+
+        Returns:
+            Dict[str, Any]: Peticiones por modelo, repeticiones con el modelo preciso y RTF actuales.
+        """
+        with self._lock:
+            return {
+                "models": dict(self.model_names),
+                "routed_fast": self._counters["fast"],
+                "routed_accurate": self._counters["accurate"] - self._counters["fallbacks"],
+                "fallbacks": self._counters["fallbacks"],
+                "fallbacks_skipped": self._counters["fallbacks_skipped"],
+                "budget_downgrades": self._counters["budget_downgrades"],
+                "rtf": {tier: round(rtf, 4) for tier, rtf in self._rtf.items()},
+            }
@@ -0,0 +1,404 @@
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from whisper.tokenizer import LANGUAGES, TO_LANGUAGE_CODE
+import numpy as np
+from typing import Optional, Dict, Any, Iterator, Callable
+
+from src.audio.decoder import AudioDecoder, SAMPLE_RATE
+from src.audio.vad import EnergyVAD
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionCancelledError(Exception):
+    """
+    La transcripción se detuvo entre dos segmentos porque se solicitó su cancelación.
+    """
+
+
+def shift_segment(segment: Dict[str, Any], offset: float) -> None:
+    """
+    Desplaza (in situ) los tiempos de un segmento y de sus palabras, si las tiene.
+
+    Args:
+        segment (Dict[str, Any]): Segmento con el contrato común.
+        offset (float): Segundos a sumar.
+    """
+    segment["start"] = round(segment["start"] + offset, 2)
+    segment["end"] = round(segment["end"] + offset, 2)
+    for word in segment.get("words", []):
+        word["start"] = round(word["start"] + offset, 2)
+        word["end"] = round(word["end"] + offset, 2)
+
+
+class BaseTranscriber(ABC):
+    """
+    Interfaz común de los transcriptores de audio a texto.
+
+    Centraliza la decodificación en memoria, el VAD y el contrato de salida, de forma que todos los
+    backends (openai-whisper, faster-whisper/CTranslate2...) devuelven la misma estructura:
+
+        {
+            "text": str,
+            "language": str | None,
+            "duration": float,  # segundos de audio recibido
+            "segments": [{"start", "end", "text", "avg_logprob", "no_speech_prob", "compression_ratio", "temperature",
+                          "words" (solo con word_timestamps): [{"word", "start", "end", "probability"}]}]
+        }
+    """
+
+    # Indica si transcribe_batch() ejecuta el lote en un único pase del encoder (si no, transcribe los clips uno a uno)
+    supports_batching: bool = False
+    # Indica si replicate() devuelve réplicas que pueden transcribir en paralelo (condición para usar ModelPool)
+    supports_replicas: bool = False
+    # Ventana de Whisper: duración máxima (s) de cada tramo en el modo de audio largo sin VAD
+    WINDOW_SECONDS = 30
+
+    def __init__(self, model_name: str, decoder: Optional[AudioDecoder] = None, vad: Optional[EnergyVAD] = None) -> None:
+        """
+        Inicializa los componentes comunes del transcriptor.
+
+        Args:
+            model_name (str): Nombre del modelo a cargar.
+            decoder (AudioDecoder, opcional): Decodificador de audio en memoria. Si no se indica, se crea uno por defecto.
+            vad (EnergyVAD, opcional): Detector de voz para recortar silencios antes de decodificar. None para desactivarlo.
+
+        Returns:
+            None
+        """
+        self.model_name = model_name
+        self.decoder = decoder or AudioDecoder()
+        self.vad = vad
+        # Modo de audio largo (ver configure_long_audio): desactivado por defecto
+        self.long_audio_seconds: Optional[float] = None
+        self.max_parallel_segments = 1
+
+    def configure_long_audio(self, min_seconds: Optional[float], max_parallel_segments: int = 1) -> None:
+        """
+        Activa el modo de audio largo: las grabaciones de al menos min_seconds se parten por los silencios en
+        tramos contiguos independientes que se transcriben en paralelo (si el transcriptor lo permite, p. ej.
+        ModelPool) y se unen con marcas de tiempo sobre el audio original.
+
+        Args:
+            min_seconds (float, opcional): Duración mínima del audio para usar el modo; None para desactivarlo.
+            max_parallel_segments (int): Tramos de una misma grabación transcritos a la vez.
+
+        Returns:
+            None
+        """
+        self.long_audio_seconds = min_seconds
+        self.max_parallel_segments = max(1, int(max_parallel_segments))
+
+    @abstractmethod
+    def _transcribe_segment(self, audio: np.ndarray, language: str | None = None, **options) -> Dict[str, Any]:
+        """
+        Transcribe un segmento de audio decodificado con el backend concreto.
+
+        Args:
+            audio (np.ndarray): Segmento float32 mono a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación del backend.
+
+        Returns:
+            Dict[str, Any]: {"text", "language", "segments"} con tiempos relativos al inicio del segmento.
+        """
+
+    def load_audio(self, audio_bytes: bytes | np.ndarray) -> np.ndarray:
+        """
+        Decodifica el audio a float32 mono 16 kHz si aún viene en bytes.
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en bytes o ya decodificado.
+
+        Returns:
+            np.ndarray: Audio decodificado.
+        """
+        return audio_bytes if isinstance(audio_bytes, np.ndarray) else self.decoder.decode(audio_bytes)
+
+    def speech_segments(self, audio: np.ndarray) -> list[np.ndarray]:
+        """
+        Aplica el VAD (si está activo) para quedarse solo con los segmentos con voz.
+
+        Args:
+            audio (np.ndarray): Audio decodificado.
+
+        Returns:
+            list[np.ndarray]: Segmentos con voz; [audio] si no hay VAD y [] si no se detecta voz.
+        """
+        if self.vad is None:
+            return [audio]
+        return self.vad.split(audio)
+
+    def is_long_audio(self, audio: np.ndarray) -> bool:
+        """
+        Indica si el audio se transcribe en modo de audio largo.
+
+        Args:
+            audio (np.ndarray): Audio decodificado.
+
+        Returns:
+            bool: True si el modo está activo y el audio supera su duración mínima.
+        """
+        return self.long_audio_seconds is not None and audio.shape[0] / SAMPLE_RATE >= self.long_audio_seconds
+
+    def speech_spans(self, audio: np.ndarray) -> list[tuple[int, int]]:
+        """
+        Parte el audio en tramos contiguos del audio original (por los silencios si hay VAD).
+
+        Args:
+            audio (np.ndarray): Audio decodificado.
+
+        Returns:
+            list[tuple[int, int]]: Tramos (muestra inicial, muestra final); sin VAD, ventanas consecutivas de 30 s.
+        """
+        if self.vad is not None:
+            return self.vad.spans(audio)
+        window = self.WINDOW_SECONDS * SAMPLE_RATE
+        return [(start, min(audio.shape[0], start + window)) for start in range(0, audio.shape[0], window)]
+
+    def _map_segments(self, fn, items: list) -> Iterator:
+        """
+        Aplica fn a cada elemento en orden. Los transcriptores con varias réplicas lo sobrescriben para
+        procesar los elementos en paralelo (conservando el orden de los resultados).
+        """
+        return map(fn, items)
+
+    def transcribe_detailed(
+        self,
+        audio_bytes: bytes | np.ndarray,
+        language: str | None = None,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        **options
+    ) -> Dict[str, Any]:
+        """
+        Transcribe un audio devolviendo el texto y el detalle por segmento.
+
+        El audio se decodifica en memoria a float32 mono 16 kHz y, si el VAD está activo, se recorta el
+        silencio y se parte por las pausas antes de pasarlo al modelo. Si no se detecta voz no se
+        ejecuta el modelo y se devuelve un texto vacío. Los tiempos de los segmentos se expresan sobre
+        el audio con voz (tras el recorte del VAD), salvo en modo de audio largo, donde se expresan
+        sobre el audio original.
+
+        Los segmentos de voz se transcriben uno a uno (iter_transcribe): on_segment recibe cada resultado
+        parcial según termina y, si cancel_event se activa, la transcripción se detiene antes del siguiente
+        segmento (los tramos pendientes del modo de audio largo no llegan a lanzarse).
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en formato bytes (WAV, m4a, mp3...) o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            on_segment (Callable, opcional): Se llama (en el hilo de la transcripción) con cada resultado parcial de iter_transcribe.
+            cancel_event (threading.Event, opcional): Solicitud de cancelación, comprobada entre segmentos.
+            **options: Opciones de decodificación adicionales del backend (temperature, beam_size...).
+
+        Returns:
+            Dict[str, Any]: Resultado con el contrato común (text, language, duration, segments).
+
+        Raises:
+            ValueError: Si el audio está vacío.
+            TranscriptionCancelledError: Si se activa cancel_event.
+            RuntimeError: Si ocurre un error durante la transcripción.
+        """
+        if audio_bytes is None or len(audio_bytes) == 0:
+            logger.warning(f"[{type(self).__name__}] El audio recibido está vacío.")
+            raise ValueError("El audio recibido para transcripción está vacío.")
+        try:
+            if language:
+                logger.info(f"[{type(self).__name__}] Iniciando transcripción de audio con idioma forzado='{language}'...")
+            else:
+                logger.info(f"[{type(self).__name__}] Iniciando transcripción de audio (detección automática de idioma)...")
+            audio = self.load_audio(audio_bytes)
+            result: Dict[str, Any] = {"text": "", "language": language, "duration": audio.shape[0] / SAMPLE_RATE, "segments": []}
+            texts = []
+            with closing(self.iter_transcribe(audio, language=language, **options)) as partials:
+                for partial in self._until_cancelled(partials, cancel_event):
+                    logger.debug(f"[{type(self).__name__}] Resultado de la transcripción: {partial}")
+                    result["segments"].extend(partial["segments"])
+                    texts.append(partial["text"].strip())
+                    result["language"] = result["language"] or partial.get("language")
+                    if on_segment is not None:
+                        on_segment(partial)
+            if not texts:
+                logger.info(f"[{type(self).__name__}] No se detectó voz en el audio; se omite la decodificación.")
+                return result
+            result["text"] = " ".join(text for text in texts if text)
+            logger.info(f"[{type(self).__name__}] Transcripción completada correctamente.")
+            return result
+        except TranscriptionCancelledError:
+            logger.info(f"[{type(self).__name__}] Transcripción cancelada entre segmentos.")
+            raise
+        except Exception as e:
+            logger.error(f"[{type(self).__name__}] Error en la transcripción: {e}", exc_info=True)
+            raise RuntimeError(f"Error en la transcripción de audio: {e}")
+
+    @staticmethod
+    def _until_cancelled(partials: Iterator[Dict[str, Any]], cancel_event: Optional[threading.Event]) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los resultados parciales comprobando la cancelación antes de transcribir cada segmento.
+
+        Raises:
+            TranscriptionCancelledError: Si cancel_event está activo.
+        """
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranscriptionCancelledError("Transcripción cancelada")
+            try:
+                partial = next(partials)
+            except StopIteration:
+                return
+            yield partial
+
+    def iter_transcribe(self, audio: np.ndarray, language: str | None = None, **options) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe un audio decodificado segmento de voz a segmento de voz, devolviendo cada resultado según termina.
+
+        Permite publicar el progreso o cancelar una transcripción larga entre segmentos sin esperar al final.
+
+        Args:
+            audio (np.ndarray): Audio float32 mono a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación adicionales del backend.
+
+        Yields:
+            Dict[str, Any]: {"text", "language", "segments", "index", "total"} con tiempos ya desplazados
+            sobre el audio con voz (sobre el audio original en modo de audio largo); "index" y "total"
+            indican la posición del segmento de voz.
+        """
+        if self.is_long_audio(audio):
+            yield from self._iter_long_audio(audio, language=language, **options)
+            return
+        segments = self.speech_segments(audio)
+        offset = 0.0
+        for index, segment in enumerate(segments):
+            partial = self._transcribe_segment(segment, language=language, **options)
+            for seg in partial["segments"]:
+                shift_segment(seg, offset)
+            partial["index"] = index
+            partial["total"] = len(segments)
+            yield partial
+            offset += segment.shape[0] / SAMPLE_RATE
+
+    def _iter_long_audio(self, audio: np.ndarray, language: str | None = None, **options) -> Iterator[Dict[str, Any]]:
+        """
+        Modo de audio largo: transcribe tramos contiguos independientes (en paralelo si _map_segments lo
+        permite) y desplaza sus tiempos al inicio de cada tramo en el audio original.
+        """
+        spans = self.speech_spans(audio)
+        logger.info(
+            f"[{type(self).__name__}] Audio largo ({audio.shape[0] / SAMPLE_RATE:.1f} s): {len(spans)} tramo(s), "
+            f"hasta {self.max_parallel_segments} en paralelo"
+        )
+
+        def transcribe_span(span: tuple[int, int]) -> Dict[str, Any]:
+            return self._transcribe_segment(audio[span[0]:span[1]], language=language, **options)
+
+        for index, (span, partial) in enumerate(zip(spans, self._map_segments(transcribe_span, spans))):
+            offset = span[0] / SAMPLE_RATE
+            for seg in partial["segments"]:
+                shift_segment(seg, offset)
+            partial["index"] = index
+            partial["total"] = len(spans)
+            yield partial
+
+    def transcribe(self, audio_bytes: bytes | np.ndarray, language: str | None = None, **options) -> str:
+        """
+        Transcribe un audio a texto.
+
+        Args:
+            audio_bytes (bytes | np.ndarray): Audio en formato bytes o ya decodificado a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación adicionales del backend.
+
+        Returns:
+            str: Texto transcrito del audio.
+        """
+        return self.transcribe_detailed(audio_bytes, language=language, **options)["text"]
+
+    def transcribe_batch(self, audios: list[np.ndarray], language: str | None = None, prompt: str | None = None) -> list[Dict[str, Any]]:
+        """
+        Transcribe un lote de clips cortos.
+
+        Implementación por defecto: los clips se transcriben uno a uno con _transcribe_segment y cada resultado
+        se resume en un único segmento. Los backends con supports_batching la sustituyen por un único pase
+        del encoder para todo el lote.
+
+        Args:
+            audios (list[np.ndarray]): Clips de audio float32 mono a 16 kHz (<= 30 s).
+            language (str, opcional): Código ISO del idioma común al lote; None para autodetección por clip.
+            prompt (str, opcional): Prompt inicial común al lote (equivalente a initial_prompt).
+
+        Returns:
+            list[Dict[str, Any]]: Un segmento (contrato común, con "language") por clip, en el mismo orden.
+        """
+        options = {"initial_prompt": prompt} if prompt else {}
+        segments = []
+        for audio in audios:
+            result = self._transcribe_segment(audio, language=language, **options)
+            parts = result["segments"]
+            segments.append({
+                "start": 0.0,
+                "end": round(audio.shape[0] / SAMPLE_RATE, 2),
+                "text": result["text"].strip(),
+                "avg_logprob": float(np.mean([seg["avg_logprob"] for seg in parts])) if parts else 0.0,
+                "no_speech_prob": max((seg["no_speech_prob"] for seg in parts), default=1.0),
+                "compression_ratio": max((seg["compression_ratio"] for seg in parts), default=0.0),
+                "temperature": max((seg["temperature"] for seg in parts), default=0.0),
+                "language": result.get("language"),
+            })
+        return segments
+
+    def replicate(self) -> "BaseTranscriber":
+        """
+        Crea una réplica del transcriptor que comparte los pesos del modelo (ver ModelPool).
+
+        Implementación por defecto: sin réplicas reales, devuelve la propia instancia. build_transcriber solo
+        crea un ModelPool si supports_replicas es True.
+
+        Returns:
+            BaseTranscriber: Réplica capaz de transcribir en paralelo con la original (o la propia instancia).
+        """
+        return self
+
+    def languages_options(self) -> dict[str, Optional[str]]:
+        """
+        Devuelve un mapeo de idiomas (Nombre -> código) ordenado para la UI.
+        Orden: 'Auto-detect/Multi-language', 'English', 'Spanish', y resto alfabético.
+
+        Returns:
+            dict[str, Optional[str]]: Nombre -> código ISO-639-1 (None para autodetección).
+        """
+        try:
+            # Canónicos (code->name) invertidos a name->code
+            mapping: Dict[str, str] = {name.title(): code for code, name in LANGUAGES.items()}
+            # Alias (name->code) sin sobrescribir canónicos
+            for alias_name, code in TO_LANGUAGE_CODE.items():
+                mapping.setdefault(alias_name.title(), code)
+
+            # Preferidos
+            preferred = [
+                ("Auto-detect/Multi-language", None),
+                ("English", mapping.get("English", "en")),
+                ("Spanish", mapping.get("Spanish", "es")),
+            ]
+
+            # Eliminar preferidos del resto
+            mapping.pop("English", None)
+            mapping.pop("Spanish", None)
+
+            # Resto ordenado alfabéticamente
+            rest_sorted = dict(sorted(mapping.items(), key=lambda kv: kv[0]))
+
+            # Combinar respetando el orden
+            ordered: dict[str, Optional[str]] = {}
+            for k, v in preferred:
+                ordered[k] = v
+            ordered.update(rest_sorted)
+
+            logger.debug(f"[{type(self).__name__}] Idiomas disponibles (ordenados): {len(ordered)}")
+            return ordered
+        except Exception as e:
+            logger.exception(f"[{type(self).__name__}] Error construyendo el mapa de idiomas", exc_info=True)
+            raise
@@ -0,0 +1,130 @@
+import math
+from typing import Dict, Any
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Veredictos de confianza de una transcripción
+CONFIDENT = "confident"
+UNCERTAIN = "uncertain"
+UNUSABLE = "unusable"
+
+
+class ConfidenceGate:
+    """
+    Evalúa la fiabilidad de una transcripción a partir de las métricas de Whisper de cada segmento.
+
+    - avg_logprob: log-probabilidad media de los tokens (baja = el modelo duda).
+    - no_speech_prob: probabilidad de que el segmento sea silencio o ruido.
+    - compression_ratio: ratio de compresión gzip del texto (alto = texto repetitivo, típico de alucinaciones).
+
+    El veredicto permite a los clientes no lanzar la consulta al RAG/LLM (varios segundos) con audio
+    casi silencioso o ininteligible y pedir al piloto que repita:
+    - "confident": todos los segmentos superan los umbrales.
+    - "uncertain": algún segmento no los supera; el texto puede contener errores.
+    - "unusable": sin texto, solo ruido/silencio, texto repetitivo o confianza global muy baja.
+    """
+
+    def __init__(
+        self,
+        min_avg_logprob: float = -1.0,
+        max_no_speech_prob: float = 0.6,
+        max_compression_ratio: float = 2.4,
+        unusable_avg_logprob: float = -1.5
+    ) -> None:
+        """
+        Inicializa los umbrales.
+
+        Args:
+            min_avg_logprob (float): avg_logprob mínimo de un segmento fiable.
+            max_no_speech_prob (float): no_speech_prob máximo de un segmento con voz.
+            max_compression_ratio (float): compression_ratio máximo de un segmento no repetitivo.
+            unusable_avg_logprob (float): avg_logprob global (ponderado por duración) por debajo del cual la transcripción se descarta.
+
+        Returns:
+            None
+        """
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech_prob = max_no_speech_prob
+        self.max_compression_ratio = max_compression_ratio
+        self.unusable_avg_logprob = unusable_avg_logprob
+
+    @staticmethod
+    def segment_metrics(segments: list[dict]) -> list[Dict[str, Any]]:
+        """
+        Extrae las métricas de calidad de cada segmento.
+
+        Args:
+            segments (list[dict]): Segmentos del resultado (contrato común de BaseTranscriber).
+
+        Returns:
+            list[Dict[str, Any]]: {"start", "end", "text", "avg_logprob", "no_speech_prob", "compression_ratio"} por segmento.
+        """
+        return [
+            {
+                "start": round(float(seg["start"]), 2),
+                "end": round(float(seg["end"]), 2),
+                "text": seg["text"].strip(),
+                "avg_logprob": round(float(seg["avg_logprob"]), 3),
+                "no_speech_prob": round(float(seg["no_speech_prob"]), 3),
+                "compression_ratio": round(float(seg["compression_ratio"]), 3),
+            }
+            for seg in segments
+        ]
+
+    def evaluate(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calcula el veredicto de confianza de un resultado de transcripción.
+
+        Args:
+            result (Dict[str, Any]): Resultado detallado con "text" y "segments".
+
+        Returns:
+            Dict[str, Any]: {"verdict", "score", "avg_logprob", "no_speech_prob", "compression_ratio", "reasons"}.
+            score es exp(avg_logprob global) en [0, 1]; los valores agregados son None si no hay segmentos con voz.
+        """
+        segments = [seg for seg in result.get("segments", []) if seg["text"].strip()]
+        if not result.get("text", "").strip() or not segments:
+            return self._verdict(UNUSABLE, None, None, None, ["empty_transcription"])
+
+        speech = [seg for seg in segments if seg["no_speech_prob"] <= self.max_no_speech_prob]
+        no_speech_prob = max(seg["no_speech_prob"] for seg in segments)
+        compression_ratio = max(seg["compression_ratio"] for seg in segments)
+        if not speech:
+            return self._verdict(UNUSABLE, None, no_speech_prob, compression_ratio, ["no_speech"])
+
+        # avg_logprob global ponderado por la duración de los segmentos con voz
+        weights = [max(seg["end"] - seg["start"], 0.01) for seg in speech]
+        avg_logprob = sum(seg["avg_logprob"] * w for seg, w in zip(speech, weights)) / sum(weights)
+
+        reasons = []
+        if all(seg["compression_ratio"] > self.max_compression_ratio for seg in speech):
+            reasons.append("repetitive_text")
+        if avg_logprob < self.unusable_avg_logprob:
+            reasons.append("low_avg_logprob")
+        if reasons:
+            return self._verdict(UNUSABLE, avg_logprob, no_speech_prob, compression_ratio, reasons)
+
+        if len(speech) < len(segments):
+            reasons.append("no_speech_segments")
+        if any(seg["avg_logprob"] < self.min_avg_logprob for seg in speech):
+            reasons.append("low_avg_logprob_segments")
+        if any(seg["compression_ratio"] > self.max_compression_ratio for seg in speech):
+            reasons.append("repetitive_segments")
+        return self._verdict(UNCERTAIN if reasons else CONFIDENT, avg_logprob, no_speech_prob, compression_ratio, reasons)
+
+    @staticmethod
+    def _verdict(verdict: str, avg_logprob, no_speech_prob, compression_ratio, reasons: list[str]) -> Dict[str, Any]:
+        """
+        Construye el diccionario del veredicto con los valores redondeados.
+        """
+        return {
+            "verdict": verdict,
+            "score": round(math.exp(avg_logprob), 3) if avg_logprob is not None else 0.0,
+            "avg_logprob": round(float(avg_logprob), 3) if avg_logprob is not None else None,
+            "no_speech_prob": round(float(no_speech_prob), 3) if no_speech_prob is not None else None,
+            "compression_ratio": round(float(compression_ratio), 3) if compression_ratio is not None else None,
+            "reasons": reasons,
+        }
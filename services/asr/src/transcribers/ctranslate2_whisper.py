@@ -0,0 +1,116 @@
+from faster_whisper import WhisperModel
+import numpy as np
+from typing import Optional, Dict, Any
+
+from src.audio.decoder import AudioDecoder
+from src.audio.vad import EnergyVAD
+from src.transcribers.base import BaseTranscriber
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class ASRFasterWhisper(BaseTranscriber):
+    """
+    Transcriptor de audio a texto usando Whisper sobre CTranslate2 (faster-whisper).
+
+    Pensado para nodos sin GPU: carga el modelo cuantizado (int8 por defecto) en CPU, lo que reduce
+    memoria y latencia frente a openai-whisper en float32, manteniendo el mismo contrato de salida.
+    """
+
+    # El modelo es seguro entre hilos: las réplicas son la propia instancia (ver replicate)
+    supports_replicas = True
+
+    def __init__(
+        self,
+        model_name: str,
+        decoder: Optional[AudioDecoder] = None,
+        vad: Optional[EnergyVAD] = None,
+        device: str = "cpu",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+        num_workers: int = 1
+    ) -> None:
+        """
+        Inicializa el transcriptor cargando el modelo CTranslate2.
+
+        Args:
+            model_name (str): Nombre del modelo Whisper (p. ej. "large-v3-turbo", "small") o ruta a un modelo convertido.
+            decoder (AudioDecoder, opcional): Decodificador de audio en memoria. Si no se indica, se crea uno por defecto.
+            vad (EnergyVAD, opcional): Detector de voz para recortar silencios antes de decodificar. None para desactivarlo.
+            device (str): Dispositivo de CTranslate2 ("cpu", "cuda" o "auto").
+            compute_type (str): Tipo de cómputo/cuantización ("int8", "int8_float16", "float16", "float32"...).
+            cpu_threads (int): Hilos de CPU por modelo (0 = valor por defecto de CTranslate2).
+            num_workers (int): Nº de transcripciones que el modelo puede ejecutar en paralelo.
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: Si ocurre un error al cargar el modelo.
+        """
+        super().__init__(model_name=model_name, decoder=decoder, vad=vad)
+        try:
+            logger.info(f"[ASRFasterWhisper] Cargando modelo '{model_name}' (device={device}, compute_type={compute_type}, cpu_threads={cpu_threads})")
+            self.model = WhisperModel(
+                model_name,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers
+            )
+            logger.info("[ASRFasterWhisper] Modelo cargado correctamente.")
+        except Exception as e:
+            logger.error(f"[ASRFasterWhisper] Error al cargar el modelo: {e}", exc_info=True)
+            raise RuntimeError(f"Error al cargar el modelo faster-whisper: {e}")
+
+    def replicate(self) -> "ASRFasterWhisper":
+        """
+        Devuelve una réplica del transcriptor.
+
+        CTranslate2 ya mantiene internamente num_workers réplicas del modelo que comparten los pesos y es
+        seguro llamarlo desde varios hilos, así que la réplica es la propia instancia.
+
+        Returns:
+            ASRFasterWhisper: La misma instancia.
+        """
+        return self
+
+    def _transcribe_segment(self, audio: np.ndarray, language: str | None = None, **options) -> Dict[str, Any]:
+        """
+        Transcribe un segmento con faster-whisper.
+
+        Args:
+            audio (np.ndarray): Segmento float32 mono a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación (mismos nombres que openai-whisper: temperature, beam_size...).
+
+        Returns:
+            Dict[str, Any]: {"text", "language", "segments"}.
+        """
+        # El VAD propio se aplica antes; se desactiva el filtro VAD interno de faster-whisper
+        segments_iter, info = self.model.transcribe(audio, language=language, vad_filter=False, **options)
+        segments = []
+        # El generador es perezoso: la decodificación ocurre al recorrerlo
+        for seg in segments_iter:
+            segment = {
+                "start": float(seg.start),
+                "end": float(seg.end),
+                "text": seg.text.strip(),
+                "avg_logprob": float(seg.avg_logprob),
+                "no_speech_prob": float(seg.no_speech_prob),
+                "compression_ratio": float(seg.compression_ratio),
+                "temperature": float(seg.temperature),
+            }
+            if seg.words:
+                segment["words"] = [
+                    {"word": word.word, "start": float(word.start), "end": float(word.end), "probability": float(word.probability)}
+                    for word in seg.words
+                ]
+            segments.append(segment)
+        return {
+            "text": " ".join(seg["text"] for seg in segments if seg["text"]),
+            "language": info.language,
+            "segments": segments,
+        }
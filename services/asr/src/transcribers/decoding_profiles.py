@@ -0,0 +1,91 @@
+from typing import Optional, Dict, Any
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Perfiles por defecto si config.yaml no define ASR.DECODING_PROFILES
+DEFAULT_PROFILES = {
+    # Decodificación por defecto de model.transcribe() en openai-whisper (comportamiento previo a los perfiles)
+    "baseline": {"BEAM_SIZE": 1, "BEST_OF": 1, "TEMPERATURES": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0], "CONDITION_ON_PREVIOUS_TEXT": True, "WORD_TIMESTAMPS": False},
+    "fast": {"BEAM_SIZE": 1, "BEST_OF": 1, "TEMPERATURES": [0.0], "CONDITION_ON_PREVIOUS_TEXT": False, "WORD_TIMESTAMPS": False},
+    "balanced": {"BEAM_SIZE": 1, "BEST_OF": 3, "TEMPERATURES": [0.0, 0.4, 0.8], "CONDITION_ON_PREVIOUS_TEXT": False, "WORD_TIMESTAMPS": False},
+    "accurate": {"BEAM_SIZE": 5, "BEST_OF": 5, "TEMPERATURES": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0], "CONDITION_ON_PREVIOUS_TEXT": True, "WORD_TIMESTAMPS": True},
+}
+
+
+class DecodingProfiles:
+    """
+    Perfiles de decodificación con nombre (baseline / fast / balanced / accurate...).
+
+    Cada perfil fija el tamaño del beam, best_of, la secuencia de temperaturas de fallback (cada
+    temperatura adicional es una re-decodificación completa del segmento si el resultado anterior no
+    supera los umbrales de calidad), el condicionamiento en el texto previo y si se calculan marcas de
+    tiempo por palabra. Se traducen a las opciones de transcribe() comunes a openai-whisper y faster-whisper.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, dict]] = None, default: str = "baseline") -> None:
+        """
+        Inicializa los perfiles.
+
+        Args:
+            profiles (dict, opcional): Nombre -> {BEAM_SIZE, BEST_OF, TEMPERATURES, CONDITION_ON_PREVIOUS_TEXT, WORD_TIMESTAMPS}.
+            default (str): Perfil usado cuando la petición no indica ninguno.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si el perfil por defecto no existe.
+        """
+        self.profiles = profiles or DEFAULT_PROFILES
+        if default not in self.profiles:
+            raise ValueError(f"El perfil de decodificación por defecto '{default}' no existe. Opciones: {', '.join(self.profiles)}")
+        self.default = default
+        logger.info(f"[DecodingProfiles] Perfiles disponibles: {', '.join(self.profiles)} (por defecto: {default})")
+
+    def resolve(self, name: Optional[str] = None) -> tuple[str, Dict[str, Any]]:
+        """
+        Devuelve el nombre efectivo del perfil y sus opciones de decodificación.
+
+        Args:
+            name (str, opcional): Nombre del perfil; None para el perfil por defecto.
+
+        Returns:
+            tuple[str, Dict[str, Any]]: (nombre, opciones para transcribe()).
+
+        Raises:
+            ValueError: Si el perfil no existe.
+        """
+        name = name or self.default
+        if name not in self.profiles:
+            raise ValueError(f"Decoding profile '{name}' not found. Options: {', '.join(self.profiles)}")
+        profile = self.profiles[name]
+        return name, {
+            "beam_size": profile.get("BEAM_SIZE", 1),
+            "best_of": profile.get("BEST_OF", 1),
+            "temperature": tuple(profile.get("TEMPERATURES", [0.0])),
+            "condition_on_previous_text": profile.get("CONDITION_ON_PREVIOUS_TEXT", False),
+            "word_timestamps": profile.get("WORD_TIMESTAMPS", False),
+        }
+
+    @staticmethod
+    def fallback_passes(segments: list[dict], temperatures: tuple[float, ...]) -> int:
+        """
+        Cuenta las re-decodificaciones por fallback de temperatura a partir de la temperatura final de cada segmento.
+
+        Un segmento decodificado con la temperatura i-ésima de la secuencia necesitó i pasadas adicionales.
+
+        Args:
+            segments (list[dict]): Segmentos del resultado (contrato común, con "temperature").
+            temperatures (tuple[float, ...]): Secuencia de temperaturas del perfil.
+
+        Returns:
+            int: Nº total de pasadas de fallback.
+        """
+        passes = 0
+        for seg in segments:
+            temperature = seg.get("temperature", temperatures[0])
+            passes += min(range(len(temperatures)), key=lambda i: abs(temperatures[i] - temperature))
+        return passes
@@ -0,0 +1,84 @@
+from typing import Optional
+
+from src.audio.decoder import AudioDecoder
+from src.audio.vad import EnergyVAD
+from src.transcribers.base import BaseTranscriber
+from src.transcribers.model_pool import ModelPool
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Backends disponibles (valor de ASR.BACKEND en config.yaml)
+BACKENDS = ("openai-whisper", "faster-whisper")
+
+
+def build_transcriber(
+    backend: str,
+    model_name: str,
+    decoder: Optional[AudioDecoder] = None,
+    vad: Optional[EnergyVAD] = None,
+    backend_options: Optional[dict] = None,
+    replicas: int = 1,
+    threads_per_replica: int = 0,
+    long_audio_seconds: Optional[float] = None,
+    max_parallel_segments: int = 0
+) -> BaseTranscriber:
+    """
+    Crea el transcriptor correspondiente al backend configurado.
+
+    Los backends se importan de forma perezosa para no exigir las dependencias del que no se usa. Con
+    replicas > 1 se devuelve un ModelPool cuyas réplicas comparten los pesos del modelo.
+
+    Args:
+        backend (str): "openai-whisper" (PyTorch, GPU si está disponible) o "faster-whisper" (CTranslate2, int8 en CPU).
+        model_name (str): Nombre del modelo Whisper.
+        decoder (AudioDecoder, opcional): Decodificador de audio compartido.
+        vad (EnergyVAD, opcional): Detector de voz compartido.
+        backend_options (dict, opcional): Opciones propias del backend (DEVICE, COMPUTE_TYPE, CPU_THREADS, NUM_WORKERS).
+        replicas (int): Nº de réplicas del modelo.
+        threads_per_replica (int): Hilos de CPU por inferencia (0 = valor por defecto del backend). Con openai-whisper
+            es un ajuste global de PyTorch compartido por todas las réplicas; con faster-whisper, los hilos de cada worker.
+        long_audio_seconds (float, opcional): Duración mínima para el modo de audio largo; None para desactivarlo.
+        max_parallel_segments (int): Tramos de una grabación larga transcritos a la vez (0 = nº de réplicas).
+
+    Returns:
+        BaseTranscriber: Transcriptor inicializado.
+
+    Raises:
+        ValueError: Si el backend no existe.
+    """
+    backend_options = backend_options or {}
+    replicas = max(1, int(replicas))
+    logger.info(f"Creando transcriptor con backend '{backend}', modelo '{model_name}' y {replicas} réplica(s)")
+    if backend == "openai-whisper":
+        from src.transcribers.whisper import ASRWhisper
+        if threads_per_replica > 0:
+            # Ajuste global del proceso, no por réplica: todas las réplicas comparten la configuración intra-op de
+            # PyTorch y cada inferencia en curso puede usar hasta threads_per_replica hilos, sin núcleos dedicados.
+            # Por eso plan_replicas dimensiona réplicas x hilos <= núcleos (ver MODEL_POOL.THREADS_PER_REPLICA)
+            import torch
+            torch.set_num_threads(threads_per_replica)
+        transcriber = ASRWhisper(model_name=model_name, decoder=decoder, vad=vad)
+    elif backend == "faster-whisper":
+        from src.transcribers.ctranslate2_whisper import ASRFasterWhisper
+        transcriber = ASRFasterWhisper(
+            model_name=model_name,
+            decoder=decoder,
+            vad=vad,
+            device=backend_options.get("DEVICE", "cpu"),
+            compute_type=backend_options.get("COMPUTE_TYPE", "int8"),
+            cpu_threads=threads_per_replica or backend_options.get("CPU_THREADS", 0),
+            # Cada worker de CTranslate2 es una réplica interna que comparte los pesos
+            num_workers=max(replicas, backend_options.get("NUM_WORKERS", 1))
+        )
+    else:
+        raise ValueError(f"Backend de ASR no soportado: '{backend}'. Opciones: {', '.join(BACKENDS)}")
+    if replicas > 1 and not transcriber.supports_replicas:
+        logger.warning(f"El backend '{backend}' no admite réplicas; se usa una única instancia del modelo")
+        replicas = 1
+    if replicas > 1:
+        transcriber = ModelPool([transcriber] + [transcriber.replicate() for _ in range(replicas - 1)])
+    transcriber.configure_long_audio(long_audio_seconds, max_parallel_segments or replicas)
+    return transcriber
@@ -0,0 +1,182 @@
+import os
+import queue
+import threading
+import numpy as np
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterator
+
+from src.transcribers.base import BaseTranscriber
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+# Hilos por réplica cuando no se configura ni el nº de réplicas ni el de hilos
+DEFAULT_THREADS_PER_REPLICA = 4
+
+
+def available_cores() -> int:
+    """
+    Devuelve los núcleos de CPU disponibles para el proceso (respeta la afinidad del contenedor).
+
+    Returns:
+        int: Nº de núcleos utilizables.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_replicas(
+    replicas: int = 0,
+    threads_per_replica: int = 0,
+    memory_budget_mb: float = 0,
+    replica_memory_mb: float = 0,
+    max_replicas: int = 8
+) -> tuple[int, int]:
+    """
+    Calcula el nº de réplicas del modelo y los hilos de CPU que puede usar cada inferencia.
+
+    Con replicas = 0 se dimensiona automáticamente: núcleos disponibles / hilos por réplica, limitado por
+    el presupuesto de memoria (los pesos se comparten entre réplicas, cada una solo añade su memoria de
+    trabajo: activaciones y kv-cache) y por max_replicas.
+
+    Los hilos no se fijan a núcleos por réplica: con openai-whisper, torch.set_num_threads es un ajuste
+    global del proceso que comparten todas las réplicas (cada inferencia en curso usa hasta ese nº de hilos
+    intra-op). El cálculo solo garantiza que, con todas las réplicas ocupadas, réplicas x hilos no supere
+    los núcleos disponibles.
+
+    Args:
+        replicas (int): Nº de réplicas fijo (0 = automático).
+        threads_per_replica (int): Hilos de CPU por inferencia en curso (0 = reparto de los núcleos entre las réplicas).
+        memory_budget_mb (float): Memoria disponible para las réplicas en MB (0 = sin límite).
+        replica_memory_mb (float): Memoria de trabajo estimada por réplica en MB.
+        max_replicas (int): Límite superior del dimensionado automático.
+
+    Returns:
+        tuple[int, int]: (réplicas, hilos por inferencia).
+    """
+    cores = available_cores()
+    if replicas > 0:
+        threads = threads_per_replica or max(1, cores // replicas)
+        return replicas, threads
+    threads = threads_per_replica or min(DEFAULT_THREADS_PER_REPLICA, cores)
+    replicas = max(1, cores // threads)
+    if memory_budget_mb > 0 and replica_memory_mb > 0:
+        replicas = min(replicas, max(1, int(memory_budget_mb // replica_memory_mb)))
+    return max(1, min(replicas, max_replicas)), threads
+
+
+class ModelPool(BaseTranscriber):
+    """
+    Pool de réplicas de un mismo modelo de transcripción.
+
+    Cada segmento (o lote) se despacha a la primera réplica libre, de forma que varias peticiones se
+    transcriben en paralelo en lugar de serializarse sobre un único modelo. Las réplicas comparten los
+    pesos (ver replicate() de cada backend), así que la memoria no crece N veces. Expone la misma interfaz
+    que BaseTranscriber, por lo que el resto del servicio no distingue entre un modelo y un pool.
+    """
+
+    def __init__(self, replicas: list[BaseTranscriber]) -> None:
+        """
+        Inicializa el pool con las réplicas ya creadas.
+
+        Args:
+            replicas (list[BaseTranscriber]): Réplicas del modelo (la primera aporta decodificador y VAD).
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: Si no se indica ninguna réplica.
+        """
+        if not replicas:
+            raise ValueError("El pool de modelos necesita al menos una réplica.")
+        super().__init__(model_name=replicas[0].model_name, decoder=replicas[0].decoder, vad=replicas[0].vad)
+        self.replicas = replicas
+        self.supports_batching = replicas[0].supports_batching
+        self._free: "queue.Queue[BaseTranscriber]" = queue.Queue()
+        for replica in replicas:
+            self._free.put(replica)
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._dispatched = 0
+        logger.info(f"[ModelPool] Pool creado con {len(replicas)} réplica(s) de '{self.model_name}'")
+
+    @contextmanager
+    def acquire(self):
+        """
+        Reserva una réplica libre (esperando si todas están ocupadas) y la devuelve al pool al terminar.
+
+        Yields:
+            BaseTranscriber: Réplica reservada.
+        """
+        replica = self._free.get()
+        with self._lock:
+            self._busy += 1
+            self._dispatched += 1
+        try:
+            yield replica
+        finally:
+            with self._lock:
+                self._busy -= 1
+            self._free.put(replica)
+
+    def _transcribe_segment(self, audio: np.ndarray, language: str | None = None, **options) -> Dict[str, Any]:
+        """
+        Transcribe un segmento en la primera réplica libre.
+
+        Args:
+            audio (np.ndarray): Segmento float32 mono a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación del backend.
+
+        Returns:
+            Dict[str, Any]: {"text", "language", "segments"}.
+        """
+        with self.acquire() as replica:
+            return replica._transcribe_segment(audio, language=language, **options)
+
+    def _map_segments(self, fn, items: list) -> Iterator:
+        """
+        Procesa los tramos de una grabación larga en paralelo sobre las réplicas (hasta max_parallel_segments
+        a la vez), devolviendo los resultados en orden según están disponibles.
+        """
+        workers = min(self.max_parallel_segments, len(self.replicas), len(items))
+        if workers <= 1:
+            yield from map(fn, items)
+            return
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asr-long-audio")
+        try:
+            yield from executor.map(fn, items)
+        finally:
+            # Si el consumidor deja de iterar (p. ej. trabajo cancelado) no se lanzan los tramos pendientes
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def transcribe_batch(self, audios: list[np.ndarray], language: str | None = None, prompt: str | None = None) -> list[Dict[str, Any]]:
+        """
+        Transcribe un lote de clips cortos en la primera réplica libre.
+
+        Args:
+            audios (list[np.ndarray]): Clips de audio float32 mono a 16 kHz (<= 30 s).
+            language (str, opcional): Código ISO del idioma común al lote; None para autodetección por clip.
+            prompt (str, opcional): Prompt inicial común al lote.
+
+        Returns:
+            list[Dict[str, Any]]: Un segmento (contrato común) por clip, en el mismo orden.
+        """
+        with self.acquire() as replica:
+            return replica.transcribe_batch(audios, language=language, prompt=prompt)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado del pool de réplicas.
+
+        Returns:
+            Dict[str, Any]: Réplicas totales, ocupadas y nº de despachos realizados.
+        """
+        with self._lock:
+            return {"replicas": len(self.replicas), "busy": self._busy, "dispatched": self._dispatched}
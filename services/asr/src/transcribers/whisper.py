@@ -1,8 +1,13 @@
+import copy
 import whisper
-from whisper.tokenizer import LANGUAGES, TO_LANGUAGE_CODE
-import tempfile
 import torch
-from typing import Optional, Dict
+import threading
+import numpy as np
+from typing import Optional, Dict, Any
+
+from src.audio.decoder import AudioDecoder
+from src.audio.vad import EnergyVAD
+from src.transcribers.base import BaseTranscriber
 
 import logging
 # Obtiene un logger para el módulo actual
@@ -20,19 +25,58 @@ else:
     logger.info("No GPU detected")
 
 
-class ASRWhisper:
+def _segment_from_whisper(segment: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte un segmento de openai-whisper al contrato común de BaseTranscriber.
+    """
+    converted = {
+        "start": float(segment["start"]),
+        "end": float(segment["end"]),
+        "text": segment["text"].strip(),
+        "avg_logprob": float(segment["avg_logprob"]),
+        "no_speech_prob": float(segment["no_speech_prob"]),
+        "compression_ratio": float(segment["compression_ratio"]),
+        "temperature": float(segment["temperature"]),
+    }
+    if segment.get("words"):
+        converted["words"] = [
+            {"word": word["word"], "start": float(word["start"]), "end": float(word["end"]), "probability": float(word["probability"])}
+            for word in segment["words"]
+        ]
+    return converted
+
+
+def _share_module(module: torch.nn.Module) -> torch.nn.Module:
+    """
+    Clona la estructura de un módulo compartiendo sus parámetros y buffers (sin copiar los tensores).
+
+    Cada clon tiene sus propios diccionarios de submódulos y hooks, de modo que los hooks de kv-cache
+    que instala whisper en cada decodificación no interfieren entre réplicas.
+    """
+    clone = copy.copy(module)
+    clone.__dict__ = {key: (value.copy() if isinstance(value, dict) else value) for key, value in module.__dict__.items()}
+    clone._modules = {name: (_share_module(child) if child is not None else None) for name, child in module._modules.items()}
+    return clone
+
+
+class ASRWhisper(BaseTranscriber):
     """
     Transcriptor de audio a texto usando el modelo Whisper.
 
     Esta clase permite cargar un modelo Whisper y transcribir archivos de audio, utilizando GPU si está disponible.
     """
 
-    def __init__(self, model_name: str) -> None:
+    supports_batching = True
+    supports_replicas = True
+
+    def __init__(self, model_name: str, decoder: Optional[AudioDecoder] = None, vad: Optional[EnergyVAD] = None) -> None:
         """
         Inicializa el transcriptor Whisper con el modelo especificado.
 
         Args:
             model_name (str): Nombre del modelo Whisper a cargar.
+            decoder (AudioDecoder, opcional): Decodificador de audio en memoria. Si no se indica, se crea uno por defecto.
+            vad (EnergyVAD, opcional): Detector de voz para recortar silencios antes de decodificar. None para desactivarlo.
 
         Returns:
             None
@@ -40,85 +84,100 @@ class ASRWhisper:
         Raises:
             RuntimeError: Si ocurre un error al cargar el modelo.
         """
+        super().__init__(model_name=model_name, decoder=decoder, vad=vad)
         try:
             logger.info(f"[ASRWhisper] Cargando modelo Whisper '{model_name}' en dispositivo: {DEVICE}")
             self.model = whisper.load_model(model_name, device=DEVICE)
+            # Whisper instala hooks de kv-cache sobre el modelo en cada decodificación: las llamadas no pueden solaparse
+            self._lock = threading.Lock()
             logger.info("[ASRWhisper] Modelo Whisper cargado correctamente.")
         except Exception as e:
             logger.error(f"[ASRWhisper] Error al cargar el modelo Whisper: {e}", exc_info=True)
             raise RuntimeError(f"Error al cargar el modelo Whisper: {e}")
 
-    def transcribe(self, audio_bytes: bytes, language: str | None = None) -> str:
+    def replicate(self) -> "ASRWhisper":
         """
-        Transcribe un archivo de audio a texto usando el modelo Whisper.
+        Crea una réplica independiente del transcriptor que comparte los pesos del modelo.
 
-        Args:
-            audio_bytes (bytes): Audio en formato bytes (WAV).
+        Los tensores de parámetros y buffers son los mismos (la memoria no se duplica); cada réplica tiene
+        sus propios módulos y su propio lock, por lo que varias réplicas pueden decodificar en paralelo.
 
         Returns:
-            str: Texto transcrito del audio.
-
-        Raises:
-            ValueError: Si el audio está vacío.
-            RuntimeError: Si ocurre un error durante la transcripción.
+            ASRWhisper: Nueva réplica.
         """
-        if not audio_bytes:
-            logger.warning("[ASRWhisper] El audio recibido está vacío.")
-            raise ValueError("El audio recibido para transcripción está vacío.")
-        try:
-            if language:
-                logger.info(f"[ASRWhisper] Iniciando transcripción de audio con idioma forzado='{language}'...")
-            else:
-                logger.info("[ASRWhisper] Iniciando transcripción de audio (detección automática de idioma)...")
-            with tempfile.NamedTemporaryFile(suffix=".wav") as tmp:
-                tmp.write(audio_bytes)
-                tmp.flush()
-                # Si 'language' es None, Whisper hará autodetección
-                result = self.model.transcribe(tmp.name, language=language)
-                logger.debug(f"[ASRWhisper] Resultado de la transcripción: {result}")
-            logger.info("[ASRWhisper] Transcripción completada correctamente.")
-            return result["text"]
-        except Exception as e:
-            logger.error(f"[ASRWhisper] Error en la transcripción: {e}", exc_info=True)
-            raise RuntimeError(f"Error en la transcripción de audio: {e}")
-    
-    def languages_options(self) -> dict[str, Optional[str]]:
+        replica = copy.copy(self)
+        replica.model = _share_module(self.model)
+        replica._lock = threading.Lock()
+        return replica
+
+    def _transcribe_segment(self, audio: np.ndarray, language: str | None = None, **options) -> Dict[str, Any]:
         """
-        Devuelve un mapeo de idiomas (Nombre -> código) ordenado para la UI.
-        Orden: 'Auto-detect/Multi-language', 'English', 'Spanish', y resto alfabético.
+        Transcribe un segmento con model.transcribe de openai-whisper.
+
+        Args:
+            audio (np.ndarray): Segmento float32 mono a 16 kHz.
+            language (str, opcional): Código ISO del idioma; None para autodetección.
+            **options: Opciones de decodificación de whisper (temperature, beam_size...).
 
         Returns:
-            dict[str, Optional[str]]: Nombre -> código ISO-639-1 (None para autodetección).
+            Dict[str, Any]: {"text", "language", "segments"}.
         """
-        try:
-            # Canónicos (code->name) invertidos a name->code
-            mapping: Dict[str, str] = {name.title(): code for code, name in LANGUAGES.items()}
-            # Alias (name->code) sin sobrescribir canónicos
-            for alias_name, code in TO_LANGUAGE_CODE.items():
-                mapping.setdefault(alias_name.title(), code)
-
-            # Preferidos
-            preferred = [
-                ("Auto-detect/Multi-language", None),
-                ("English", mapping.get("English", "en")),
-                ("Spanish", mapping.get("Spanish", "es")),
-            ]
+        # Si 'language' es None, Whisper hará autodetección
+        if options.get("beam_size") == 1:
+            # Beam de 1 equivale a decodificación voraz, más barata en openai-whisper
+            options["beam_size"] = None
+        with self._lock:
+            result = self.model.transcribe(audio, language=language, **options)
+        return {
+            "text": result["text"],
+            "language": result.get("language"),
+            "segments": [_segment_from_whisper(seg) for seg in result["segments"]],
+        }
+
+    def transcribe_batch(self, audios: list[np.ndarray], language: str | None = None, prompt: str | None = None) -> list[Dict[str, Any]]:
+        """
+        Transcribe un lote de clips cortos (<= 30 s) ejecutando el encoder una única vez para todo el lote.
 
-            # Eliminar preferidos del resto
-            mapping.pop("English", None)
-            mapping.pop("Spanish", None)
+        Cada clip se rellena/recorta a la ventana de 30 s de Whisper, se calcula su espectrograma mel y se
+        apilan en un tensor (N, n_mels, 3000) que se decodifica con whisper.decode (decodificación voraz).
 
-            # Resto ordenado alfabéticamente
-            rest_sorted = dict(sorted(mapping.items(), key=lambda kv: kv[0]))
+        Args:
+            audios (list[np.ndarray]): Clips de audio float32 mono a 16 kHz.
+            language (str, opcional): Código ISO del idioma común al lote; None para autodetección por clip.
+            prompt (str, opcional): Prompt inicial común al lote (glosario del dominio...).
 
-            # Combinar respetando el orden
-            ordered: dict[str, Optional[str]] = {}
-            for k, v in preferred:
-                ordered[k] = v
-            ordered.update(rest_sorted)
+        Returns:
+            list[Dict[str, Any]]: Un segmento (contrato común, con "language") por clip, en el mismo orden.
 
-            logger.debug(f"[ASRWhisper] Idiomas disponibles (ordenados): {len(ordered)}")
-            return ordered
+        Raises:
+            RuntimeError: Si ocurre un error durante la transcripción del lote.
+        """
+        if not audios:
+            return []
+        try:
+            logger.info(f"[ASRWhisper] Transcribiendo lote de {len(audios)} clip(s) (idioma={language or 'auto'})...")
+            mels = [
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+                for audio in audios
+            ]
+            mel_batch = torch.stack(mels).to(self.model.device)
+            options = whisper.DecodingOptions(language=language, prompt=prompt, without_timestamps=True, fp16=(DEVICE == "cuda"))
+            with self._lock:
+                results = whisper.decode(self.model, mel_batch, options)
+            logger.info("[ASRWhisper] Lote transcrito correctamente.")
+            return [
+                {
+                    "start": 0.0,
+                    "end": round(audio.shape[0] / whisper.audio.SAMPLE_RATE, 2),
+                    "text": result.text.strip(),
+                    "avg_logprob": float(result.avg_logprob),
+                    "no_speech_prob": float(result.no_speech_prob),
+                    "compression_ratio": float(result.compression_ratio),
+                    "temperature": float(result.temperature),
+                    "language": result.language,
+                }
+                for audio, result in zip(audios, results)
+            ]
         except Exception as e:
-            logger.exception("[ASRWhisper] Error construyendo el mapa de idiomas", exc_info=True)
-            raise
\ No newline at end of file
+            logger.error(f"[ASRWhisper] Error en la transcripción por lotes: {e}", exc_info=True)
+            raise RuntimeError(f"Error en la transcripción por lotes: {e}")
@@ -4,11 +4,15 @@ from typing import Dict, List, Any
 from langchain_chroma.vectorstores import Chroma
 from langchain_core.documents import Document
 import uuid
+import time
 from urllib.parse import urlparse
 
 # Obtiene un logger para el módulo actual
 logger = logging.getLogger(__name__)
 
+# Metadato de la colección con el instante de la última modificación (lo usa el RAG para invalidar sus cachés)
+LAST_MODIFIED_KEY = "last_modified"
+
 class VectorDBRepository:
     """
     Repositorio para gestionar la base de datos vectorial.
@@ -75,6 +79,7 @@ class VectorDBRepository:
             documents = [Document(page_content=chunk, metadata=meta) for chunk, meta in zip(chunks, metadatas)]
             ids = [str(uuid.uuid4()) for _ in range(len(chunks))]
             self.vector_store.add_documents(documents=documents, ids=ids)
+            self._touch_collection()
             logger.info(f"[VectorDBRepository] Añadidos {len(chunks)} fragmentos a la base de datos.")
         except Exception as e:
             logger.error(f"[VectorDBRepository] Error al añadir fragmentos: {e}", exc_info=True)
@@ -96,6 +101,7 @@ class VectorDBRepository:
         try:
             logger.info(f"[VectorDBRepository] Eliminando fragmentos: {chunk_ids}")
             self.vector_store.delete_document(document_id=chunk_ids)
+            self._touch_collection()
             logger.info(f"[VectorDBRepository] Fragmentos eliminados correctamente: {chunk_ids}")
         except Exception as e:
             logger.error(f"[VectorDBRepository] Error al eliminar los fragmentos '{chunk_ids}': {e}", exc_info=True)
@@ -123,6 +129,7 @@ class VectorDBRepository:
             if not isinstance(documents, list) or not all(isinstance(doc, Document) for doc in documents):
                 raise TypeError("documents debe ser una lista de Document")
             self.vector_store.update_documents(document_ids=chunk_ids, documents=documents)
+            self._touch_collection()
             logger.info(f"[VectorDBRepository] Fragmentos actualizados correctamente: {chunk_ids}")
         except Exception as e:
             logger.error(f"[VectorDBRepository] Error al actualizar los fragmentos '{chunk_ids}': {e}", exc_info=True)
@@ -150,11 +157,28 @@ class VectorDBRepository:
             if not isinstance(document, Document):
                 raise TypeError("document debe ser una instancia de Document")
             self.vector_store.update_document(document_id=chunk_id, document=document)
+            self._touch_collection()
             logger.info(f"[VectorDBRepository] Fragmento actualizado correctamente: {chunk_id}")
         except Exception as e:
             logger.error(f"[VectorDBRepository] Error al actualizar el fragmento '{chunk_id}': {e}", exc_info=True)
             raise RuntimeError(f"Error al actualizar el fragmento: {e}")
     
+    def _touch_collection(self) -> None:
+        """
+        Registra en los metadatos de la colección el instante de la última modificación.
+
+        El microservicio RAG compara esta marca (junto con el nº de chunks) para invalidar sus cachés de
+        consultas cuando cambia la colección. Un fallo aquí no interrumpe la ingesta.
+        """
+        try:
+            collection = self.vector_store._collection
+            # Las claves "hnsw:*" no se pueden modificar una vez creada la colección
+            metadata = {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+            metadata[LAST_MODIFIED_KEY] = time.time()
+            collection.modify(metadata=metadata)
+        except Exception as e:
+            logger.warning(f"[VectorDBRepository] No se pudo registrar la modificación de la colección: {e}")
+
     def is_document_processed(self, document_name: str) -> bool:
         """
         Comprueba si un documento ya ha sido procesado buscando su nombre en los metadatos de la colección.
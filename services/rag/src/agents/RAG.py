@@ -4,12 +4,91 @@ from langchain_core.documents import Document
 # from src.embedders.sentence_transformers_embedders import Embedder
 from src.database.chromadb_repository import VectorDBRepository
 from src.llm.ollama_service import LLMClientOllama
+from src.cache.semantic_cache import SemanticCache
+from src.cache.query_cache import QueryCache
+from src.database.procedure_index import ProcedureNameIndex, normalize_tokens
 from langchain_core.prompts import PromptTemplate
-from typing import Optional, Union, List
+from typing import Optional, Union, List, AsyncIterator
 import json
+import re
+import hashlib
 # Obtiene un logger para el módulo actual
 logger = logging.getLogger(__name__)
 
+# Inicio de la lista de pasos en la respuesta JSON del LLM
+_STEPS_START = re.compile(r'"steps"\s*:\s*\[')
+
+def completed_steps(partial_answer: str) -> list[str]:
+    """
+    Extrae los pasos ya completos de una respuesta JSON del LLM que todavía se está generando.
+
+    Args:
+        partial_answer (str): Texto generado hasta el momento.
+
+    Returns:
+        list[str]: Pasos de la lista "steps" cuyo literal de texto ya está cerrado.
+    """
+    match = _STEPS_START.search(partial_answer)
+    if not match:
+        return []
+    decoder = json.JSONDecoder()
+    steps, pos = [], match.end()
+    while True:
+        while pos < len(partial_answer) and partial_answer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(partial_answer) or partial_answer[pos] != '"':
+            return steps
+        try:
+            step, pos = decoder.raw_decode(partial_answer, pos)
+        except json.JSONDecodeError:
+            # El literal aún no está cerrado
+            return steps
+        steps.append(step)
+
+# Secciones de un chunk de procedimiento (Chunker.chunk_pymupdf) que forman la respuesta estructurada
+_PROCEDURE_SECTIONS = {"CONDITIONS": "conditions", "STEPS": "steps", "NOTES": "notes"}
+# Marcadores de lista al inicio de una línea ("1.", "2)", "-", "•", "*")
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-•*])\s*")
+
+def parse_procedure_chunk(text: str) -> Optional[dict]:
+    """
+    Convierte un chunk de procedimiento (PROCEDURE / CONDITIONS / STEPS / NOTES) en la respuesta
+    estructurada que el prompt pide al LLM, sin invocarlo.
+
+    Las líneas sin marcador de lista dentro de una sección numerada se consideran continuación de la
+    línea anterior (texto partido al extraer el PDF).
+
+    Args:
+        text (str): Contenido del chunk.
+
+    Returns:
+        dict | None: {"procedure", "conditions", "steps", "notes"} o None si el chunk no tiene el formato
+        esperado o no contiene pasos.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or not lines[0].startswith("PROCEDURE:"):
+        return None
+    answer = {"procedure": lines[0][len("PROCEDURE:"):].strip(), "conditions": [], "steps": [], "notes": []}
+    section, numbered = None, False
+    for line in lines[1:]:
+        if line.endswith(":") and line[:-1].strip().upper() == line[:-1].strip():
+            section = _PROCEDURE_SECTIONS.get(line[:-1].strip())
+            numbered = False
+            continue
+        if section is None:
+            continue
+        items = answer[section]
+        has_marker = bool(_LIST_MARKER.match(line))
+        if not items:
+            numbered = has_marker
+        if items and numbered and not has_marker:
+            items[-1] = f"{items[-1]} {line}"
+        else:
+            items.append(_LIST_MARKER.sub("", line) if has_marker else line)
+    if not answer["procedure"] or not answer["steps"]:
+        return None
+    return answer
+
 class RAG:
     def __init__(
         self,
@@ -19,7 +98,12 @@ class RAG:
         output_no_context_answer: str,
         output_not_match_answer_context: str,
         search_type: Optional[str] = None,
-        search_kwargs: Optional[dict] = None
+        search_kwargs: Optional[dict] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        query_cache: Optional[QueryCache] = None,
+        procedure_index: Optional[ProcedureNameIndex] = None,
+        extractive_max_distance: Optional[float] = None,
+        extractive_min_margin: float = 0.15
     ) -> None:
         """
         Inicializa el RAG con los componentes necesarios.
@@ -30,6 +114,11 @@ class RAG:
             prompt (PromptTemplate): Prompt para el pipeline RAG.
             search_type (str, opcional): Tipo de búsqueda para el retriever ("similarity", "mmr", "similarity_score_threshold").
             search_kwargs (dict, opcional): Argumentos para el retriever (k, score_threshold, fetch_k, lambda_mult, filter, etc).
+            semantic_cache (SemanticCache, opcional): Caché de respuestas por similitud de la consulta y chunks recuperados.
+            query_cache (QueryCache, opcional): Caché exacta de recuperación y respuestas por texto normalizado de la consulta.
+            procedure_index (ProcedureNameIndex, opcional): Índice de nombres de procedimiento para resolver sin búsqueda vectorial las consultas que nombran uno.
+            extractive_max_distance (float, opcional): Distancia bruta máxima (métrica de la colección, menor = más parecido) del documento más cercano para responder de forma extractiva sin LLM (None = desactivado).
+            extractive_min_margin (float): Diferencia mínima de distancia bruta entre el documento más cercano y el siguiente procedimiento distinto.
 
         Returns:
             None: No se devuelven valores.
@@ -51,6 +140,17 @@ class RAG:
             self._search_kwargs = search_kwargs or {}
             self.output_no_context_answer = output_no_context_answer
             self.output_not_match_answer_context = output_not_match_answer_context
+            self.semantic_cache = semantic_cache
+            self.query_cache = query_cache
+            self.procedure_index = procedure_index
+            self.extractive_max_distance = extractive_max_distance
+            self.extractive_min_margin = extractive_min_margin
+            # Parámetros que forman parte de la clave de la caché exacta (incluida la versión del prompt)
+            self._query_params = {
+                "search_type": self._search_type,
+                "search_kwargs": self._search_kwargs,
+                "prompt": hashlib.sha256(self.prompt.template.encode()).hexdigest()[:16],
+            }
 
             logger.info("[RAG] Inicializado correctamente.")
         except Exception as e:
@@ -95,84 +195,425 @@ class RAG:
             logger.warning(f"[RAG] La respuesta no es un JSON válido: {e}")
             raise ValueError("La respuesta del modelo no es un JSON válido.")
         
-    def execute(self, query: str) -> str:
+    def _build_context(self, docs: list[tuple[Document, float]]) -> tuple[str, list[dict]]:
+        """
+        Construye el contexto para el prompt y para Streamlit a partir de los documentos recuperados.
+
+        Args:
+            docs (list[tuple[Document, float | None]]): Documentos recuperados con su distancia (None si se
+                resolvieron por nombre de procedimiento).
+
+        Returns:
+            tuple[str, list[dict]]: (contexto concatenado para el prompt, [{"content", "score"}] para Streamlit;
+            "score" es None en los documentos resueltos por nombre).
+        """
+        logger.debug(f"[RAG] Documentos recuperados: {len(docs)}")
+        # Concatena el contenido de los documentos
+        context_text = "\n<other_procedure>\n".join([doc.page_content for doc, _score in docs])
+        context_full_streamlit = []
+        for doc, _score in docs:
+            context_full_streamlit.append({
+                "content": doc.page_content,
+                "score": round(_score, 2) if _score is not None else None
+            })
+        return context_text, context_full_streamlit
+
+    def _parse_llm_result(self, content) -> Union[dict, str]:
+        """
+        Convierte la respuesta del LLM en un diccionario (o la deja como texto si no es un JSON válido).
+
+        Args:
+            content: Contenido del mensaje devuelto por el LLM.
+
+        Returns:
+            dict | str: Respuesta parseada.
+        """
+        logger.debug(f"[RAG] Respuesta del RAG:\n{content}")
+        try:
+            if isinstance(content, str):
+                # Eliminar comillas iniciales y finales si existen
+                cleaned_content = content.strip().strip("'")
+                logger.debug(f"[RAG] Respuesta limpia del RAG:\n{cleaned_content}")
+
+                # Intentar encapsular en un objeto JSON si no es válido
+                if not cleaned_content.startswith("{") and not cleaned_content.startswith("["):
+                    cleaned_content = "{" + cleaned_content + "}"
+
+                # Intentar cargar como JSON
+                return json.loads(cleaned_content)
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"[RAG] La respuesta del modelo no es un JSON válido: {e}")
+            return content.strip()
+
+    def _validate_query(self, query: str) -> None:
+        """
+        Comprueba que la consulta no esté vacía.
+
+        Raises:
+            ValueError: Si la consulta está vacía o es None.
+        """
+        logger.info(f"[RAG] Ejecutando RAG para la consulta: {query}")
+        if not query or not query.strip():
+            logger.error("[RAG] La consulta no puede estar vacía o ser None")
+            raise ValueError("La consulta no puede estar vacía o ser None")
+
+    def _no_context_result(self, query: str) -> dict:
+        """
+        Respuesta por defecto cuando no se recuperan documentos relevantes.
         """
-        Ejecuta el pipeline RAG para una consulta dada.
-        Aplica filtro dinámico en headings usando el LLM.
+        logger.warning("[RAG] No se encontraron documentos relevantes.")
+        return {
+            "input": query,
+            "context": None,
+            "answer": self.output_no_context_answer
+        }
+
+    def _query_key(self, query: str) -> Optional[str]:
+        """
+        Clave de la consulta en la caché exacta (None si la caché está desactivada).
+        """
+        if self.query_cache is None:
+            return None
+        return QueryCache.make_key(query, self._query_params)
+
+    def _exact_result(self, key: Optional[str]) -> Optional[dict]:
+        """
+        Devuelve la respuesta de la caché exacta para la clave, si la hay.
+
+        Returns:
+            dict | None: Resultado almacenado con "cache": "exact" o None si no hay acierto.
+        """
+        if key is None:
+            return None
+        result = self.query_cache.get_result(key)
+        if result is None:
+            return None
+        logger.info("[RAG] Respuesta servida desde la caché exacta (sin consultar ChromaDB ni el LLM)")
+        return {**result, "cache": "exact"}
+
+    def _lookup_procedure(self, query: str) -> Optional[list[tuple[Document, None]]]:
+        """
+        Resuelve la consulta por nombre de procedimiento, sin embedding ni búsqueda vectorial.
+
+        Los chunks no se comparan con la consulta, así que no tienen distancia: se devuelven con puntuación
+        None (nunca una distancia inventada) y el resultado se marca con "lookup": "procedure".
+
+        Returns:
+            list[tuple[Document, None]] | None: Chunks del procedimiento sin puntuación o None si la consulta
+            no nombra ningún procedimiento.
+        """
+        if self.procedure_index is None:
+            return None
+        docs = self.procedure_index.lookup(query)
+        if not docs:
+            return None
+        return [(doc, None) for doc in docs[:self._search_kwargs.get("k", 5)]]
+
+    @staticmethod
+    def _is_procedure_lookup(docs: list) -> bool:
+        """
+        True si los documentos se resolvieron por nombre de procedimiento (sin puntuación).
+        """
+        return bool(docs) and all(score is None for _doc, score in docs)
+
+    def _resolve_without_search(self, query: str, key: Optional[str]) -> Optional[tuple[Optional[List[float]], list]]:
+        """
+        Recuperación sin búsqueda vectorial, común a _search y _asearch: la recuperación guardada en la caché
+        exacta (si la colección no ha cambiado) o los chunks del procedimiento que nombra la consulta.
+
+        Returns:
+            tuple[list[float] | None, list] | None: (embedding o None, documentos) o None si hay que buscar en la base vectorial.
+        """
+        cached = self.query_cache.get_retrieval(key) if key is not None else None
+        if cached is not None:
+            return cached
+        procedure_docs = self._lookup_procedure(query)
+        if procedure_docs is not None:
+            return self._remember_retrieval(key, None, procedure_docs)
+        return None
+
+    def _remember_retrieval(self, key: Optional[str], embedding: Optional[List[float]], docs: list) -> tuple[Optional[List[float]], list]:
+        """
+        Guarda la recuperación en la caché exacta (si está activa) y la devuelve.
+        """
+        if key is not None:
+            self.query_cache.put_retrieval(key, embedding, docs)
+        return embedding, docs
+
+    def _search(self, query: str, key: Optional[str] = None) -> tuple[Optional[List[float]], list[tuple[Document, float]]]:
+        """
+        Recupera los documentos relevantes. Con la caché semántica activa se calcula primero el embedding
+        de la consulta (se reutiliza para la búsqueda y para la caché). Si la consulta ya se recuperó y la
+        colección no ha cambiado, se reutiliza la recuperación de la caché exacta. Si la consulta nombra un
+        procedimiento, se devuelven directamente sus chunks (sin embedding).
+
+        Args:
+            query (str): Consulta del usuario.
+            key (str, opcional): Clave de la consulta en la caché exacta.
+
+        Returns:
+            tuple[list[float] | None, list[tuple[Document, float]]]: (embedding de la consulta o None, documentos con puntuación).
+        """
+        resolved = self._resolve_without_search(query, key)
+        if resolved is not None:
+            return resolved
+        top_k = self._search_kwargs.get("k", 5)
+        if self.semantic_cache is None:
+            return self._remember_retrieval(key, None, self.vector_db.search(query=query, top_k=top_k, return_score=True))
+        embedding = self.vector_db.embed_query(query)
+        docs = self.vector_db.search(query=embedding, top_k=top_k, return_score=True, query_text=query)
+        return self._remember_retrieval(key, embedding, docs)
+
+    async def _asearch(self, query: str, key: Optional[str] = None) -> tuple[Optional[List[float]], list[tuple[Document, float]]]:
+        """
+        Versión asíncrona de _search (embedding y búsqueda fuera del event loop).
+        """
+        resolved = self._resolve_without_search(query, key)
+        if resolved is not None:
+            return resolved
+        top_k = self._search_kwargs.get("k", 5)
+        if self.semantic_cache is None:
+            return self._remember_retrieval(key, None, await self.vector_db.asearch(query=query, top_k=top_k, return_score=True))
+        embedding = await self.vector_db.aembed_query(query)
+        docs = await self.vector_db.asearch(query=embedding, top_k=top_k, return_score=True, query_text=query)
+        return self._remember_retrieval(key, embedding, docs)
+
+    def _cached_result(self, query: str, embedding: Optional[List[float]], docs: list, context_full_streamlit: list[dict]) -> Optional[dict]:
+        """
+        Devuelve la respuesta de la caché semántica para la consulta, si la hay.
+
+        Returns:
+            dict | None: {"input", "context", "answer", "cache": "semantic"} o None si no hay acierto.
+        """
+        if self.semantic_cache is None or embedding is None:
+            return None
+        answer = self.semantic_cache.get(embedding, SemanticCache.chunk_ids(docs))
+        if answer is None:
+            return None
+        logger.info("[RAG] Respuesta servida desde la caché semántica (sin invocar al LLM)")
+        return {"input": query, "context": context_full_streamlit, "answer": answer, "cache": "semantic"}
+
+    def _extractive_result(self, query: str, docs: list[tuple[Document, float]], context_full_streamlit: list[dict]) -> Optional[dict]:
+        """
+        Respuesta extractiva sin LLM cuando el documento más cercano es claramente el procedimiento buscado:
+        su distancia no supera extractive_max_distance y supera al siguiente procedimiento distinto en al
+        menos extractive_min_margin. Si la consulta se resolvió por nombre de procedimiento (sin distancias), solo
+        se responde de forma extractiva cuando la consulta es únicamente el nombre del procedimiento (sin tokens
+        ajenos a él, ver _names_only); en otro caso la pregunta puede pedir algo más concreto y responde el LLM.
+        El chunk se convierte directamente en {procedure, conditions, steps, notes}.
+
+        Las puntuaciones son siempre las distancias brutas de VectorDBRepository.search (métrica de la
+        colección, menor = más parecido), nunca la relevancia 1 / (1 + d) del retriever ni la puntuación de la
+        fusión híbrida. Como la búsqueda híbrida ordena por rango fusionado y no por distancia, el documento
+        más cercano y el siguiente procedimiento se eligen ordenando por distancia.
+
+        Returns:
+            dict | None: {"input", "context", "answer", "extractive": True} o None si no se cumplen las condiciones.
+        """
+        if self.extractive_max_distance is None or not docs:
+            return None
+        if self._is_procedure_lookup(docs):
+            # Sin distancias que comprobar: solo si la consulta no pide nada más que el procedimiento
+            if not self._names_only(query, docs[0][0]):
+                return None
+            answer = parse_procedure_chunk(docs[0][0].page_content)
+            if answer is None:
+                return None
+            logger.info(f"[RAG] Respuesta extractiva sin invocar al LLM (resuelta por nombre, procedimiento '{answer['procedure']}')")
+            return {**self.post_process_result(answer, query, context_full_streamlit), "extractive": True}
+        by_distance = sorted(docs, key=lambda item: item[1])
+        top_doc, top_distance = by_distance[0]
+        if top_distance > self.extractive_max_distance:
+            return None
+        top_procedure = (top_doc.metadata or {}).get("procedure")
+        runner_up = next(
+            (distance for doc, distance in by_distance[1:]
+             if top_procedure is None or (doc.metadata or {}).get("procedure") != top_procedure),
+            None
+        )
+        if runner_up is not None and runner_up - top_distance < self.extractive_min_margin:
+            return None
+        answer = parse_procedure_chunk(top_doc.page_content)
+        if answer is None:
+            return None
+        logger.info(f"[RAG] Respuesta extractiva sin invocar al LLM (distancia {top_distance:.3f}, procedimiento '{answer['procedure']}')")
+        return {**self.post_process_result(answer, query, context_full_streamlit), "extractive": True}
+
+    @staticmethod
+    def _names_only(query: str, doc: Document) -> bool:
+        """
+        True si la consulta consiste solo en el nombre del procedimiento del chunk (tokens normalizados, sin
+        palabras genéricas). ProcedureNameIndex ya comprobó que todos los tokens del nombre aparecen en la
+        consulta (con erratas admitidas), así que basta con que no sobre ninguno.
+        """
+        procedure = (doc.metadata or {}).get("procedure")
+        return bool(procedure) and len(normalize_tokens(query)) == len(normalize_tokens(procedure))
+
+    def _store_result(self, query: str, key: Optional[str], embedding: Optional[List[float]], docs: list, result: dict) -> dict:
+        """
+        Guarda el resultado en la caché exacta y, si es una respuesta estructurada generada por el LLM, en la
+        caché semántica. Devuelve el resultado (con "lookup": "procedure" si se resolvió por nombre).
+        """
+        if self._is_procedure_lookup(docs):
+            result = {**result, "lookup": "procedure"}
+        if key is not None:
+            self.query_cache.put_result(key, result)
+        if self.semantic_cache is not None and embedding is not None and "cache" not in result and not result.get("extractive") and isinstance(result.get("answer"), dict):
+            self.semantic_cache.put(query, embedding, SemanticCache.chunk_ids(docs), result["answer"])
+        return result
+
+    def _begin(self, query: str) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Primer paso común de execute, aexecute y astream: valida la consulta y consulta la caché exacta.
+
+        Returns:
+            tuple[str | None, dict | None]: (clave de la caché exacta, respuesta de la caché exacta o None).
+
+        Raises:
+            ValueError: Si la consulta está vacía o es None.
+        """
+        self._validate_query(query)
+        key = self._query_key(query)
+        return key, self._exact_result(key)
+
+    def _prepare(self, query: str, key: Optional[str], embedding: Optional[List[float]], docs: list) -> tuple[Optional[dict], str, list[dict]]:
+        """
+        Pasos comunes previos al LLM una vez recuperados los documentos: construye el contexto y resuelve,
+        sin invocar al LLM, las consultas sin documentos, las de la caché semántica y las extractivas.
+
+        Returns:
+            tuple[dict | None, str, list[dict]]: (resultado final, ya guardado en las cachés, o None si hay que
+            invocar al LLM; contexto para el prompt; contexto para Streamlit).
+        """
+        context_text, context_full_streamlit = self._build_context(docs)
+        if not context_text.strip():
+            return self._store_result(query, key, embedding, docs, self._no_context_result(query)), context_text, context_full_streamlit
+        result = self._cached_result(query, embedding, docs, context_full_streamlit)
+        if result is None:
+            result = self._extractive_result(query, docs, context_full_streamlit)
+        if result is not None:
+            result = self._store_result(query, key, embedding, docs, result)
+        else:
+            logger.debug(f"[RAG] Documentos: \n {context_text}")
+        return result, context_text, context_full_streamlit
+
+    def _complete(self, query: str, key: Optional[str], embedding: Optional[List[float]], docs: list, content, context_full_streamlit: list[dict]) -> dict:
+        """
+        Último paso común tras invocar al LLM: parsea y post-procesa la respuesta y la guarda en las cachés.
+        """
+        result_content = self._parse_llm_result(content)
+        return self._store_result(query, key, embedding, docs, self.post_process_result(result_content, query, context_full_streamlit))
+
+    def execute(self, query: str) -> dict:
+        """
+        Ejecuta el pipeline RAG para una consulta dada (versión síncrona).
 
         Args:
             query (str): Consulta a procesar por el pipeline RAG.
 
         Returns:
-            str: Respuesta generada por el pipeline RAG.
+            dict: {"input", "context", "answer"} generado por el pipeline RAG.
 
         Raises:
             ValueError: Si la consulta está vacía o es None.
             RuntimeError: Si ocurre un error durante la ejecución del pipeline.
         """
         try:
-            logger.info(f"[RAG] Ejecutando RAG para la consulta: {query}")
-            if not query or not query.strip():
-                logger.error("[RAG] La consulta no puede estar vacía o ser None")
-                raise ValueError("La consulta no puede estar vacía o ser None")
-            
+            key, exact = self._begin(query)
+            if exact is not None:
+                return exact
             # Recupera documentos relevantes
-            docs = self.vector_db.search(
-                query=query,
-                top_k=self._search_kwargs.get("k", 5),
-                # search_type=self._search_type,
-                # score_threshold=self._search_kwargs,
-                return_score=True
-            )
-            logger.debug(f"[RAG] Documentos recuperados: {len(docs)}")
-
-            # Concatena el contenido de los documentos
-            context_text = "\n<other_procedure>\n".join([doc.page_content for doc, _score in docs])
-            score_list = []
-            score_list.extend(round(_score, 2) for doc, _score in docs)
-            
-            context_full_streamlit = []
-            for doc, _score in docs:
-                context_full_streamlit.append({
-                    "content": doc.page_content,
-                    "score": round(_score, 2)
-                })
-
-            # Si no hay documentos, devuelve respuesta por defecto
-            if not context_text.strip():
-                logger.warning("[RAG] No se encontraron documentos relevantes.")
-                return {
-                    "input": query,
-                    "context": None,
-                    "answer": self.output_no_context_answer
-                }
-            
+            embedding, docs = self._search(query, key)
+            result, context_text, context_full_streamlit = self._prepare(query, key, embedding, docs)
+            if result is not None:
+                return result
+
             # Invocar el modelo LLM
-            logger.debug(f"[RAG] Documentos: \n {context_text}")
-            result = self.llm.client.invoke(self.prompt.format(input=query, context=context_text))
-            logger.debug(f"[RAG] Respuesta del RAG:\n{result}")
-
-            # Convertir result.content a un diccionario o manejarlo como string
-            try:
-                if isinstance(result.content, str):
-                    # Eliminar comillas iniciales y finales si existen
-                    cleaned_content = result.content.strip().strip("'")
-                    logger.debug(f"[RAG] Respuesta limpia del RAG:\n{cleaned_content}")
-                    
-                    # Intentar encapsular en un objeto JSON si no es válido
-                    if not cleaned_content.startswith("{") and not cleaned_content.startswith("["):
-                        cleaned_content = "{" + cleaned_content + "}"
-                    
-                    # Intentar cargar como JSON
-                    result_content = json.loads(cleaned_content)
-                else:
-                    result_content = json.loads(result.content)
-            except json.JSONDecodeError as e:
-                logger.error(f"[RAG] La respuesta del modelo no es un JSON válido: {e}")
-                result_content = result.content.strip()
-
-            # Post-procesar el resultado
-            return self.post_process_result(result_content, query, context_full_streamlit)
+            response = self.llm.client.invoke(self.prompt.format(input=query, context=context_text))
+            return self._complete(query, key, embedding, docs, response.content, context_full_streamlit)
         except Exception as e:
             logger.error(f"[RAG] Error en la ejecución: {e}", exc_info=True)
-            raise RuntimeError(f"Error en la ejecución del RAG: {e}")
\ No newline at end of file
+            raise RuntimeError(f"Error en la ejecución del RAG: {e}")
+
+    async def aexecute(self, query: str) -> dict:
+        """
+        Ejecuta el pipeline RAG para una consulta dada sin bloquear el event loop.
+
+        La búsqueda en ChromaDB (cliente HTTP síncrono + embedding de la consulta) se ejecuta en el pool
+        acotado del repositorio vectorial y la llamada al LLM usa ainvoke, de forma que el servicio puede
+        solapar varias consultas en curso y seguir atendiendo el resto de endpoints.
+
+        Args:
+            query (str): Consulta a procesar por el pipeline RAG.
+
+        Returns:
+            dict: {"input", "context", "answer"} generado por el pipeline RAG.
+
+        Raises:
+            ValueError: Si la consulta está vacía o es None.
+            RuntimeError: Si ocurre un error durante la ejecución del pipeline.
+        """
+        try:
+            key, exact = self._begin(query)
+            if exact is not None:
+                return exact
+            embedding, docs = await self._asearch(query, key)
+            result, context_text, context_full_streamlit = self._prepare(query, key, embedding, docs)
+            if result is not None:
+                return result
+            response = await self.llm.client.ainvoke(self.prompt.format(input=query, context=context_text))
+            return self._complete(query, key, embedding, docs, response.content, context_full_streamlit)
+        except Exception as e:
+            logger.error(f"[RAG] Error en la ejecución: {e}", exc_info=True)
+            raise RuntimeError(f"Error en la ejecución del RAG: {e}")
+
+    async def astream(self, query: str) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Ejecuta el pipeline RAG emitiendo eventos según están disponibles, para mostrar el contexto y los
+        primeros pasos del procedimiento sin esperar a que el LLM termine la respuesta completa.
+
+        Eventos (nombre, datos):
+            - ("context", {"input", "context"}): documentos recuperados, antes de invocar al LLM.
+            - ("token", {"text"}): fragmento de texto generado por el LLM.
+            - ("step", {"index", "text"}): paso del procedimiento ya completo en la respuesta parcial.
+            - ("answer", {"input", "context", "answer"}): resultado final, igual que execute().
+
+        Args:
+            query (str): Consulta a procesar por el pipeline RAG.
+
+        Yields:
+            tuple[str, dict]: (nombre del evento, datos).
+
+        Raises:
+            ValueError: Si la consulta está vacía o es None.
+            RuntimeError: Si ocurre un error durante la ejecución del pipeline.
+        """
+        try:
+            key, exact = self._begin(query)
+            if exact is not None:
+                yield "context", {"input": query, "context": exact["context"] or []}
+                yield "answer", exact
+                return
+            embedding, docs = await self._asearch(query, key)
+            result, context_text, context_full_streamlit = self._prepare(query, key, embedding, docs)
+            yield "context", {"input": query, "context": context_full_streamlit}
+            if result is not None:
+                yield "answer", result
+                return
+
+            chunks: list[str] = []
+            steps_sent = 0
+            async for chunk in self.llm.client.astream(self.prompt.format(input=query, context=context_text)):
+                if not isinstance(chunk.content, str) or not chunk.content:
+                    continue
+                chunks.append(chunk.content)
+                yield "token", {"text": chunk.content}
+                steps = completed_steps("".join(chunks))
+                for index in range(steps_sent, len(steps)):
+                    yield "step", {"index": index, "text": steps[index]}
+                steps_sent = len(steps)
+            yield "answer", self._complete(query, key, embedding, docs, "".join(chunks), context_full_streamlit)
+        except Exception as e:
+            logger.error(f"[RAG] Error en la ejecución (streaming): {e}", exc_info=True)
+            raise RuntimeError(f"Error en la ejecución del RAG: {e}")
@@ -142,3 +142,27 @@ class ReActAgentService:
             logger.error(f"[ReActAgentService] Error en la ejecución de agente ReAct: {e}", exc_info=True)
             raise RuntimeError(f"Error en la ejecución de agente ReAct: {e}")
 
+
+
+    async def aexecute(self, user_input: str) -> dict:
+        """
+        Ejecuta el agente ReAct sin bloquear el event loop (LLM con ainvoke; la herramienta de búsqueda,
+        síncrona, se ejecuta fuera del event loop).
+
+        Args:
+            user_input (str): Consulta del usuario a procesar por el agente.
+
+        Returns:
+            dict: Respuesta generada por el agente.
+
+        Raises:
+            RuntimeError: Si ocurre un error durante la ejecución del agente.
+        """
+        logger.info(f"[ReActAgentService] Ejecutando agente ReAct (async) para la consulta: {user_input[:100]}")
+        try:
+            result = await self.agent_executor.ainvoke({"input": user_input})
+            logger.debug(f"[ReActAgentService] Respuesta del Agente ReAct:\n{result}")
+            return result
+        except Exception as e:
+            logger.error(f"[ReActAgentService] Error en la ejecución de agente ReAct: {e}", exc_info=True)
+            raise RuntimeError(f"Error en la ejecución de agente ReAct: {e}")
@@ -11,14 +11,19 @@ setup_logger(level)
 logger = logging.getLogger(__name__)
 
 # --- FastAPI Application Setup ---
+import json
+import asyncio
 from fastapi import FastAPI, Request
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # --- Imports ---
 from src.embedders.sentence_transformers_embedders import Embedder
 from src.database.chromadb_repository import VectorDBRepository
 from src.agents.RAG import RAG
+from src.cache.semantic_cache import SemanticCache
+from src.cache.query_cache import QueryCache
+from src.database.procedure_index import ProcedureNameIndex
 from src.agents.ReActAgent import ReActAgentService
 from src.llm.ollama_service import LLMClientOllama
 from src.prompts.open_prompt import open_prompt
@@ -29,12 +34,33 @@ try:
 
     # Embedder
     embedder_name = config["VECTOR_DB"]["EMBEDDER_NAME"]
-    embedder = Embedder(model_name=embedder_name)
+    query_embeddings_cfg = config["RAG"].get("QUERY_EMBEDDINGS", {})
+    embedder = Embedder(
+        model_name=embedder_name,
+        cache_size=query_embeddings_cfg.get("CACHE_SIZE", 1024),
+        max_batch_size=query_embeddings_cfg.get("MAX_BATCH_SIZE", 16),
+        max_wait_ms=query_embeddings_cfg.get("MAX_WAIT_MS", 5)
+    )
     
     # Base de datos vectorial --> chromadb
     db_path = config["VECTOR_DB"]["URL"]
     collection_name = config["VECTOR_DB"]["COLLECTION_NAME"]
-    vector_db = VectorDBRepository(db_path=db_path, collection_name=collection_name, embedding_function=embedder)
+    concurrency_cfg = config["RAG"].get("CONCURRENCY", {})
+    local_index_cfg = config["RAG"].get("LOCAL_INDEX", {})
+    hybrid_cfg = config["RAG"].get("HYBRID_SEARCH", {})
+    vector_db = VectorDBRepository(
+        db_path=db_path,
+        collection_name=collection_name,
+        embedding_function=embedder,
+        max_concurrent_searches=concurrency_cfg.get("SEARCH_WORKERS", 4),
+        local_index=local_index_cfg.get("ENABLED", False),
+        local_index_refresh_seconds=local_index_cfg.get("REFRESH_SECONDS", 30),
+        hybrid_search=hybrid_cfg.get("ENABLED", False),
+        hybrid_refresh_seconds=hybrid_cfg.get("REFRESH_SECONDS", 30),
+        hybrid_weights=(hybrid_cfg.get("DENSE_WEIGHT", 1.0), hybrid_cfg.get("LEXICAL_WEIGHT", 1.0)),
+        rrf_k=hybrid_cfg.get("RRF_K", 60),
+        hybrid_candidates=hybrid_cfg.get("CANDIDATES_PER_RESULT", 4)
+    )
 
     # LLM
     base_url = config["LLM"]["URL"]
@@ -61,6 +87,40 @@ try:
     search_kwargs = config["RAG"]["SEARCH_KWARGS"]
     output_no_context_answer = config["RAG"]["OUTPUT_NO_CONTEXT_ANSWER"]
     output_not_match_answer_context = config["RAG"]["OUTPUT_NOT_MATCH_ANSWER_CONTEXT"]
+    # Caché semántica de respuestas (opcional)
+    semantic_cache_cfg = config["RAG"].get("SEMANTIC_CACHE", {})
+    semantic_cache = None
+    if semantic_cache_cfg.get("ENABLED", False):
+        semantic_cache = SemanticCache(
+            similarity_threshold=semantic_cache_cfg.get("SIMILARITY_THRESHOLD", 0.92),
+            max_entries=semantic_cache_cfg.get("MAX_ENTRIES", 256),
+            ttl_seconds=semantic_cache_cfg.get("TTL_SECONDS", 3600),
+            watcher=vector_db.collection_watcher,
+            refresh_seconds=semantic_cache_cfg.get("FINGERPRINT_REFRESH_SECONDS", 30)
+        )
+    # Caché exacta de recuperación/respuestas, invalidada al cambiar la colección (opcional)
+    query_cache_cfg = config["RAG"].get("QUERY_CACHE", {})
+    query_cache = None
+    if query_cache_cfg.get("ENABLED", False):
+        query_cache = QueryCache(
+            max_entries=query_cache_cfg.get("MAX_ENTRIES", 1024),
+            ttl_seconds=query_cache_cfg.get("TTL_SECONDS", 3600),
+            watcher=vector_db.collection_watcher,
+            refresh_seconds=query_cache_cfg.get("FINGERPRINT_REFRESH_SECONDS", 30),
+            cache_results=query_cache_cfg.get("CACHE_ANSWERS", True)
+        )
+    # Índice de nombres de procedimiento: consultas que nombran uno sin embedding ni búsqueda vectorial (opcional)
+    procedure_lookup_cfg = config["RAG"].get("PROCEDURE_LOOKUP", {})
+    procedure_index = None
+    if procedure_lookup_cfg.get("ENABLED", False):
+        procedure_index = ProcedureNameIndex(
+            watcher=vector_db.collection_watcher,
+            refresh_seconds=procedure_lookup_cfg.get("REFRESH_SECONDS", 30),
+            max_extra_tokens=procedure_lookup_cfg.get("MAX_EXTRA_TOKENS", 1),
+            min_ngram_similarity=procedure_lookup_cfg.get("MIN_NGRAM_SIMILARITY", 0.5)
+        )
+    # Respuesta extractiva sin LLM para procedimientos recuperados con alta confianza (opcional)
+    extractive_cfg = config["RAG"].get("EXTRACTIVE", {})
     rag_service = RAG(
         # embedder, 
         vector_db = vector_db,
@@ -69,9 +129,19 @@ try:
         output_no_context_answer = output_no_context_answer,
         output_not_match_answer_context = output_not_match_answer_context,
         search_type = search_type,
-        search_kwargs = search_kwargs
+        search_kwargs = search_kwargs,
+        semantic_cache = semantic_cache,
+        query_cache = query_cache,
+        procedure_index = procedure_index,
+        extractive_max_distance = extractive_cfg.get("MAX_DISTANCE", 0.5) if extractive_cfg.get("ENABLED", False) else None,
+        extractive_min_margin = extractive_cfg.get("MIN_MARGIN", 0.15)
     )
 
+    # Consultas RAG/ReAct en curso a la vez (el resto espera sin bloquear el event loop)
+    max_concurrent_queries = concurrency_cfg.get("MAX_CONCURRENT_QUERIES", 8)
+    query_semaphore = asyncio.Semaphore(max_concurrent_queries)
+    logger.info(f"Consultas simultáneas admitidas: {max_concurrent_queries}")
+
 except Exception as e:
     logger.error(f"Error al inicializar las dependencias de la aplicación: {str(e)}", exc_info=True)
     raise RuntimeError(f"Application initialization failed: {str(e)}")
@@ -127,7 +197,8 @@ async def receive_asr_rag_result(request: Request) -> JSONResponse:
 
     # Execute RAG
     try:
-        rag_result = rag_service.execute(query = transcription)
+        async with query_semaphore:
+            rag_result = await rag_service.aexecute(query = transcription)
         last_rag_result = rag_result
         if not rag_result:
             logger.warning("La ejecución de RAG devolvió un resultado vacío")
@@ -159,6 +230,68 @@ async def receive_asr_rag_result(request: Request) -> JSONResponse:
             content={"status": "processing_error", "message": f"RAG execution failed: {str(e)}", "response": None}
         )
 
+# POST: procesa una transcripción y devuelve la respuesta del RAG en streaming (Server-Sent Events)
+@app.post("/rag_result_stream")
+async def stream_asr_rag_result(request: Request) -> StreamingResponse | JSONResponse:
+    """
+    Procesa una transcripción y ejecuta el pipeline RAG devolviendo eventos SSE según están disponibles:
+    primero el contexto recuperado, después los fragmentos generados por el LLM ("token") y los pasos del
+    procedimiento ya completos ("step"), y por último la respuesta final ("answer") con el mismo "status" y
+    "response" que /rag_result. Si falla la ejecución se emite un evento "error".
+
+    Args:
+        request (Request): Solicitud HTTP con el JSON que contiene la transcripción.
+
+    Returns:
+        StreamingResponse | JSONResponse: Flujo text/event-stream o el error de validación correspondiente.
+    """
+    try:
+        data = await request.json()
+        logger.debug(f"Datos recibidos para streaming: {data}")
+    except Exception as e:
+        logger.error(f"Error al parsear el JSON de la solicitud: {str(e)}")
+        return JSONResponse(
+            status_code=400,
+            content={"status": "json_error", "message": "Invalid JSON in request body", "response": None}
+        )
+
+    transcription = data.get("transcription", "")
+    if not transcription or not transcription.strip():
+        logger.warning("Se recibió una transcripción vacía")
+        return JSONResponse(
+            status_code=400,
+            content={"status": "validation_error", "message": "Transcription cannot be empty", "response": None}
+        )
+    logger.info(f"Procesando transcripción (streaming): {transcription[:100]}...")
+
+    def sse(event: str, payload: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def stream_events():
+        global last_rag_result
+        async with query_semaphore:
+            try:
+                async for event, payload in rag_service.astream(query=transcription):
+                    if event == "answer":
+                        last_rag_result = payload
+                        if not payload.get("context"):
+                            status = "no_results"
+                        elif payload.get("answer") == output_not_match_answer_context:
+                            status = "no_match"
+                        else:
+                            status = "success"
+                        payload = {"status": status, "response": payload}
+                    yield sse(event, payload)
+            except Exception as e:
+                logger.error(f"Error en la ejecución de RAG (streaming): {str(e)}", exc_info=True)
+                yield sse("error", {"status": "processing_error", "message": f"RAG execution failed: {str(e)}", "response": None})
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # POST: recibe el resultado de ASR y lo procesa por un agente ReAct
 @app.post("/react_agent_result")
 async def receive_asr_react_agent_result(request: Request) -> JSONResponse:
@@ -199,7 +332,8 @@ async def receive_asr_react_agent_result(request: Request) -> JSONResponse:
         
         # Execute React Agent
         try:
-            react_agent_result = react_agent_service.execute(transcription)
+            async with query_semaphore:
+                react_agent_result = await react_agent_service.aexecute(transcription)
             if not react_agent_result["output"]:
                 logger.warning("La ejecución de React Agent devolvió un resultado vacío")
                 return JSONResponse(
@@ -294,6 +428,34 @@ def get_rag_last_result() -> JSONResponse:
             content={"status": "error", "message": f"Failed to retrieve last result: {str(e)}", "response": None}
         )
 
+@app.get("/metrics")
+def metrics() -> JSONResponse:
+    """
+    Endpoint de métricas del servicio RAG.
+
+    Returns:
+        JSONResponse: Métricas de las cachés del pipeline RAG y del embedder de consultas.
+    """
+    try:
+        return JSONResponse(
+            status_code=200,
+            content={"status": "success", "metrics": {
+                "semantic_cache": semantic_cache.metrics() if semantic_cache is not None else None,
+                "query_cache": query_cache.metrics() if query_cache is not None else None,
+                "query_embeddings": embedder.metrics(),
+                "local_index": vector_db.local_index.metrics() if vector_db.local_index is not None else None,
+                "lexical_index": vector_db.lexical_index.metrics() if vector_db.lexical_index is not None else None,
+                "procedure_lookup": procedure_index.metrics() if procedure_index is not None else None,
+                "collection_watcher": vector_db.collection_watcher.metrics()
+            }}
+        )
+    except Exception as e:
+        logger.error(f"Error al obtener las métricas: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={"status": "error", "message": f"Failed to retrieve metrics: {str(e)}"}
+        )
+
 @app.get("/health")
 def health() -> JSONResponse:
     """
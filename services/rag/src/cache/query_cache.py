@@ -0,0 +1,201 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from src.database.collection_watcher import CollectionWatcher
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Caché exacta de recuperación y respuestas del RAG.
+
+    La clave es el texto normalizado de la consulta junto con los parámetros de búsqueda (k, filtros,
+    versión del prompt). Para cada clave se guardan los chunks recuperados con su puntuación (y el embedding
+    de la consulta) y, cuando existe, la respuesta final, de modo que las consultas idénticas repetidas
+    (reruns de Streamlit, reintentos) no vuelven a llegar a ChromaDB ni a Ollama.
+
+    Las entradas se invalidan automáticamente cuando la ingesta modifica la colección: la caché se suscribe
+    al CollectionWatcher compartido y se vacía cuando cambia la huella de la colección (nº de chunks + marca
+    de última modificación). Tamaño acotado con expulsión LRU y caducidad por TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        watcher: Optional[CollectionWatcher] = None,
+        refresh_seconds: float = 30,
+        cache_results: bool = True
+    ) -> None:
+        """
+        Inicializa la caché y, si se indica watcher, la suscribe a los cambios de la colección.
+
+        Args:
+            max_entries (int): Nº máximo de consultas almacenadas (LRU).
+            ttl_seconds (float): Vida máxima de una entrada en segundos (0 = sin caducidad).
+            watcher (CollectionWatcher, opcional): Vigilante compartido de la colección.
+            refresh_seconds (float): Intervalo de comprobación de la huella.
+            cache_results (bool): Si es False solo se almacena la recuperación (cada consulta vuelve a invocar al LLM).
+
+        Returns:
+            None
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = refresh_seconds
+        self.cache_results = cache_results
+        # clave -> {"retrieval": (embedding, docs) | None, "result": dict | None, "created": float}
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._counters = {"retrieval_hits": 0, "result_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+        if watcher is not None:
+            try:
+                self._fingerprint = watcher.fingerprint()
+            except Exception as e:
+                logger.warning(f"[QueryCache] No se pudo obtener la huella de la colección: {e}")
+            watcher.subscribe("query_cache", self._on_collection_change, refresh_seconds, fingerprint=self._fingerprint)
+        logger.info(f"[QueryCache] Iniciada (max_entries={self.max_entries}, ttl={ttl_seconds} s, refresco de huella cada {refresh_seconds} s)")
+
+    @staticmethod
+    def make_key(query: str, params: dict) -> str:
+        """
+        Calcula la clave de una consulta.
+
+        El texto se normaliza (minúsculas, espacios colapsados, sin puntuación final) para que variaciones
+        triviales de la misma consulta compartan entrada.
+
+        Args:
+            query (str): Texto de la consulta.
+            params (dict): Parámetros que afectan al resultado (k, filtros, versión del prompt...).
+
+        Returns:
+            str: Clave hexadecimal.
+        """
+        normalized = re.sub(r"\s+", " ", query.strip().lower()).rstrip(" ?.!")
+        payload = json.dumps({"query": normalized, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_retrieval(self, key: str) -> Optional[tuple]:
+        """
+        Devuelve la recuperación almacenada para una clave.
+
+        Args:
+            key (str): Clave calculada con make_key().
+
+        Returns:
+            tuple | None: (embedding de la consulta o None, documentos con puntuación) o None si no existe.
+        """
+        entry = self._lookup(key, "retrieval")
+        if entry is None:
+            return None
+        self._count("retrieval_hits")
+        return entry
+
+    def get_result(self, key: str) -> Optional[dict]:
+        """
+        Devuelve la respuesta final almacenada para una clave.
+
+        Args:
+            key (str): Clave calculada con make_key().
+
+        Returns:
+            dict | None: Resultado del RAG o None si no existe.
+        """
+        entry = self._lookup(key, "result") if self.cache_results else None
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("result_hits")
+        return entry
+
+    def put_retrieval(self, key: str, embedding: Optional[list[float]], docs: list) -> None:
+        """
+        Guarda los chunks recuperados (y el embedding) de una consulta.
+        """
+        self._store(key, "retrieval", (embedding, docs))
+
+    def put_result(self, key: str, result: dict) -> None:
+        """
+        Guarda la respuesta final de una consulta.
+        """
+        if self.cache_results:
+            self._store(key, "result", result)
+
+    def invalidate(self) -> None:
+        """
+        Vacía la caché.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._counters["invalidations"] += 1
+
+    def _lookup(self, key: str, field: str) -> Optional[Any]:
+        """
+        Busca un campo de una entrada vigente (actualiza el orden LRU).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[field] is None:
+                return None
+            if self.ttl_seconds and time.time() - entry["created"] > self.ttl_seconds:
+                del self._entries[key]
+                self._counters["expired"] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[field]
+
+    def _store(self, key: str, field: str, value: Any) -> None:
+        """
+        Inserta un campo en la entrada de una clave expulsando la menos usada si se supera el tamaño.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"retrieval": None, "result": None, "created": time.time()}
+                self._entries[key] = entry
+            entry[field] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _count(self, name: str) -> None:
+        """
+        Incrementa un contador.
+        """
+        with self._lock:
+            self._counters[name] += 1
+
+    def _on_collection_change(self, fingerprint: str) -> None:
+        """
+        Vacía la caché cuando el CollectionWatcher notifica una nueva huella de la colección.
+        """
+        logger.info(f"[QueryCache] La colección ha cambiado ({self._fingerprint} -> {fingerprint}); se invalida la caché")
+        self.invalidate()
+        self._fingerprint = fingerprint
+
+    def metrics(self) -> dict:
+        """
+        Devuelve los contadores de la caché.
+
+        Returns:
+            dict: Aciertos de recuperación y de respuesta, fallos, tasa de acierto, entradas, expulsiones,
+            caducadas, invalidaciones y huella vigente de la colección.
+        """
+        with self._lock:
+            lookups = self._counters["result_hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(self._counters["result_hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "fingerprint": self._fingerprint,
+            }
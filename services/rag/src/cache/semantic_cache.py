@@ -0,0 +1,196 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.database.collection_watcher import CollectionWatcher
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Caché semántica de respuestas del RAG.
+
+    Los pilotos repiten las mismas consultas con distintas palabras ("manual landing procedure",
+    "how do I land manually"). Una consulta acierta si su embedding tiene una similitud coseno con el de
+    una consulta ya respondida por encima del umbral y, además, la búsqueda ha recuperado exactamente los
+    mismos chunks; en ese caso se devuelve la respuesta almacenada sin invocar al LLM. Comprobar los chunks
+    evita servir la respuesta de otro procedimiento a una consulta parecida.
+
+    Los ids de los chunks no cambian cuando la ingesta actualiza un chunk en el sitio, así que la comparación
+    de ids no basta para detectar respuestas obsoletas: igual que QueryCache, la caché se suscribe al
+    CollectionWatcher compartido y se vacía cuando cambia la huella de la colección. Tamaño acotado con
+    expulsión LRU y caducidad por TTL.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        watcher: Optional[CollectionWatcher] = None,
+        refresh_seconds: float = 30
+    ) -> None:
+        """
+        Inicializa la caché y, si se indica watcher, la suscribe a los cambios de la colección.
+
+        Args:
+            similarity_threshold (float): Similitud coseno mínima entre consultas para considerar un acierto.
+            max_entries (int): Nº máximo de respuestas almacenadas (LRU).
+            ttl_seconds (float): Vida máxima de una entrada en segundos (0 = sin caducidad).
+            watcher (CollectionWatcher, opcional): Vigilante compartido de la colección.
+            refresh_seconds (float): Intervalo de comprobación de la huella.
+
+        Returns:
+            None
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        # clave -> (embedding normalizado, ids de chunks, respuesta, instante de inserción)
+        self._entries: "OrderedDict[str, tuple[np.ndarray, tuple[str, ...], Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidations = 0
+        self._fingerprint: Optional[str] = None
+        if watcher is not None:
+            try:
+                self._fingerprint = watcher.fingerprint()
+            except Exception as e:
+                logger.warning(f"[SemanticCache] No se pudo obtener la huella de la colección: {e}")
+            watcher.subscribe("semantic_cache", self._on_collection_change, refresh_seconds, fingerprint=self._fingerprint)
+        logger.info(f"[SemanticCache] Iniciada (umbral={similarity_threshold}, max_entries={self.max_entries}, ttl={ttl_seconds} s)")
+
+    @staticmethod
+    def chunk_ids(docs: list[tuple[Document, float]]) -> tuple[str, ...]:
+        """
+        Identificadores de los chunks recuperados (id de ChromaDB o, si no lo hay, hash del contenido).
+
+        Args:
+            docs (list[tuple[Document, float]]): Documentos recuperados con su puntuación.
+
+        Returns:
+            tuple[str, ...]: Identificadores en el orden de recuperación.
+        """
+        return tuple(
+            doc.id or hashlib.sha256(doc.page_content.encode()).hexdigest()
+            for doc, _score in docs
+        )
+
+    @staticmethod
+    def _normalize(embedding: list[float]) -> np.ndarray:
+        """
+        Convierte el embedding a un vector float32 de norma 1.
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, embedding: list[float], chunk_ids: tuple[str, ...]) -> Optional[Any]:
+        """
+        Busca la respuesta de una consulta semánticamente equivalente con los mismos chunks recuperados.
+
+        Args:
+            embedding (list[float]): Embedding de la consulta.
+            chunk_ids (tuple[str, ...]): Chunks recuperados para la consulta.
+
+        Returns:
+            Any | None: Respuesta almacenada o None si no hay acierto.
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            self._purge_expired()
+            best_key, best_similarity = None, self.similarity_threshold
+            for key, (vector, ids, _value, _created) in self._entries.items():
+                if ids != chunk_ids or vector.shape != query.shape:
+                    continue
+                similarity = float(np.dot(vector, query))
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+            if best_key is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._hits += 1
+            logger.info(f"[SemanticCache] Acierto (similitud {best_similarity:.3f})")
+            return self._entries[best_key][2]
+
+    def put(self, query: str, embedding: list[float], chunk_ids: tuple[str, ...], value: Any) -> None:
+        """
+        Guarda la respuesta de una consulta.
+
+        Args:
+            query (str): Texto de la consulta (una consulta repetida sustituye a la entrada anterior).
+            embedding (list[float]): Embedding de la consulta.
+            chunk_ids (tuple[str, ...]): Chunks recuperados para la consulta.
+            value (Any): Respuesta del RAG.
+
+        Returns:
+            None
+        """
+        key = hashlib.sha256(query.strip().lower().encode()).hexdigest()
+        with self._lock:
+            self._entries[key] = (self._normalize(embedding), chunk_ids, value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self) -> None:
+        """
+        Vacía la caché.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def _on_collection_change(self, fingerprint: str) -> None:
+        """
+        Vacía la caché cuando el CollectionWatcher notifica una nueva huella de la colección.
+        """
+        logger.info(f"[SemanticCache] La colección ha cambiado ({self._fingerprint} -> {fingerprint}); se invalida la caché")
+        self.invalidate()
+        self._fingerprint = fingerprint
+
+    def _purge_expired(self) -> None:
+        """
+        Elimina las entradas caducadas (llamar con el lock tomado).
+        """
+        if not self.ttl_seconds:
+            return
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        self._expired += len(expired)
+
+    def metrics(self) -> dict:
+        """
+        Devuelve los contadores de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, tasa de acierto, entradas, expulsiones LRU, caducadas, invalidaciones y
+            huella vigente de la colección.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self._evictions,
+                "expired": self._expired,
+                "invalidations": self._invalidations,
+                "fingerprint": self._fingerprint,
+            }
@@ -0,0 +1,216 @@
+import re
+import math
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from src.database.collection_watcher import CollectionWatcher, content_digest
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+# Tokens alfanuméricos: conserva siglas y designadores ("apu", "adirs", "eng", "1", "fire")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Divide un texto en tokens léxicos en minúsculas.
+
+    Args:
+        text (str): Texto a tokenizar.
+
+    Returns:
+        list[str]: Tokens en orden de aparición.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 sobre el texto de los chunks de la colección de ChromaDB.
+
+    Las consultas de procedimientos contienen tokens exactos ("APU", "ADIRS", "ENG 1 FIRE") que la
+    similitud densa a veces ordena mal; la puntuación léxica se fusiona con la densa en
+    VectorDBRepository.search. El índice se suscribe al CollectionWatcher compartido: cuando la huella
+    de la colección cambia, compara la huella de contenido de cada chunk (CollectionWatcher.diff), vuelve
+    a indexar los chunks nuevos o actualizados en el sitio y retira los borrados.
+    """
+
+    def __init__(
+        self,
+        watcher: CollectionWatcher,
+        refresh_seconds: float = 30,
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> None:
+        """
+        Inicializa el índice, realiza la carga inicial y lo suscribe a los cambios de la colección.
+
+        Args:
+            watcher (CollectionWatcher): Vigilante compartido de la colección (huella y descarga paginada).
+            refresh_seconds (float): Intervalo de comprobación de la huella.
+            k1 (float): Saturación de la frecuencia de término de BM25.
+            b (float): Normalización por longitud del chunk de BM25.
+
+        Returns:
+            None
+        """
+        self.watcher = watcher
+        self.refresh_seconds = refresh_seconds
+        self.k1 = k1
+        self.b = b
+        # término -> {id del chunk: frecuencia}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Document] = {}
+        self._digests: Dict[str, str] = {}
+        self._total_length = 0
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._counters = {"searches": 0, "full_loads": 0, "incremental_syncs": 0, "sync_errors": 0}
+        self.sync()
+        watcher.subscribe("lexical_index", self.sync, refresh_seconds, fingerprint=self._fingerprint)
+
+    @property
+    def ready(self) -> bool:
+        """
+        True si el índice se ha sincronizado al menos una vez.
+        """
+        return self._fingerprint is not None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _add(self, chunk_id: str, text: str, metadata: Optional[dict], digest: str) -> None:
+        """
+        Indexa un chunk (llamar con el lock tomado).
+        """
+        tokens = tokenize(text or "")
+        for term, tf in Counter(tokens).items():
+            self._postings.setdefault(term, {})[chunk_id] = tf
+        self._lengths[chunk_id] = len(tokens)
+        self._total_length += len(tokens)
+        self._documents[chunk_id] = Document(id=chunk_id, page_content=text or "", metadata=metadata or {})
+        self._digests[chunk_id] = digest
+
+    def _remove(self, chunk_id: str) -> None:
+        """
+        Retira un chunk del índice (llamar con el lock tomado).
+        """
+        document = self._documents.pop(chunk_id)
+        del self._digests[chunk_id]
+        for term in set(tokenize(document.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id)
+
+    def sync(self, fingerprint: Optional[str] = None) -> None:
+        """
+        Sincroniza el índice con la colección si su huella ha cambiado.
+
+        Args:
+            fingerprint (str, opcional): Huella actual notificada por el CollectionWatcher; None para consultarla.
+
+        Raises:
+            RuntimeError: Si falla la carga inicial.
+            Exception: Si falla una resincronización (se mantiene la versión anterior y el vigilante la reintenta).
+        """
+        with self._sync_lock:
+            try:
+                fingerprint = fingerprint if fingerprint is not None else self.watcher.fingerprint()
+                if fingerprint == self._fingerprint:
+                    return
+                start = time.perf_counter()
+                include = ["documents", "metadatas"]
+                if not self.ready:
+                    fetched = self.watcher.fetch(include)
+                    with self._lock:
+                        self._postings, self._lengths, self._documents, self._digests, self._total_length = {}, {}, {}, {}, 0
+                        for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                            self._add(chunk_id, text, metadata, content_digest(text, metadata))
+                        self._counters["full_loads"] += 1
+                    mode = "carga completa"
+                else:
+                    # Chunks nuevos o actualizados en el sitio (huella de contenido distinta) y borrados
+                    with self._lock:
+                        local_digests = dict(self._digests)
+                    fetched, removed = self.watcher.diff(local_digests, include)
+                    updated = sum(1 for chunk_id in fetched["ids"] if chunk_id in local_digests)
+                    with self._lock:
+                        for chunk_id in removed | set(fetched["ids"]):
+                            if chunk_id in self._documents:
+                                self._remove(chunk_id)
+                        for chunk_id, digest, text, metadata in zip(fetched["ids"], fetched["digests"], fetched["documents"], fetched["metadatas"]):
+                            self._add(chunk_id, text, metadata, digest)
+                        self._counters["incremental_syncs"] += 1
+                    mode = f"incremental (+{len(fetched['ids']) - updated}, ~{updated}, -{len(removed)})"
+                self._fingerprint = fingerprint
+                logger.info(f"[BM25Index] Sincronizado ({mode}): {len(self)} chunks, {len(self._postings)} términos, {time.perf_counter() - start:.2f} s")
+            except Exception as e:
+                with self._lock:
+                    self._counters["sync_errors"] += 1
+                if not self.ready:
+                    logger.error(f"[BM25Index] Error en la carga inicial: {e}", exc_info=True)
+                    raise RuntimeError(f"No se pudo cargar el índice BM25: {e}")
+                logger.warning(f"[BM25Index] Error al resincronizar (se mantiene la versión anterior): {e}")
+                raise
+
+    def search(self, query: str, top_k: int = 5) -> List[tuple[str, float]]:
+        """
+        Devuelve los chunks con mayor puntuación BM25 para la consulta.
+
+        Args:
+            query (str): Texto de la consulta.
+            top_k (int): Nº de chunks a devolver.
+
+        Returns:
+            List[tuple[str, float]]: (id del chunk, puntuación BM25) ordenados de mayor a menor; solo chunks
+            que contienen algún término de la consulta.
+        """
+        terms = set(tokenize(query))
+        scores: Dict[str, float] = {}
+        with self._lock:
+            self._counters["searches"] += 1
+            n = len(self._documents)
+            if not n or not terms:
+                return []
+            avg_length = self._total_length / n
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def document(self, chunk_id: str) -> Optional[Document]:
+        """
+        Devuelve el chunk indexado con el id indicado.
+        """
+        return self._documents.get(chunk_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado del índice.
+
+        Returns:
+            Dict[str, Any]: Nº de chunks y términos, huella, búsquedas y sincronizaciones.
+        """
+        with self._lock:
+            return {
+                "chunks": len(self._documents),
+                "terms": len(self._postings),
+                "fingerprint": self._fingerprint,
+                **self._counters,
+            }
@@ -1,5 +1,11 @@
 import logging
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from src.embedders.sentence_transformers_embedders import Embedder
+from src.database.local_vector_index import LocalVectorIndex, collection_space, prepare_matrix, pairwise_distances
+from src.database.bm25_index import BM25Index
+from src.database.collection_watcher import CollectionWatcher
 from typing import Dict, List, Optional, Union, Any
 from langchain_chroma.vectorstores import Chroma
 from langchain_core.documents import Document
@@ -12,7 +18,20 @@ class VectorDBRepository:
     """
     Repositorio para gestionar la base de datos vectorial.
     """
-    def __init__(self, db_path: str, collection_name: str, embedding_function: Embedder) -> None:
+    def __init__(
+        self,
+        db_path: str,
+        collection_name: str,
+        embedding_function: Embedder,
+        max_concurrent_searches: int = 4,
+        local_index: bool = False,
+        local_index_refresh_seconds: float = 30,
+        hybrid_search: bool = False,
+        hybrid_refresh_seconds: float = 30,
+        hybrid_weights: tuple[float, float] = (1.0, 1.0),
+        rrf_k: int = 60,
+        hybrid_candidates: int = 4
+    ) -> None:
         """
         Inicializa el repositorio vectorial conectando con ChromaDB como microservicio HTTP y la colección indicada.
 
@@ -20,6 +39,14 @@ class VectorDBRepository:
             db_path (str): URL HTTP del microservicio ChromaDB.
             collection_name (str): Nombre de la colección de ChromaDB.
             embedding_function (Embedder): Objeto para generar embeddings.
+            max_concurrent_searches (int): Búsquedas simultáneas fuera del event loop (asearch).
+            local_index (bool): Si es True, las búsquedas sin filtros se resuelven con una réplica en memoria de la colección.
+            local_index_refresh_seconds (float): Intervalo de comprobación de cambios en la colección para resincronizar la réplica.
+            hybrid_search (bool): Si es True, las búsquedas sin filtros fusionan la similitud densa con un índice BM25 sobre el texto de los chunks.
+            hybrid_refresh_seconds (float): Intervalo de comprobación de cambios en la colección para resincronizar el índice BM25.
+            hybrid_weights (tuple[float, float]): Pesos (denso, léxico) de la fusión por rango recíproco.
+            rrf_k (int): Constante k de la fusión por rango recíproco (1 / (k + rango)).
+            hybrid_candidates (int): Candidatos de cada recuperador por documento devuelto (top_k * hybrid_candidates).
         
         Returns:
             None: No se devuelven valores. 
@@ -47,6 +74,30 @@ class VectorDBRepository:
                 create_collection_if_not_exists=False, # Aqui no interesa crear una colección ya que se asume que ya existe y solo se realizan consultas
                 relevance_score_fn=custom_relevance_score_fn
             )
+            self.collection_name = collection_name
+            self.embedding_function = embedding_function
+            # El cliente HTTP de Chroma es síncrono: las búsquedas asíncronas se ejecutan en un pool acotado
+            self._search_executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent_searches), thread_name_prefix="rag-search")
+            # Vigilancia de la colección compartida por los índices en memoria y las cachés
+            self.collection_watcher = CollectionWatcher(
+                collection_fn=lambda: self.vector_store._client.get_collection(collection_name),
+                fingerprint_fn=self.fingerprint
+            )
+            self.local_index: Optional[LocalVectorIndex] = None
+            if local_index:
+                self.local_index = LocalVectorIndex(
+                    watcher=self.collection_watcher,
+                    refresh_seconds=local_index_refresh_seconds
+                )
+            self.lexical_index: Optional[BM25Index] = None
+            self.hybrid_weights = hybrid_weights
+            self.rrf_k = rrf_k
+            self.hybrid_candidates = max(1, int(hybrid_candidates))
+            if hybrid_search:
+                self.lexical_index = BM25Index(
+                    watcher=self.collection_watcher,
+                    refresh_seconds=hybrid_refresh_seconds
+                )
             logger.info(f"[VectorDBRepository] Conectado a ChromaDB remoto en '{db_path}'")
         except Exception as e:
             logger.error(f"[VectorDBRepository] Error al inicializar: {e}", exc_info=True)
@@ -59,17 +110,24 @@ class VectorDBRepository:
         filter: Optional[Dict[str, Any]] = None,
         where_document: Optional[Dict[str, Any]] = None,
         return_score: bool = False,
+        query_text: Optional[str] = None,
         **kwargs
     ) -> Union[List[Document], List[tuple[Document, float]]]:
         """
         Realiza una búsqueda unificada por texto o embedding en la base de datos vectorial.
 
+        Con la réplica en memoria activa, las búsquedas sin filtros no salen del proceso (mismas distancias
+        brutas que la consulta a ChromaDB); las búsquedas con filtros siguen yendo al microservicio. Con la búsqueda híbrida
+        activa, las búsquedas sin filtros con texto disponible fusionan los rankings denso y BM25.
+
         Args:
             query (str | List[float]): Texto de consulta o embedding.
             top_k (int, opcional): Número de documentos a devolver. Por defecto 5.
             filter (dict, opcional): Filtro por metadatos.
             where_document (dict, opcional): Filtro por contenido del documento.
-            return_score (bool, opcional): Si es True, devuelve también la puntuación de similitud.
+            return_score (bool, opcional): Si es True, devuelve también la distancia de cada documento (métrica de la
+                colección, menor = más parecido), tanto si la consulta es texto como si es un embedding.
+            query_text (str, opcional): Texto de la consulta cuando query es un embedding (para la parte léxica de la búsqueda híbrida).
             **kwargs: Otros argumentos adicionales para la búsqueda.
 
         Returns:
@@ -79,6 +137,22 @@ class VectorDBRepository:
             RuntimeError: Si ocurre un error durante la búsqueda.
         """
         try:
+            # Busqueda híbrida (densa + BM25)
+            text = query if isinstance(query, str) else query_text
+            if self.lexical_index is not None and text and filter is None and where_document is None and not kwargs:
+                results = self._hybrid_search(query, text, top_k)
+                if not return_score:
+                    results = [doc for doc, _score in results]
+                logger.info(f"[VectorDBRepository] Búsqueda híbrida realizada correctamente. Resultados: {len(results)} documentos encontrados.")
+                return results
+            # Busqueda en la réplica en memoria
+            if self.local_index is not None and filter is None and where_document is None and not kwargs:
+                embedding = self.embedding_function.embed_query(query) if isinstance(query, str) else query
+                results = self.local_index.search(embedding, top_k=top_k)
+                if not return_score:
+                    results = [doc for doc, _score in results]
+                logger.info(f"[VectorDBRepository] Búsqueda en el índice local realizada correctamente. Resultados: {len(results)} documentos encontrados.")
+                return results
             # Busqueda por texto
             if isinstance(query, str):
                 if return_score:
@@ -92,9 +166,7 @@ class VectorDBRepository:
             # Busqueda por embedding
             else:
                 if return_score:
-                    results = self.vector_store.similarity_search_by_vector_with_relevance_scores(
-                        embedding=query, k=top_k, filter=filter, where_document=where_document, **kwargs
-                    )
+                    results = self._search_by_vector_with_distance(query, top_k, filter, where_document, **kwargs)
                 else:
                     results = self.vector_store.similarity_search_by_vector(
                         embedding=query, k=top_k, filter=filter, where_document=where_document, **kwargs
@@ -103,4 +175,167 @@ class VectorDBRepository:
             return results
         except Exception as e:
             logger.error(f"[VectorDBRepository] Error en la búsqueda: {e}", exc_info=True)
-            raise RuntimeError(f"Error en la búsqueda: {e}")
\ No newline at end of file
+            raise RuntimeError(f"Error en la búsqueda: {e}")
+
+    def _search_by_vector_with_distance(
+        self,
+        embedding: List[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> List[tuple[Document, float]]:
+        """
+        Búsqueda por embedding que devuelve la distancia bruta de ChromaDB, igual que similarity_search_with_score
+        en la búsqueda por texto (sin convertirla en relevancia), para que la puntuación no dependa de si la
+        consulta llega como texto o como embedding.
+
+        Returns:
+            List[tuple[Document, float]]: Documentos ordenados por distancia creciente.
+        """
+        result = self.vector_store._collection.query(
+            query_embeddings=[embedding],
+            n_results=top_k,
+            where=filter,
+            where_document=where_document,
+            include=["documents", "metadatas", "distances"],
+            **kwargs
+        )
+        return [
+            (Document(id=chunk_id, page_content=text or "", metadata=metadata or {}), float(distance))
+            for chunk_id, text, metadata, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    def _hybrid_search(self, query: Union[str, List[float]], text: str, top_k: int) -> List[tuple[Document, float]]:
+        """
+        Búsqueda híbrida: fusiona por rango recíproco (RRF ponderado) los candidatos de la búsqueda densa y
+        del índice BM25 y devuelve los top_k documentos en el orden fusionado.
+
+        La fusión solo decide el orden: la puntuación devuelta con cada documento es siempre su distancia
+        densa bruta (métrica de la colección, menor = más parecido), la misma que devuelve search sin fusión.
+        Los candidatos densos conservan la distancia de la réplica en memoria o de ChromaDB; para los que solo
+        recupera BM25 se calcula con _distances a partir de su embedding (los que no tienen embedding se descartan).
+        La puntuación BM25 nunca se devuelve.
+
+        Args:
+            query (str | List[float]): Texto de consulta o embedding.
+            text (str): Texto de la consulta para BM25.
+            top_k (int): Número de documentos a devolver.
+
+        Returns:
+            List[tuple[Document, float]]: Documentos con su distancia densa bruta, en el orden de la fusión.
+        """
+        embedding = self.embedding_function.embed_query(query) if isinstance(query, str) else query
+        fetch_k = top_k * self.hybrid_candidates
+        dense = self.search(embedding, top_k=fetch_k, return_score=True)
+        lexical = self.lexical_index.search(text, top_k=fetch_k)
+        dense_weight, lexical_weight = self.hybrid_weights
+        dense_by_id = {doc.id: (doc, score) for doc, score in dense}
+        fused: Dict[str, float] = {}
+        for rank, chunk_id in enumerate(dense_by_id):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + dense_weight / (self.rrf_k + rank + 1)
+        for rank, (chunk_id, _score) in enumerate(lexical):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + lexical_weight / (self.rrf_k + rank + 1)
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        missing = [chunk_id for chunk_id in top_ids if chunk_id not in dense_by_id]
+        distances = self._distances(embedding, missing) if missing else {}
+        results = []
+        for chunk_id in top_ids:
+            if chunk_id in dense_by_id:
+                results.append(dense_by_id[chunk_id])
+            elif chunk_id in distances and self.lexical_index.document(chunk_id) is not None:
+                results.append((self.lexical_index.document(chunk_id), distances[chunk_id]))
+        logger.debug(f"[VectorDBRepository] Fusión híbrida: {len(dense)} densos, {len(lexical)} léxicos, {len(missing)} solo léxicos en el top-{top_k}")
+        return results
+
+    def _distances(self, embedding: List[float], ids: List[str]) -> Dict[str, float]:
+        """
+        Distancias densas del embedding a los chunks indicados (réplica en memoria o embeddings de ChromaDB).
+        """
+        if self.local_index is not None and self.local_index.ready:
+            return self.local_index.distances(embedding, ids)
+        collection = self.vector_store._collection
+        result = collection.get(ids=ids, include=["embeddings"])
+        if not len(result["ids"]):
+            return {}
+        space = collection_space(collection)
+        matrix, sq_norms = prepare_matrix(result["embeddings"], space)
+        values = pairwise_distances(embedding, matrix, sq_norms, space)
+        return {chunk_id: float(value) for chunk_id, value in zip(result["ids"], values)}
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Calcula el embedding de una consulta con la misma función de embedding que la colección.
+
+        Args:
+            text (str): Texto de la consulta.
+
+        Returns:
+            List[float]: Embedding de la consulta.
+        """
+        return self.embedding_function.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Versión asíncrona de embed_query (se ejecuta en el pool acotado del repositorio).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._search_executor, self.embed_query, text)
+
+    async def asearch(
+        self,
+        query: Union[str, List[float]],
+        top_k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        where_document: Optional[Dict[str, Any]] = None,
+        return_score: bool = False,
+        query_text: Optional[str] = None,
+        **kwargs
+    ) -> Union[List[Document], List[tuple[Document, float]]]:
+        """
+        Versión asíncrona de search: ejecuta la búsqueda (embedding de la consulta + petición HTTP a ChromaDB)
+        en el pool acotado del repositorio sin bloquear el event loop.
+
+        Args:
+            query (str | List[float]): Texto de consulta o embedding.
+            top_k (int, opcional): Número de documentos a devolver. Por defecto 5.
+            filter (dict, opcional): Filtro por metadatos.
+            where_document (dict, opcional): Filtro por contenido del documento.
+            return_score (bool, opcional): Si es True, devuelve también la distancia bruta de cada documento (menor = más parecido).
+            query_text (str, opcional): Texto de la consulta cuando query es un embedding (búsqueda híbrida).
+            **kwargs: Otros argumentos adicionales para la búsqueda.
+
+        Returns:
+            List[Document] o List[tuple[Document, float]]: Resultados de la búsqueda.
+
+        Raises:
+            RuntimeError: Si ocurre un error durante la búsqueda.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor,
+            partial(self.search, query, top_k=top_k, filter=filter, where_document=where_document, return_score=return_score, query_text=query_text, **kwargs)
+        )
+
+    def fingerprint(self) -> str:
+        """
+        Huella de la colección: nº de chunks y marca de última modificación escrita por la ingesta
+        (metadato "last_modified" de la colección). Cambia cada vez que se añaden, borran o actualizan chunks.
+
+        Returns:
+            str: Huella "<nº de chunks>:<last_modified>".
+
+        Raises:
+            RuntimeError: Si no se puede consultar la colección.
+        """
+        try:
+            client = self.vector_store._client
+            # Se vuelve a pedir la colección: los metadatos del objeto en memoria no se refrescan solos
+            collection = client.get_collection(self.collection_name)
+            last_modified = (collection.metadata or {}).get("last_modified")
+            return f"{collection.count()}:{last_modified}"
+        except Exception as e:
+            logger.error(f"[VectorDBRepository] Error al obtener la huella de la colección: {e}", exc_info=True)
+            raise RuntimeError(f"Error al obtener la huella de la colección: {e}")
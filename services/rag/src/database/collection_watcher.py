@@ -0,0 +1,248 @@
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+def content_digest(document: Optional[str], metadata: Optional[dict]) -> str:
+    """
+    Huella del contenido de un chunk (texto y metadatos). La ingesta actualiza los chunks en el sitio
+    conservando su id, así que el id no basta para saber si un chunk ha cambiado.
+    """
+    payload = json.dumps([document or "", metadata or {}], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class CollectionWatcher:
+    """
+    Vigilancia compartida de la colección de ChromaDB para los índices y cachés del RAG.
+
+    Los índices en memoria (LocalVectorIndex, BM25Index, ProcedureNameIndex) y las cachés (QueryCache,
+    SemanticCache) necesitan enterarse de que la ingesta ha modificado la colección. En lugar de que cada
+    uno consulte la huella con su propio hilo, se suscriben aquí: un único hilo consulta la huella (una sola
+    petición por ciclo, con independencia del nº de suscriptores) y llama a los suscriptores cuyo intervalo
+    ha vencido y cuya huella ha quedado atrás. Si un suscriptor falla, se reintenta en su siguiente ciclo.
+
+    También centraliza la descarga paginada de chunks y el cálculo de los chunks nuevos, modificados y
+    borrados que usan las resincronizaciones incrementales (diff).
+    """
+
+    def __init__(
+        self,
+        collection_fn: Callable[[], Any],
+        fingerprint_fn: Callable[[], str],
+        page_size: int = 1000
+    ) -> None:
+        """
+        Inicializa el vigilante. El hilo arranca con la primera suscripción.
+
+        Args:
+            collection_fn (Callable[[], Collection]): Devuelve la colección de ChromaDB (cliente chromadb).
+            fingerprint_fn (Callable[[], str]): Devuelve la huella actual de la colección.
+            page_size (int): Chunks descargados por petición en fetch().
+
+        Returns:
+            None
+        """
+        self.collection_fn = collection_fn
+        self.fingerprint_fn = fingerprint_fn
+        self.page_size = max(1, int(page_size))
+        # nombre -> {"callback", "refresh_seconds", "fingerprint", "next_check"}
+        self._subscribers: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._counters = {"checks": 0, "changes": 0, "notifications": 0, "errors": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def fingerprint(self) -> str:
+        """
+        Consulta la huella actual de la colección.
+
+        Returns:
+            str: Huella de la colección.
+        """
+        fingerprint = self.fingerprint_fn()
+        with self._lock:
+            self._counters["checks"] += 1
+            if self._fingerprint is not None and fingerprint != self._fingerprint:
+                self._counters["changes"] += 1
+            self._fingerprint = fingerprint
+        return fingerprint
+
+    def collection(self):
+        """
+        Devuelve la colección de ChromaDB.
+        """
+        return self.collection_fn()
+
+    def subscribe(
+        self,
+        name: str,
+        callback: Callable[[str], None],
+        refresh_seconds: float,
+        fingerprint: Optional[str] = None
+    ) -> None:
+        """
+        Registra un suscriptor que se llamará con la nueva huella cuando la colección cambie.
+
+        Args:
+            name (str): Nombre del suscriptor (métricas y logs).
+            callback (Callable[[str], None]): Función llamada con la huella nueva; si lanza una excepción se reintenta en el siguiente ciclo.
+            refresh_seconds (float): Intervalo mínimo entre comprobaciones para este suscriptor.
+            fingerprint (str, opcional): Huella con la que el suscriptor ya está sincronizado.
+
+        Returns:
+            None
+        """
+        refresh_seconds = max(1.0, float(refresh_seconds))
+        with self._lock:
+            self._subscribers[name] = {
+                "callback": callback,
+                "refresh_seconds": refresh_seconds,
+                "fingerprint": fingerprint,
+                "next_check": time.monotonic() + refresh_seconds,
+            }
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="rag-collection-watch", daemon=True)
+                self._thread.start()
+        logger.info(f"[CollectionWatcher] Suscrito '{name}' (comprobación cada {refresh_seconds} s)")
+
+    def _tick_seconds(self) -> float:
+        """
+        Espera del hilo entre ciclos: el menor intervalo de los suscriptores.
+        """
+        with self._lock:
+            return min((sub["refresh_seconds"] for sub in self._subscribers.values()), default=30.0)
+
+    def _watch(self) -> None:
+        """
+        Bucle del hilo de vigilancia.
+        """
+        while not self._stop.wait(self._tick_seconds()):
+            self.check()
+
+    def check(self) -> None:
+        """
+        Consulta la huella una vez y notifica a los suscriptores vencidos que no estén al día.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = {name: sub for name, sub in self._subscribers.items() if sub["next_check"] <= now}
+            for sub in due.values():
+                sub["next_check"] = now + sub["refresh_seconds"]
+        if not due:
+            return
+        try:
+            fingerprint = self.fingerprint()
+        except Exception as e:
+            with self._lock:
+                self._counters["errors"] += 1
+            logger.warning(f"[CollectionWatcher] No se pudo obtener la huella de la colección: {e}")
+            return
+        for name, sub in due.items():
+            if sub["fingerprint"] == fingerprint:
+                continue
+            try:
+                sub["callback"](fingerprint)
+                sub["fingerprint"] = fingerprint
+                with self._lock:
+                    self._counters["notifications"] += 1
+            except Exception as e:
+                with self._lock:
+                    self._counters["errors"] += 1
+                logger.warning(f"[CollectionWatcher] Error al notificar a '{name}' (se reintentará): {e}")
+
+    def stop(self) -> None:
+        """
+        Detiene el hilo de vigilancia.
+        """
+        self._stop.set()
+
+    def diff(self, local_digests: Dict[str, str], include: List[str]) -> tuple[Dict[str, list], set[str]]:
+        """
+        Compara la colección con un índice local por id y por huella de contenido (content_digest).
+
+        Una misma ingesta puede añadir, borrar y actualizar chunks en el sitio, así que no basta con comparar
+        los conjuntos de ids: se descargan el texto y los metadatos de toda la colección y se comparan sus
+        huellas. Los campos pesados de include (p. ej. "embeddings") solo se descargan para los chunks nuevos
+        o modificados.
+
+        Args:
+            local_digests (Dict[str, str]): id -> huella de contenido de los chunks del índice local.
+            include (list[str]): Campos a devolver de los chunks nuevos o modificados.
+
+        Returns:
+            tuple[Dict[str, list], set[str]]: (chunks nuevos o modificados en el orden de la colección, con
+            "ids", "digests" y los campos de include; ids borrados).
+        """
+        contents = self.fetch(["documents", "metadatas"])
+        changed = []
+        for chunk_id, document, metadata in zip(contents["ids"], contents["documents"], contents["metadatas"]):
+            digest = content_digest(document, metadata)
+            if local_digests.get(chunk_id) != digest:
+                changed.append((chunk_id, digest, {"documents": document, "metadatas": metadata}))
+        removed = set(local_digests) - set(contents["ids"])
+        heavy = [field for field in include if field not in ("documents", "metadatas")]
+        rows: Dict[str, Dict[str, Any]] = {}
+        if heavy and changed:
+            fetched = self.fetch(heavy, [chunk_id for chunk_id, _digest, _fields in changed])
+            # ChromaDB no garantiza el orden de get(ids=...): se indexa por id
+            rows = {
+                chunk_id: {field: fetched[field][i] for field in heavy}
+                for i, chunk_id in enumerate(fetched["ids"])
+            }
+        result: Dict[str, list] = {"ids": [], "digests": [], **{field: [] for field in include}}
+        for chunk_id, digest, fields in changed:
+            if heavy and chunk_id not in rows:
+                # Borrado entre las dos descargas: se omite (la ingesta vuelve a cambiar la huella)
+                continue
+            fields = {**fields, **rows.get(chunk_id, {})}
+            result["ids"].append(chunk_id)
+            result["digests"].append(digest)
+            for field in include:
+                result[field].append(fields[field])
+        return result, removed
+
+    def fetch(self, include: List[str], ids: Optional[List[str]] = None) -> Dict[str, list]:
+        """
+        Descarga chunks de la colección (todos o los ids indicados), por páginas.
+
+        Args:
+            include (list[str]): Campos a descargar ("embeddings", "documents", "metadatas").
+            ids (list[str], opcional): Ids a descargar; None para toda la colección.
+
+        Returns:
+            Dict[str, list]: {"ids": [...], <campo>: [...]} con una posición por chunk.
+        """
+        collection = self.collection()
+        fetched: Dict[str, list] = {"ids": [], **{field: [] for field in include}}
+        if ids is not None:
+            pages = [{"ids": ids[i:i + self.page_size]} for i in range(0, len(ids), self.page_size)]
+        else:
+            pages = ({"limit": self.page_size, "offset": offset} for offset in range(0, collection.count(), self.page_size))
+        for page in pages:
+            result = collection.get(include=include, **page)
+            fetched["ids"].extend(result["ids"])
+            for field in include:
+                fetched[field].extend(result[field])
+        return fetched
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado del vigilante.
+
+        Returns:
+            Dict[str, Any]: Suscriptores, huella vigente, comprobaciones, cambios detectados, notificaciones y errores.
+        """
+        with self._lock:
+            return {
+                "subscribers": {name: sub["fingerprint"] for name, sub in self._subscribers.items()},
+                "fingerprint": self._fingerprint,
+                **self._counters,
+            }
@@ -0,0 +1,245 @@
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.database.collection_watcher import CollectionWatcher, content_digest
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+
+def collection_space(collection) -> str:
+    """
+    Métrica de distancia de una colección de ChromaDB (metadato "hnsw:space" o configuración HNSW; "l2" por defecto).
+    """
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration_json", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    return space or "l2"
+
+
+def prepare_matrix(embeddings: list, space: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte los embeddings en una matriz float32 contigua (normalizada por filas si la métrica es "cosine").
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (matriz, normas al cuadrado de cada fila).
+    """
+    matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+    if space == "cosine":
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1)
+    return matrix, np.einsum("ij,ij->i", matrix, matrix)
+
+
+def pairwise_distances(embedding: List[float], matrix: np.ndarray, sq_norms: np.ndarray, space: str) -> np.ndarray:
+    """
+    Distancias de un embedding a todas las filas de una matriz preparada con prepare_matrix, en la misma
+    escala que ChromaDB ("l2" al cuadrado, "cosine" = 1 - coseno, "ip" = 1 - producto escalar).
+    """
+    query = np.asarray(embedding, dtype=np.float32)
+    if space == "cosine":
+        norm = np.linalg.norm(query)
+        query = query / norm if norm > 0 else query
+    dots = matrix @ query
+    if space == "l2":
+        return np.maximum(sq_norms - 2 * dots + float(query @ query), 0.0)
+    return 1.0 - dots
+
+
+class LocalVectorIndex:
+    """
+    Réplica en memoria de la colección de ChromaDB para búsquedas exactas sin salir del proceso.
+
+    El corpus de procedimientos es pequeño (unos miles de chunks de 384 dimensiones), así que todos los
+    embeddings caben en una matriz float32 contigua y el top-k se resuelve con un único producto
+    matriz-vector y argpartition, sin el salto de red ni la (de)serialización JSON del cliente HTTP.
+    Las distancias siguen la métrica de la colección ("l2" al cuadrado, "cosine" o "ip") y son las mismas
+    distancias brutas que devuelve VectorDBRepository.search al consultar ChromaDB (por texto o por
+    embedding), para que los umbrales de puntuación no cambien.
+
+    El índice se suscribe al CollectionWatcher compartido: cuando la huella de la colección cambia,
+    resincroniza de forma incremental (CollectionWatcher.diff): se comparan las huellas de contenido de cada
+    chunk, se descargan los embeddings solo de los chunks nuevos o actualizados en el sitio y se eliminan
+    los borrados.
+    """
+
+    def __init__(self, watcher: CollectionWatcher, refresh_seconds: float = 30) -> None:
+        """
+        Inicializa el índice, realiza la carga inicial y lo suscribe a los cambios de la colección.
+
+        Args:
+            watcher (CollectionWatcher): Vigilante compartido de la colección (huella y descarga paginada).
+            refresh_seconds (float): Intervalo de comprobación de la huella.
+
+        Returns:
+            None
+        """
+        self.watcher = watcher
+        self.refresh_seconds = refresh_seconds
+        self.space = "l2"
+        # Estado inmutable que se sustituye completo en cada sincronización (lecturas sin lock)
+        self._state = self._empty_state()
+        self._fingerprint: Optional[str] = None
+        self._sync_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._counters = {"searches": 0, "full_loads": 0, "incremental_syncs": 0, "sync_errors": 0}
+        self.sync()
+        watcher.subscribe("local_index", self.sync, refresh_seconds, fingerprint=self._fingerprint)
+
+    @staticmethod
+    def _empty_state() -> Dict[str, Any]:
+        """
+        Estado de un índice vacío.
+        """
+        return {"ids": [], "positions": {}, "digests": [], "documents": [], "metadatas": [], "matrix": np.zeros((0, 0), dtype=np.float32), "sq_norms": np.zeros(0, dtype=np.float32)}
+
+    @property
+    def ready(self) -> bool:
+        """
+        True si el índice se ha sincronizado al menos una vez.
+        """
+        return self._fingerprint is not None
+
+    def __len__(self) -> int:
+        return len(self._state["ids"])
+
+    def _build_state(self, ids: list, digests: list, embeddings: list, documents: list, metadatas: list) -> Dict[str, Any]:
+        """
+        Construye el estado del índice con la matriz float32 contigua, las normas al cuadrado y la huella de
+        contenido de cada chunk.
+        """
+        if not ids:
+            return self._empty_state()
+        matrix, sq_norms = prepare_matrix(embeddings, self.space)
+        return {
+            "ids": list(ids),
+            "positions": {chunk_id: i for i, chunk_id in enumerate(ids)},
+            "digests": list(digests),
+            "documents": list(documents),
+            "metadatas": list(metadatas),
+            "matrix": matrix,
+            "sq_norms": sq_norms,
+        }
+
+    def sync(self, fingerprint: Optional[str] = None) -> None:
+        """
+        Sincroniza el índice con la colección si su huella ha cambiado.
+
+        Args:
+            fingerprint (str, opcional): Huella actual notificada por el CollectionWatcher; None para consultarla.
+
+        Raises:
+            RuntimeError: Si falla la carga inicial.
+            Exception: Si falla una resincronización (se mantiene la versión anterior y el vigilante la reintenta).
+        """
+        with self._sync_lock:
+            try:
+                fingerprint = fingerprint if fingerprint is not None else self.watcher.fingerprint()
+                if fingerprint == self._fingerprint:
+                    return
+                start = time.perf_counter()
+                self.space = collection_space(self.watcher.collection())
+                state = self._state
+                include = ["embeddings", "documents", "metadatas"]
+                if not self.ready:
+                    fetched = self.watcher.fetch(include)
+                    digests = [content_digest(document, metadata) for document, metadata in zip(fetched["documents"], fetched["metadatas"])]
+                    self._state = self._build_state(fetched["ids"], digests, fetched["embeddings"], fetched["documents"], fetched["metadatas"])
+                    with self._counters_lock:
+                        self._counters["full_loads"] += 1
+                    mode = "carga completa"
+                else:
+                    # Chunks nuevos o actualizados en el sitio (huella de contenido distinta) y borrados
+                    fetched, removed = self.watcher.diff(dict(zip(state["ids"], state["digests"])), include)
+                    updated = sum(1 for chunk_id in fetched["ids"] if chunk_id in state["positions"])
+                    replaced = removed | set(fetched["ids"])
+                    keep = [i for i, chunk_id in enumerate(state["ids"]) if chunk_id not in replaced]
+                    self._state = self._build_state(
+                        [state["ids"][i] for i in keep] + fetched["ids"],
+                        [state["digests"][i] for i in keep] + fetched["digests"],
+                        list(state["matrix"][keep]) + list(fetched["embeddings"]),
+                        [state["documents"][i] for i in keep] + fetched["documents"],
+                        [state["metadatas"][i] for i in keep] + fetched["metadatas"]
+                    )
+                    with self._counters_lock:
+                        self._counters["incremental_syncs"] += 1
+                    mode = f"incremental (+{len(fetched['ids']) - updated}, ~{updated}, -{len(removed)})"
+                self._fingerprint = fingerprint
+                logger.info(f"[LocalVectorIndex] Sincronizado ({mode}): {len(self)} chunks, métrica '{self.space}', {time.perf_counter() - start:.2f} s")
+            except Exception as e:
+                with self._counters_lock:
+                    self._counters["sync_errors"] += 1
+                if not self.ready:
+                    logger.error(f"[LocalVectorIndex] Error en la carga inicial: {e}", exc_info=True)
+                    raise RuntimeError(f"No se pudo cargar el índice local: {e}")
+                logger.warning(f"[LocalVectorIndex] Error al resincronizar (se mantiene la versión anterior): {e}")
+                raise
+
+    def search(self, embedding: List[float], top_k: int = 5) -> List[tuple[Document, float]]:
+        """
+        Devuelve los top_k chunks más cercanos al embedding con su distancia.
+
+        Args:
+            embedding (List[float]): Embedding de la consulta.
+            top_k (int): Nº de documentos a devolver.
+
+        Returns:
+            List[tuple[Document, float]]: Documentos ordenados por distancia creciente (misma escala que ChromaDB).
+        """
+        state = self._state
+        n = len(state["ids"])
+        with self._counters_lock:
+            self._counters["searches"] += 1
+        if n == 0 or top_k <= 0:
+            return []
+        distances = pairwise_distances(embedding, state["matrix"], state["sq_norms"], self.space)
+        k = min(top_k, n)
+        top = np.argpartition(distances, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(distances[top])]
+        return [
+            (Document(id=state["ids"][i], page_content=state["documents"][i], metadata=state["metadatas"][i] or {}), float(distances[i]))
+            for i in top
+        ]
+
+    def distances(self, embedding: List[float], ids: List[str]) -> Dict[str, float]:
+        """
+        Distancias del embedding a los chunks indicados (solo los presentes en el índice).
+
+        Args:
+            embedding (List[float]): Embedding de la consulta.
+            ids (List[str]): Ids de los chunks.
+
+        Returns:
+            Dict[str, float]: id -> distancia (misma escala que ChromaDB).
+        """
+        state = self._state
+        rows = [(chunk_id, state["positions"][chunk_id]) for chunk_id in ids if chunk_id in state["positions"]]
+        if not rows:
+            return {}
+        positions = [row for _chunk_id, row in rows]
+        values = pairwise_distances(embedding, state["matrix"][positions], state["sq_norms"][positions], self.space)
+        return {chunk_id: float(value) for (chunk_id, _row), value in zip(rows, values)}
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve el estado del índice.
+
+        Returns:
+            Dict[str, Any]: Nº de chunks, dimensión, métrica, huella, búsquedas y sincronizaciones.
+        """
+        state = self._state
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {
+            "chunks": len(state["ids"]),
+            "dimension": int(state["matrix"].shape[1]) if state["matrix"].ndim == 2 else 0,
+            "space": self.space,
+            "fingerprint": self._fingerprint,
+            **counters,
+        }
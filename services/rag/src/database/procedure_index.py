@@ -0,0 +1,230 @@
+import re
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from src.database.collection_watcher import CollectionWatcher
+
+import logging
+# Obtiene un logger para el módulo actual
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Palabras que no identifican un procedimiento y se ignoran en la consulta y en los nombres
+_STOPWORDS = {
+    "procedure", "procedures", "checklist", "the", "a", "an", "of", "for", "to", "in", "case",
+    "what", "which", "how", "do", "does", "i", "we", "is", "are", "give", "me", "show", "tell",
+    "about", "please", "steps", "step", "perform", "execute", "run",
+}
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """
+    Tokens normalizados de un nombre o consulta (minúsculas, alfanuméricos, sin palabras genéricas).
+    """
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Trigramas de caracteres de un texto normalizado (con relleno en los extremos).
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Distancia de Levenshtein entre a y b, con corte en max_distance + 1 para descartar pronto.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class ProcedureNameIndex:
+    """
+    Índice difuso de nombres de procedimiento para resolver directamente las consultas que nombran uno.
+
+    La ingesta (Chunker.chunk_pymupdf) escribe un chunk por procedimiento con el metadato "procedure"
+    ("PREFLIGHT PROCEDURE", "ENGINE FIRE ON GROUND"...). Cuando la consulta nombra claramente un
+    procedimiento ("engine fire on ground procedure"), se devuelven sus chunks sin calcular el embedding
+    ni consultar la base vectorial:
+
+    1. Los nombres y la consulta se normalizan en tokens (minúsculas, sin palabras genéricas).
+    2. Los trigramas de caracteres preseleccionan los nombres candidatos.
+    3. Un nombre coincide si todos sus tokens aparecen en la consulta, admitiendo erratas por distancia de
+       edición en tokens largos, y la consulta apenas tiene tokens adicionales. Si coinciden varios nombres
+       gana el más específico (más tokens); un empate se considera ambiguo y no se resuelve.
+
+    El índice se suscribe al CollectionWatcher compartido y se reconstruye cuando cambia la huella de la colección.
+    """
+
+    def __init__(
+        self,
+        watcher: CollectionWatcher,
+        refresh_seconds: float = 30,
+        max_extra_tokens: int = 1,
+        min_ngram_similarity: float = 0.5
+    ) -> None:
+        """
+        Inicializa el índice, realiza la carga inicial y lo suscribe a los cambios de la colección.
+
+        Args:
+            watcher (CollectionWatcher): Vigilante compartido de la colección (huella y descarga paginada).
+            refresh_seconds (float): Intervalo de comprobación de la huella.
+            max_extra_tokens (int): Tokens de la consulta que pueden no pertenecer al nombre del procedimiento.
+            min_ngram_similarity (float): Fracción mínima de trigramas del nombre presentes en la consulta para considerarlo candidato.
+
+        Returns:
+            None
+        """
+        self.watcher = watcher
+        self.refresh_seconds = refresh_seconds
+        self.max_extra_tokens = max(0, int(max_extra_tokens))
+        self.min_ngram_similarity = min_ngram_similarity
+        # Estado que se sustituye completo en cada sincronización (lecturas sin lock)
+        self._state: Dict[str, Any] = {"names": {}, "trigrams": {}}
+        self._fingerprint: Optional[str] = None
+        self._sync_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._counters = {"matches": 0, "misses": 0, "ambiguous": 0, "sync_errors": 0}
+        self.sync()
+        watcher.subscribe("procedure_lookup", self.sync, refresh_seconds, fingerprint=self._fingerprint)
+
+    def sync(self, fingerprint: Optional[str] = None) -> None:
+        """
+        Reconstruye el índice si la huella de la colección ha cambiado.
+
+        Args:
+            fingerprint (str, opcional): Huella actual notificada por el CollectionWatcher; None para consultarla.
+
+        Raises:
+            RuntimeError: Si falla la carga inicial.
+            Exception: Si falla una resincronización (se mantiene la versión anterior y el vigilante la reintenta).
+        """
+        with self._sync_lock:
+            try:
+                fingerprint = fingerprint if fingerprint is not None else self.watcher.fingerprint()
+                if fingerprint == self._fingerprint:
+                    return
+                start = time.perf_counter()
+                fetched = self.watcher.fetch(["documents", "metadatas"])
+                # nombre normalizado -> {"tokens", "documents"}
+                names: Dict[str, Dict[str, Any]] = {}
+                for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                    procedure = (metadata or {}).get("procedure")
+                    tokens = normalize_tokens(procedure) if isinstance(procedure, str) else []
+                    if not tokens:
+                        continue
+                    entry = names.setdefault(" ".join(tokens), {"tokens": tokens, "documents": []})
+                    entry["documents"].append(Document(id=chunk_id, page_content=text or "", metadata=metadata or {}))
+                index: Dict[str, set[str]] = {}
+                for key in names:
+                    for gram in trigrams(key):
+                        index.setdefault(gram, set()).add(key)
+                self._state = {"names": names, "trigrams": index}
+                self._fingerprint = fingerprint
+                logger.info(f"[ProcedureNameIndex] Sincronizado: {len(names)} procedimiento(s), {time.perf_counter() - start:.2f} s")
+            except Exception as e:
+                with self._counters_lock:
+                    self._counters["sync_errors"] += 1
+                if self._fingerprint is None:
+                    logger.error(f"[ProcedureNameIndex] Error en la carga inicial: {e}", exc_info=True)
+                    raise RuntimeError(f"No se pudo cargar el índice de procedimientos: {e}")
+                logger.warning(f"[ProcedureNameIndex] Error al resincronizar (se mantiene la versión anterior): {e}")
+                raise
+
+    @staticmethod
+    def _max_typos(token: str) -> int:
+        """
+        Erratas admitidas en un token según su longitud (siglas y números deben coincidir exactamente).
+        """
+        if len(token) >= 8:
+            return 2
+        if len(token) >= 5:
+            return 1
+        return 0
+
+    def _matched_tokens(self, name_tokens: list[str], query_tokens: list[str]) -> Optional[set[int]]:
+        """
+        Posiciones de la consulta que cubren todos los tokens del nombre, o None si alguno no aparece.
+        """
+        used: set[int] = set()
+        for token in name_tokens:
+            max_typos = self._max_typos(token)
+            match = next(
+                (i for i, candidate in enumerate(query_tokens)
+                 if i not in used and edit_distance(token, candidate, max_typos) <= max_typos),
+                None
+            )
+            if match is None:
+                return None
+            used.add(match)
+        return used
+
+    def lookup(self, query: str) -> Optional[list[Document]]:
+        """
+        Resuelve una consulta que nombra claramente un procedimiento.
+
+        Args:
+            query (str): Texto de la consulta.
+
+        Returns:
+            list[Document] | None: Chunks del procedimiento nombrado o None si la consulta no nombra
+            (sin ambigüedad) ningún procedimiento.
+        """
+        state = self._state
+        query_tokens = normalize_tokens(query)
+        best, best_size, ambiguous = None, 0, False
+        if query_tokens:
+            query_grams = trigrams(" ".join(query_tokens))
+            shared: Dict[str, int] = {}
+            for gram in query_grams:
+                for key in state["trigrams"].get(gram, ()):
+                    shared[key] = shared.get(key, 0) + 1
+            for key, count in shared.items():
+                if count / len(trigrams(key)) < self.min_ngram_similarity:
+                    continue
+                name_tokens = state["names"][key]["tokens"]
+                used = self._matched_tokens(name_tokens, query_tokens)
+                if used is None or len(query_tokens) - len(used) > self.max_extra_tokens:
+                    continue
+                if len(name_tokens) > best_size:
+                    best, best_size, ambiguous = key, len(name_tokens), False
+                elif len(name_tokens) == best_size:
+                    ambiguous = True
+        with self._counters_lock:
+            if best is None or ambiguous:
+                self._counters["ambiguous" if ambiguous else "misses"] += 1
+                return None
+            self._counters["matches"] += 1
+        logger.info(f"[ProcedureNameIndex] Consulta resuelta por nombre de procedimiento: '{best}'")
+        return list(state["names"][best]["documents"])
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores del índice.
+
+        Returns:
+            Dict[str, Any]: Procedimientos indexados, consultas resueltas por nombre, fallos, ambiguas,
+            tasa de resolución y huella de la colección.
+        """
+        with self._counters_lock:
+            lookups = self._counters["matches"] + self._counters["misses"] + self._counters["ambiguous"]
+            return {
+                "procedures": len(self._state["names"]),
+                **self._counters,
+                "match_rate": round(self._counters["matches"] / lookups, 4) if lookups else 0.0,
+                "fingerprint": self._fingerprint,
+            }
@@ -1,6 +1,12 @@
+import re
+import time
+import queue
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import List, Dict, Any
 
 # Obtiene un logger para el módulo actual
 logger = logging.getLogger(__name__)
@@ -9,12 +15,20 @@ class Embedder:
     """
     Wrapper para modelos sentence-transformer que genera embeddings de texto y es compatible con ChromaDB.
     """
-    def __init__(self, model_name: str) -> None:
+    def __init__(self, model_name: str, cache_size: int = 1024, max_batch_size: int = 16, max_wait_ms: float = 5) -> None:
         """
         Inicializa el objeto Embedder cargando el modelo sentence-transformer especificado.
 
+        Los embeddings de consultas se guardan en una caché LRU por texto normalizado y las llamadas a
+        embed_query que llegan a la vez desde distintas peticiones se agrupan en una sola llamada a encode
+        (micro-batching): un hilo dedicado recoge las consultas pendientes durante como mucho max_wait_ms
+        y las codifica juntas, de modo que N consultas concurrentes cuestan una pasada del modelo.
+
         Args:
             model_name (str): Nombre del modelo de sentence-transformers a cargar.
+            cache_size (int): Embeddings de consultas almacenados (LRU); 0 desactiva la caché.
+            max_batch_size (int): Consultas máximas por llamada a encode; 1 desactiva el micro-batching.
+            max_wait_ms (float): Espera máxima para completar un lote desde que llega la primera consulta.
         
         Returns:
             None: No se devuelven valores. 
@@ -25,6 +39,15 @@ class Embedder:
         logger.debug(f"[Embedder] Intentando inicializar Embedder con el modelo: {model_name}")
         try:
             self.model = SentenceTransformer(model_name)
+            self.cache_size = max(0, int(cache_size))
+            self.max_batch_size = max(1, int(max_batch_size))
+            self.max_wait_seconds = max_wait_ms / 1000
+            self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+            self._lock = threading.Lock()
+            self._counters = {"cache_hits": 0, "cache_misses": 0, "batches": 0, "batched_queries": 0, "max_batch_size_seen": 0}
+            self._pending: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+            if self.max_batch_size > 1:
+                threading.Thread(target=self._batch_loop, name="rag-embed-batcher", daemon=True).start()
             logger.info(f"[Embedder] Embedder inicializado correctamente con el modelo: {model_name}")
         except Exception as e:
             logger.error(f"[Embedder] Error al cargar el modelo SentenceTransformer '{model_name}': {e}")
@@ -56,10 +79,20 @@ class Embedder:
             logger.error(f"[Embedder] Ocurrió un error durante el proceso de embedding (embed_documents): {e}")
             raise RuntimeError(f"Error durante el proceso de embedding (embed_documents): {e}")
 
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """
+        Normaliza el texto de una consulta (sin espacios extremos ni repetidos) para la clave de la caché.
+        """
+        return re.sub(r"\s+", " ", text.strip())
+
     def embed_query(self, text: str) -> List[float]:
         """
         Genera el embedding para una consulta individual.
 
+        Se consulta primero la caché LRU; en caso de fallo la consulta se añade al lote en curso del
+        micro-batcher (o se codifica directamente si el micro-batching está desactivado).
+
         Args:
             text (str): Texto de la consulta a embeder.
 
@@ -72,12 +105,97 @@ class Embedder:
         if not text:
             logger.warning("[Embedder] El método embed_query fue llamado con un texto vacío.")
             return []
+        key = self._normalize(text)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._counters["cache_hits"] += 1
+                logger.debug("[Embedder] Embedding de la consulta servido desde la caché (embed_query).")
+                return list(cached)
+            self._counters["cache_misses"] += 1
         logger.info("[Embedder] Creando embedding para una consulta (embed_query).")
         try:
-            embedding = self.model.encode([text], convert_to_tensor=False)[0].tolist()
+            if self.max_batch_size > 1:
+                future: Future = Future()
+                self._pending.put((key, future))
+                embedding = future.result()
+            else:
+                embedding = self._encode_batch([key])[0]
             logger.info("[Embedder] Se creó correctamente el embedding para la consulta (embed_query).")
             logger.debug(f"[Embedder] Detalles del embedding: {embedding}")
-            return embedding
+            return list(embedding)
         except Exception as e:
             logger.error(f"[Embedder] Ocurrió un error durante el proceso de embedding (embed_query): {e}")
-            raise RuntimeError(f"Error durante el proceso de embedding (embed_query): {e}")
\ No newline at end of file
+            raise RuntimeError(f"Error durante el proceso de embedding (embed_query): {e}")
+
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Codifica un lote de consultas con una sola llamada a encode y guarda los embeddings en la caché.
+
+        Args:
+            texts (List[str]): Consultas normalizadas (sin repetir).
+
+        Returns:
+            List[List[float]]: Embeddings en el mismo orden.
+        """
+        embeddings = self.model.encode(texts, convert_to_tensor=False).tolist()
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["batched_queries"] += len(texts)
+            self._counters["max_batch_size_seen"] = max(self._counters["max_batch_size_seen"], len(texts))
+            if self.cache_size:
+                for text, embedding in zip(texts, embeddings):
+                    self._cache[text] = embedding
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return embeddings
+
+    def _batch_loop(self) -> None:
+        """
+        Hilo del micro-batcher: espera la primera consulta pendiente, completa el lote durante como mucho
+        max_wait_seconds (o hasta max_batch_size consultas) y resuelve las consultas con una sola llamada a encode.
+        """
+        while True:
+            key, future = self._pending.get()
+            batch: Dict[str, list[Future]] = {key: [future]}
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    key, future = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                # Consultas idénticas del mismo lote comparten embedding
+                batch.setdefault(key, []).append(future)
+            texts = list(batch)
+            try:
+                embeddings = self._encode_batch(texts)
+                for text, embedding in zip(texts, embeddings):
+                    for waiting in batch[text]:
+                        waiting.set_result(embedding)
+            except Exception as e:
+                for waiting_list in batch.values():
+                    for waiting in waiting_list:
+                        waiting.set_exception(e)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve las métricas de la caché de consultas y del micro-batcher.
+
+        Returns:
+            Dict[str, Any]: Aciertos/fallos y tasa de acierto de la caché, entradas, nº de lotes, consultas
+            codificadas y tamaño medio y máximo de lote.
+        """
+        with self._lock:
+            lookups = self._counters["cache_hits"] + self._counters["cache_misses"]
+            batches = self._counters["batches"]
+            return {
+                **self._counters,
+                "hit_rate": round(self._counters["cache_hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._cache),
+                "avg_batch_size": round(self._counters["batched_queries"] / batches, 2) if batches else 0.0,
+            }
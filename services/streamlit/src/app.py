@@ -50,7 +50,9 @@ STATS_FILE = '/data/statistics_response/statistics.csv'
 # =====================
 ASR_URL_TRANSCRIBE = config.get("ASR", {}).get("TRANSCRIPTION_URL", "http://asr:8000/transcribe")
 ASR_URL_LANGUAGES = config.get("ASR", {}).get("LANGUAGES_URL", "http://asr:8000/languages")
+ASR_URL_JOBS = config.get("ASR", {}).get("JOBS_URL")  # Si no se define, se usa /transcribe
 RAG_URL = config.get("RAG", {}).get("WEBHOOK_RAG_URL", "http://rag:8000/rag_result")
+RAG_STREAM_URL = config.get("RAG", {}).get("STREAM_RAG_URL")  # Si no se define, la respuesta se espera completa
 # AGENT_REACT_URL = config.get("RAG", {}).get("WEBHOOK_AGENT_REACT_URL", "http://rag:8000/react_agent_result")
 CHROMADB_URL = config.get("VECTOR_DB", {}).get("URL", "http://chromadb:8000")
 
@@ -119,7 +121,8 @@ if menu == "Chatbot":
             recorded_audio=recorded_audio,
             asr_transcription_url=ASR_URL_TRANSCRIBE,
             asr_timeout=ASR_TIMEOUT,
-            language=language
+            language=language,
+            asr_jobs_url=ASR_URL_JOBS
         )
         # Si hay input (texto o audio transcrito), consultar RAG y Agent React
         if text_input:
@@ -131,7 +134,8 @@ if menu == "Chatbot":
                 # agent_react_url=AGENT_REACT_URL, 
                 rag_timeout=RAG_TIMEOUT, 
                 # agent_timeout=AGENT_TIMEOUT, 
-                output_not_match_answer_context=OUTPUT_NOT_MATCH_ANSWER_CONTEXT
+                output_not_match_answer_context=OUTPUT_NOT_MATCH_ANSWER_CONTEXT,
+                rag_stream_url=RAG_STREAM_URL
             )
             # Guardar info de la interacción en CSV usando los resultados retornados
             os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
@@ -1,6 +1,7 @@
 import time
+import json
 import logging
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, Iterator
 import requests
 import streamlit as st
 from fastapi import UploadFile, File
@@ -9,13 +10,18 @@ import threading
 
 logger = logging.getLogger(__name__)
 
+# Trabajos de transcripción asíncronos: timeout de cada petición HTTP y espera de cada long-poll
+ASR_JOB_REQUEST_TIMEOUT = 10
+ASR_JOB_LONG_POLL_SECONDS = 5
+
 def manager_input(
     user_input: Dict[str, Any] | None,
     recorded_audio: Optional[UploadFile],
     *,  # Obliga a usar keywords para los siguientes argumentos
     asr_transcription_url: str,
     asr_timeout: int,
-    language: Optional[str] = None
+    language: Optional[str] = None,
+    asr_jobs_url: Optional[str] = None
 ) -> Optional[str]:
     ## Procesar entrada del usuario (texto y/o audio)
     text_input = None
@@ -51,7 +57,7 @@ def manager_input(
             st.warning("Could not get audio to play.")
 
         # Transcribimos el audio
-        result = transcribe_audio(audio_name, audio_file, audio_type, asr_transcription_url=asr_transcription_url, asr_timeout=asr_timeout, language=language)
+        result = transcribe_audio(audio_name, audio_file, audio_type, asr_transcription_url=asr_transcription_url, asr_timeout=asr_timeout, language=language, asr_jobs_url=asr_jobs_url)
         if not result:
             return None
         transcription_text, transcription_time = result
@@ -85,7 +91,7 @@ def manager_input(
             st.warning("Could not get audio to play.")
         
         # Transcribimos el audio
-        result = transcribe_audio(audio_name, audio_file, audio_type, asr_transcription_url=asr_transcription_url, asr_timeout=asr_timeout, language=language)
+        result = transcribe_audio(audio_name, audio_file, audio_type, asr_transcription_url=asr_transcription_url, asr_timeout=asr_timeout, language=language, asr_jobs_url=asr_jobs_url)
         if not result:
             return None
         transcription_text, transcription_time = result
@@ -118,7 +124,7 @@ def manager_input(
         audio_type = recorded_audio.type
         
         # Transcribimos el audio        
-        result = transcribe_audio(audio_name, audio_file, audio_type, asr_transcription_url=asr_transcription_url, asr_timeout=asr_timeout, language=language)
+        result = transcribe_audio(audio_name, audio_file, audio_type, asr_transcription_url=asr_transcription_url, asr_timeout=asr_timeout, language=language, asr_jobs_url=asr_jobs_url)
         if not result:
             return None
         transcription_text, transcription_time = result
@@ -146,7 +152,8 @@ def query_services(
     # agent_react_url: str,
     rag_timeout: int = 60,
     # agent_timeout: int = 60,
-    output_not_match_answer_context: str = "The question does not match with the context provided."
+    output_not_match_answer_context: str = "The question does not match with the context provided.",
+    rag_stream_url: Optional[str] = None
 ) -> Dict[str, Any]:
     """Query RAG and Agent React services in parallel and render results.
 
@@ -156,6 +163,7 @@ def query_services(
         agent_react_url: Endpoint for the Agent React service.
         rag_timeout: Timeout in seconds for RAG request.
         agent_timeout: Timeout in seconds for Agent React request.
+        rag_stream_url: Streaming (SSE) endpoint for the RAG service; if set, context and steps are shown as they arrive.
 
     Returns:
         Dict[str, Any]:
@@ -225,15 +233,19 @@ def query_services(
     #     except Exception as e:
     #         q.put(("agent", 500, "unknown_error", str(e), None, None))
 
-    thread_rag = threading.Thread(target=fetch_rag_async, args=(user_input, queue))
-    # thread_agent = threading.Thread(target=fetch_agent_async, args=(user_input, queue))
-    thread_rag.start()
-    # thread_agent.start()
+    if rag_stream_url:
+        # Streaming: se pinta en el hilo principal según llegan los eventos (Streamlit no admite pintar desde otros hilos)
+        queue.put(stream_rag_answer(user_input, rag_stream_url, rag_timeout, rag_placeholder))
+    else:
+        thread_rag = threading.Thread(target=fetch_rag_async, args=(user_input, queue))
+        # thread_agent = threading.Thread(target=fetch_agent_async, args=(user_input, queue))
+        thread_rag.start()
+        # thread_agent.start()
 
-    # Placeholders with initial state
-    with rag_placeholder.container():
-        # st.subheader("RAG")
-        st.info("Waiting for RAG response...")
+        # Placeholders with initial state
+        with rag_placeholder.container():
+            # st.subheader("RAG")
+            st.info("Waiting for RAG response...")
     # with agent_placeholder.container():
     #     st.subheader("Agent React")
     #     st.info("Waiting for Agent React response...")
@@ -265,7 +277,7 @@ def query_services(
             rag_input = resp.get("input", "") if resp else ""
             rag_context_raw = resp.get("context", []) if resp else []
             rag_context = [
-                {"content": doc.get("content", ""), "score": doc.get("score", 0)}
+                {"content": doc.get("content", ""), "score": doc.get("score")}
                 for doc in rag_context_raw
             ]          
             rag_time = elapsed
@@ -287,7 +299,10 @@ def query_services(
                         st.markdown("**📚 Context:**")
                         for item in rag_context:
                             st.markdown(f" {item['content']}")
-                            st.markdown(f"  **Score:** {item['score']}")
+                            if item["score"] is None:
+                                st.markdown("  **Score:** – (resolved by procedure name)")
+                            else:
+                                st.markdown(f"  **Score:** {item['score']}")
                             st.markdown("---")
                         
                 else:
@@ -346,6 +361,81 @@ def query_services(
     }
 
 
+def iter_sse_events(response: requests.Response) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse a text/event-stream HTTP response into (event, data) pairs.
+
+    Args:
+        response: Streaming response (requests.post(..., stream=True)).
+
+    Yields:
+        (event name, decoded JSON data) for each event.
+    """
+    event, data_lines = "message", []
+    for raw in response.iter_lines(decode_unicode=True):
+        if raw is None:
+            continue
+        if not raw:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif raw.startswith("event:"):
+            event = raw[len("event:"):].strip()
+        elif raw.startswith("data:"):
+            data_lines.append(raw[len("data:"):].strip())
+    if data_lines:
+        yield event, json.loads("\n".join(data_lines))
+
+def stream_rag_answer(
+    text: str,
+    rag_stream_url: str,
+    rag_timeout: int,
+    placeholder,
+) -> tuple[str, float, str, Optional[str], Optional[Dict[str, Any]], Optional[float]]:
+    """Query the RAG streaming endpoint and render the context and procedure steps as they arrive.
+
+    Args:
+        text: The text to query (typed or transcribed).
+        rag_stream_url: Streaming (SSE) endpoint for the RAG service.
+        rag_timeout: Timeout in seconds for connecting and between received events.
+        placeholder: Streamlit placeholder where the partial answer is rendered.
+
+    Returns:
+        Same tuple as the non-streaming path: (who, status_code, status, error, resp, elapsed).
+    """
+    with placeholder.container():
+        st.info("Waiting for RAG response...")
+    start_rag = time.time()
+    try:
+        logger.info(f"Enviando consulta a RAG (streaming): {text}")
+        with requests.post(rag_stream_url, json={"transcription": text}, stream=True, timeout=rag_timeout) as response:
+            if response.status_code != 200:
+                rag_json = response.json()
+                return ("rag", response.status_code, rag_json.get("status", "unknown_error"),
+                        rag_json.get("message", f"HTTP {response.status_code}"), rag_json.get("response"), time.time() - start_rag)
+            context, steps, first_step_time = [], [], None
+            for event, data in iter_sse_events(response):
+                if event == "context":
+                    context = data.get("context") or []
+                elif event == "step":
+                    steps.append(data.get("text", ""))
+                    first_step_time = first_step_time or time.time() - start_rag
+                elif event == "answer":
+                    logger.info(f"Respuesta de RAG recibida en streaming ({len(steps)} paso(s) parciales)")
+                    return ("rag", 200, data.get("status", "success"), None, data.get("response", {}), time.time() - start_rag)
+                elif event == "error":
+                    return ("rag", 500, data.get("status", "processing_error"), data.get("message"), None, time.time() - start_rag)
+                if event in ("context", "step"):
+                    with placeholder.container():
+                        st.info(f"Generating answer from {len(context)} retrieved document(s)...")
+                        if steps:
+                            st.markdown("\n".join(f"{i}. {step}" for i, step in enumerate(steps, start=1)))
+                            st.caption(f"First step after {first_step_time:.1f} seconds")
+            return ("rag", 500, "processing_error", "RAG stream ended without an answer", None, time.time() - start_rag)
+    except requests.Timeout:
+        return ("rag", 500, "timeout", "Request to RAG timed out", None, None)
+    except Exception as e:
+        return ("rag", 500, "unknown_error", str(e), None, None)
+
 def transcribe_audio(
     audio_name: str = "default_audio",
     audio_file: UploadFile = File(...),
@@ -353,6 +443,7 @@ def transcribe_audio(
     asr_transcription_url: str = "",
     asr_timeout: int = 300,
     language: Optional[str] = None,
+    asr_jobs_url: Optional[str] = None,
 ) -> Optional[Tuple[str, float]]:
     """Send audio to ASR, play it, and persist transcription context.
 
@@ -363,27 +454,36 @@ def transcribe_audio(
         asr_transcription_url: Endpoint for ASR transcription.
         asr_timeout: Timeout in seconds for ASR request.
         language: Optional ISO code; None for auto-detect.
+        asr_jobs_url: Endpoint for ASR transcription jobs; if set, the audio is submitted as a job and polled.
 
     Returns:
-        (text, elapsed_seconds) on success; None otherwise.
+        (text, elapsed_seconds) on success; None otherwise, including transcriptions the ASR marks as unusable.
     """
     try:
         files = {"file": (audio_name, audio_file, audio_type)}    
         data = {"language": language} if language else None
         start_transcription = time.time()
-        response = requests.post(asr_transcription_url, files=files, data=data, timeout=asr_timeout)
-        # response.raise_for_status()
-        end_transcription = time.time()
-        transcription_time = end_transcription - start_transcription
-        response_data = response.json()
-        status_code = response.status_code
-        if status_code != 200:
-            error_message = response_data.get("message", "unknown error")
-            logger.error(f"Error en transcripción de audio: {error_message}")
-            st.error(f"{status_code} - Error while transcribing audio: {error_message}")
+        if asr_jobs_url:
+            job = run_transcription_job(asr_jobs_url, files=files, data=data, asr_timeout=asr_timeout)
+            if job is None:
+                return None
+            transcription, confidence = job.get("text", ""), job.get("confidence")
+        else:
+            response = requests.post(asr_transcription_url, files=files, data=data, timeout=asr_timeout)
+            # response.raise_for_status()
+            response_data = response.json()
+            status_code = response.status_code
+            if status_code != 200:
+                error_message = response_data.get("message", "unknown error")
+                logger.error(f"Error en transcripción de audio: {error_message}")
+                st.error(f"{status_code} - Error while transcribing audio: {error_message}")
+                return None
+            transcription, confidence = response_data.get('transcription', ''), response_data.get('confidence')
+        transcription_time = time.time() - start_transcription
+        logger.info(f"Transcripción recibida: {transcription}")
+        if not check_transcription_confidence(transcription, confidence):
             return None
-        logger.info(f"Transcripción recibida: {response_data.get('transcription', '')}")
-        return response_data.get('transcription', ''), transcription_time
+        return transcription, transcription_time
     except requests.Timeout:
         logger.exception("Timeout en transcripción de audio")
         st.warning("ASR took too long. Please try again or reduce audio length.")
@@ -393,6 +493,100 @@ def transcribe_audio(
         st.error("Error while transcribing audio.")
         return None
 
+def check_transcription_confidence(transcription: str, confidence: Optional[Dict[str, Any]]) -> bool:
+    """Decide whether a transcription is good enough to query the RAG service.
+
+    An 'unusable' verdict (silence, noise or garbled audio) asks the pilot to repeat instead of spending
+    several seconds of LLM time on it; an 'uncertain' verdict only shows a warning.
+
+    Args:
+        transcription: Transcribed text.
+        confidence: Confidence verdict returned by the ASR ({"verdict", "score", "reasons", ...}); None if not provided.
+
+    Returns:
+        True if the transcription can be sent to the RAG service; False otherwise.
+    """
+    if not confidence:
+        return True
+    verdict = confidence.get("verdict")
+    if verdict == "unusable":
+        logger.warning(f"Transcripción descartada por baja confianza: {confidence.get('reasons')} ({transcription!r})")
+        message = "I could not understand the audio clearly. Please repeat your request."
+        st.warning(message, icon="🔁")
+        st.session_state.chat_history.append({"role": "assistant", "content": message})
+        return False
+    if verdict == "uncertain":
+        st.warning(f"The transcription may be inaccurate (confidence {confidence.get('score', 0):.0%}). Please check it.", icon="⚠️")
+    return True
+
+def run_transcription_job(
+    asr_jobs_url: str,
+    files: Dict[str, Any],
+    data: Optional[Dict[str, Any]],
+    asr_timeout: int = 300,
+) -> Optional[Dict[str, Any]]:
+    """Submit audio as an ASR job and long-poll it until it finishes.
+
+    Each HTTP call uses a short timeout; asr_timeout only bounds the total wait. If it expires the job
+    is cancelled so it stops using CPU on the ASR service.
+
+    Args:
+        asr_jobs_url: Endpoint for ASR transcription jobs (/jobs).
+        files: Multipart files payload.
+        data: Form data (language) or None.
+        asr_timeout: Maximum total wait in seconds.
+
+    Returns:
+        Completed job snapshot (text, segments, confidence) on success; None otherwise.
+
+    Raises:
+        requests.Timeout: If the job does not finish within asr_timeout.
+    """
+    response = requests.post(asr_jobs_url, files=files, data=data, timeout=ASR_JOB_REQUEST_TIMEOUT)
+    response_data = response.json()
+    if response.status_code != 202:
+        error_message = response_data.get("message", "unknown error")
+        logger.error(f"Error al enviar el trabajo de transcripción: {error_message}")
+        st.error(f"{response.status_code} - Error while transcribing audio: {error_message}")
+        return None
+    job_url = f"{asr_jobs_url.rstrip('/')}/{response_data['job_id']}"
+    logger.info(f"Trabajo de transcripción enviado: {job_url}")
+
+    progress = st.progress(0.0, text="Transcribing audio...")
+    version = -1
+    deadline = time.time() + asr_timeout
+    try:
+        while time.time() < deadline:
+            response = requests.get(
+                job_url,
+                params={"wait": ASR_JOB_LONG_POLL_SECONDS, "since": version},
+                timeout=ASR_JOB_LONG_POLL_SECONDS + ASR_JOB_REQUEST_TIMEOUT
+            )
+            job = response.json().get("job") or {}
+            if response.status_code != 200:
+                error_message = response.json().get("message", "unknown error")
+                logger.error(f"Error al consultar el trabajo de transcripción: {error_message}")
+                st.error(f"{response.status_code} - Error while transcribing audio: {error_message}")
+                return None
+            version = job.get("version", version)
+            done, total = job["progress"]["segments_done"], job["progress"]["segments_total"]
+            if total:
+                progress.progress(done / total, text=f"Transcribing audio... ({done}/{total} segments)")
+            if job["state"] == "completed":
+                return job
+            if job["state"] in ("failed", "cancelled"):
+                logger.error(f"Trabajo de transcripción {job['state']}: {job.get('error')}")
+                st.error(f"Error while transcribing audio: job {job['state']}")
+                return None
+    finally:
+        progress.empty()
+    # Se agotó la espera: cancelar el trabajo para liberar el ASR
+    try:
+        requests.delete(job_url, timeout=ASR_JOB_REQUEST_TIMEOUT)
+    except Exception:
+        logger.warning(f"No se pudo cancelar el trabajo de transcripción {job_url}")
+    raise requests.Timeout(f"Transcription job did not finish within {asr_timeout} s")
+
 def fetch_supported_languages(
         asr_languages_url: str, 
         asr_timeout: int = 60